@@ -0,0 +1,115 @@
+import argparse
+import contextlib
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from search import Finder
+
+
+# Finder загружается один раз в родительском процессе до создания пула. Рабочие процессы создаются через fork и
+# получают уже построенные индексы без повторного чтения книги и без копирования данных через pickle.
+finder = None
+
+
+def rank_chunk(queries: list) -> list:
+    # Ближайшие персоны для всей пачки считаются одной матрицей расстояний, и каждый запрос берет готовый результат
+    finder.prefetch(queries)
+    return [json.dumps(finder.rank(query), ensure_ascii=False) for query in queries]
+
+
+def chunks(queries, size: int):
+    while True:
+        chunk = list(itertools.islice(queries, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def read_queries(stream):
+    for line in stream:
+        query = line.strip()
+        if query:
+            yield query
+
+
+def run(queries, output, workers: int, chunkSize: int) -> int:
+    """
+    Данная функция предназначена для обработки потока запросов и записи результатов в формате JSONL (по одной
+    строке на запрос, в порядке входного файла).
+
+    :param
+    queries: итератор запросов.
+    output: поток для записи результатов.
+    workers (int): число рабочих процессов (1 - поиск в текущем процессе).
+    chunkSize (int): сколько запросов обрабатывается одной пачкой (и отдается рабочему процессу за раз).
+
+    :return
+    (int): число обработанных запросов.
+    """
+
+    count = 0
+    if workers <= 1:
+        for lines in map(rank_chunk, chunks(queries, chunkSize)):
+            output.write("".join(line + "\n" for line in lines))
+            count += len(lines)
+        return count
+
+    # Входной поток читается пачками по chunkSize, и в пуле одновременно находится не больше workers * 4 пачек,
+    # чтобы длинный файл или stdin не вычитывался в память целиком
+    window = workers * 4
+    with multiprocessing.get_context("fork").Pool(workers) as pool:
+        queryChunks = chunks(queries, chunkSize)
+        while True:
+            batch = list(itertools.islice(queryChunks, window))
+            if not batch:
+                break
+            for lines in pool.imap(rank_chunk, batch):
+                output.write("".join(line + "\n" for line in lines))
+                count += len(lines)
+
+    return count
+
+
+def main():
+    global finder
+
+    parser = argparse.ArgumentParser(description="Пакетный поиск по базе знаний: запросы по одному на строку, "
+                                                 "результаты в формате JSONL.")
+    parser.add_argument("input", nargs="?", default="-", help="файл с запросами (по умолчанию - stdin)")
+    parser.add_argument("-o", "--output", default="-", help="файл для результатов (по умолчанию - stdout)")
+    parser.add_argument("--data", default="Data.xlsx", help="книга с базой знаний")
+    parser.add_argument("--snapshot", default=None, help="путь к снимку индексов (по умолчанию - рядом с книгой)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--chunk-size", type=int, default=64)
+    args = parser.parse_args()
+
+    # Сообщения Finder о загрузке не должны смешиваться с результатами в stdout
+    with contextlib.redirect_stdout(sys.stderr):
+        finder = Finder(args.data, snapshotPath=args.snapshot)
+    # Матрица расстояний сама использует все ядра; при нескольких процессах каждый считает ее в одном потоке
+    engine = finder.state.personaParser.personaIndex.engine
+    if engine is not None:
+        engine.workers = -1 if args.workers <= 1 else 1
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    output = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    try:
+        start = time.perf_counter()
+        count = run(read_queries(source), output, args.workers, args.chunk_size)
+        elapsed = time.perf_counter() - start
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if output is not sys.stdout:
+            output.close()
+
+    print(f"Обработано запросов: {count} за {elapsed:.2f} с. ({count / elapsed if elapsed else 0:.0f} запросов/с, "
+          f"процессов: {max(args.workers, 1)})", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
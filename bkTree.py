@@ -0,0 +1,180 @@
+import heapq
+from functools import partial
+from itertools import count
+
+from Levenshtein import distance
+
+
+class BKTree:
+    """
+    BK-дерево (Burkhard-Keller) над расстоянием Левенштейна. Каждый узел хранит ключ и словарь детей вида
+    "расстояние до родителя" -> узел. По неравенству треугольника при поиске с радиусом r в узле на расстоянии d
+    достаточно спуститься только в детей с ребрами из отрезка [d - r, d + r], остальные ветви отсекаются целиком.
+
+    Узел - это список [ключ, дети]: так дерево компактнее и без проблем сохраняется в снимок через pickle.
+    """
+
+    def __init__(self, keys=()):
+        self.root = None
+        self.size = 0
+
+        for key in keys:
+            self.add(key)
+
+    def add(self, key: str) -> None:
+        """
+        Данная функция предназначена для добавления ключа в дерево. Повторное добавление ключа ничего не меняет.
+
+        :param
+        key (str): добавляемый ключ.
+        """
+
+        if self.root is None:
+            self.root = [key, {}]
+            self.size = 1
+            return
+
+        node = self.root
+        while True:
+            nodeKey, children = node
+            keyDistance = distance(key, nodeKey)
+            if keyDistance == 0:
+                return
+
+            child = children.get(keyDistance)
+            if child is None:
+                children[keyDistance] = [key, {}]
+                self.size += 1
+                return
+            node = child
+
+    def added(self, keys) -> "BKTree":
+        """
+        Данная функция предназначена для получения нового дерева с добавленными ключами. Текущее дерево не меняется:
+        копируются только узлы на пути от корня к месту вставки, остальные узлы у деревьев общие.
+
+        :param
+        keys: добавляемые ключи.
+
+        :return
+        (BKTree): новое дерево.
+        """
+
+        tree = BKTree()
+        tree.root, tree.size = self.root, self.size
+        # Узлы, уже скопированные в новое дерево: их можно менять на месте
+        copied = set()
+        own = partial(self.__own, copied=copied)
+
+        for key in keys:
+            if tree.root is None:
+                tree.root = own([key, {}])
+                tree.size = 1
+                continue
+
+            node = tree.root = own(tree.root)
+            while True:
+                nodeKey, children = node
+                keyDistance = distance(key, nodeKey)
+                if keyDistance == 0:
+                    break
+
+                child = children.get(keyDistance)
+                if child is None:
+                    children[keyDistance] = own([key, {}])
+                    tree.size += 1
+                    break
+                node = children[keyDistance] = own(child)
+
+        return tree
+
+    @staticmethod
+    def __own(node: list, copied: set) -> list:
+        if id(node) in copied:
+            return node
+        node = [node[0], dict(node[1])]
+        copied.add(id(node))
+        return node
+
+    def within(self, targetLine: str, maxDistance: int) -> list:
+        """
+        Данная функция предназначена для поиска всех ключей, которые находятся на расстоянии не больше maxDistance
+        от входной строки.
+
+        :param
+        targetLine (str): входная строка, по которой производится поиск.
+        maxDistance (int): максимальное допустимое расстояние.
+
+        :return
+        (list): список пар (ключ, расстояние), отсортированный по возрастанию расстояния.
+        """
+
+        if self.root is None:
+            return []
+
+        result = []
+        stack = [self.root]
+        while stack:
+            nodeKey, children = stack.pop()
+            nodeDistance = distance(targetLine, nodeKey)
+            if nodeDistance <= maxDistance:
+                result.append((nodeKey, nodeDistance))
+
+            low, high = nodeDistance - maxDistance, nodeDistance + maxDistance
+            stack.extend(child for edge, child in children.items() if low <= edge <= high)
+
+        result.sort(key=lambda pair: pair[1])
+        return result
+
+    def nearest(self, targetLine: str, k: int = 3, positions: dict = None) -> list:
+        """
+        Данная функция предназначена для поиска k ближайших ключей. Узлы обходятся в порядке нижней оценки
+        расстояния |d - ребро|, а радиус поиска сужается до расстояния худшего из уже найденных k кандидатов.
+
+        :param
+        targetLine (str): входная строка, по которой производится поиск.
+        k (int): сколько ближайших ключей вернуть.
+        positions (dict): позиции ключей в книге. Если переданы, то в ответ попадают только эти ключи (остальные узлы
+        лишь обходятся), а при равных расстояниях раньше идет ключ с меньшей позицией: ответ не зависит от формы
+        дерева, то есть от порядка добавления ключей.
+
+        :return
+        (list): список пар (ключ, расстояние), отсортированный по возрастанию расстояния.
+        """
+
+        if self.root is None:
+            return []
+
+        # best - куча-максимум из k лучших: (-расстояние, -позиция, ключ); queue - куча узлов по нижней оценке.
+        best = []
+        order = count()
+        queue = [(0, next(order), self.root)]
+        # С позициями ключ на том же расстоянии, что и худший, может его заменить, поэтому такие ветви не отсекаются
+        tieCost = 0 if positions is not None else 1
+
+        while queue:
+            lowerBound, _, node = heapq.heappop(queue)
+            full = len(best) >= k
+            if full and lowerBound > -best[0][0] - tieCost:
+                # Все оставшиеся узлы не ближе худшего найденного.
+                break
+
+            nodeKey, children = node
+            nodeDistance = distance(targetLine, nodeKey)
+            if positions is None or nodeKey in positions:
+                position = positions[nodeKey] if positions is not None else next(order)
+                if not full:
+                    heapq.heappush(best, (-nodeDistance, -position, nodeKey))
+                elif (nodeDistance, position) < (-best[0][0], -best[0][1]):
+                    heapq.heapreplace(best, (-nodeDistance, -position, nodeKey))
+
+            radius = -best[0][0] - tieCost if len(best) >= k else None
+            for edge, child in children.items():
+                childBound = abs(nodeDistance - edge)
+                if radius is None or childBound <= radius:
+                    heapq.heappush(queue, (childBound, next(order), child))
+
+        return [(key, -negDistance) for negDistance, _, key in sorted(best, reverse=True)]
+
+    def __len__(self):
+        return self.size
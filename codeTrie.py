@@ -0,0 +1,211 @@
+from Levenshtein import distance
+
+
+NO_CODE = "Без кода"
+
+
+class CodeTrie:
+    """
+    Префиксное дерево шифров подразделений по сегментам, разделенным точками: шифр 01.111.03.01 - это путь
+    01 -> 111 -> 03 -> 01. Точный шифр ищется за число сегментов, все шифры внутри ветви (например, все под 01.111)
+    выдаются обходом только этой ветви, а исправление опечаток идет по сегментам: на каждом уровне запрос сравнивается
+    только с сегментами-детьми уже выбранных узлов.
+
+    Узел - это список [дети, шифр]: дети - словарь "сегмент -> узел", шифр - ключ, который заканчивается в этом узле
+    (или None). Шифры "Без кода" в дерево не попадают и хранятся отдельным списком noCode.
+    """
+
+    def __init__(self, codes=()):
+        self.root = [{}, None]
+        self.noCode = []
+        self.size = 0
+
+        for code in codes:
+            self.add(code)
+
+    @staticmethod
+    def segments(code: str) -> list:
+        return [segment.strip() for segment in code.split(".")]
+
+    def add(self, code: str) -> None:
+        """
+        Данная функция предназначена для добавления шифра в дерево (или в список "Без кода"). Повторное добавление
+        ничего не меняет.
+
+        :param
+        code (str): добавляемый шифр.
+        """
+
+        if code.startswith(NO_CODE):
+            if code not in self.noCode:
+                self.noCode.append(code)
+            return
+
+        node = self.root
+        for segment in self.segments(code):
+            node = node[0].setdefault(segment, [{}, None])
+        if node[1] is None:
+            node[1] = code
+            self.size += 1
+
+    def updated(self, added, removed) -> "CodeTrie":
+        """
+        Данная функция предназначена для получения дерева новой версии данных. Текущее дерево не меняется: копируются
+        только узлы на путях к добавленным и удаленным шифрам, остальные узлы у деревьев общие.
+
+        :param
+        added: добавленные шифры.
+        removed: удаленные шифры.
+
+        :return
+        (CodeTrie): новое дерево.
+        """
+
+        trie = CodeTrie()
+        trie.root, trie.size = [dict(self.root[0]), self.root[1]], self.size
+        trie.noCode = list(self.noCode)
+        # Узлы, уже скопированные в новое дерево: их можно менять на месте
+        copied = {id(trie.root)}
+
+        for code, present in [(code, False) for code in removed] + [(code, True) for code in added]:
+            if code.startswith(NO_CODE):
+                if present and code not in trie.noCode:
+                    trie.noCode.append(code)
+                elif not present and code in trie.noCode:
+                    trie.noCode.remove(code)
+                continue
+
+            node = trie.root
+            for segment in self.segments(code):
+                child = node[0].get(segment)
+                if child is None and not present:
+                    break
+                if id(child) not in copied:
+                    child = [dict(child[0]), child[1]] if child is not None else [{}, None]
+                    copied.add(id(child))
+                    node[0][segment] = child
+                node = child
+            else:
+                if present and node[1] is None:
+                    node[1] = code
+                    trie.size += 1
+                elif not present and node[1] == code:
+                    # Пустые узлы остаются в дереве: обход пропускает узлы без шифра
+                    node[1] = None
+                    trie.size -= 1
+
+        return trie
+
+    def __node(self, code: str):
+        node = self.root
+        for segment in self.segments(code):
+            node = node[0].get(segment)
+            if node is None:
+                return None
+        return node
+
+    def get(self, code: str):
+        """
+        Данная функция предназначена для точного поиска шифра.
+
+        :param
+        code (str): шифр.
+
+        :return
+        Шифр в том виде, в котором он записан в книге, либо None.
+        """
+
+        if code.startswith(NO_CODE):
+            return code if code in self.noCode else None
+
+        node = self.__node(code)
+        return node[1] if node is not None else None
+
+    def under(self, prefix: str, limit: int = None) -> list:
+        """
+        Данная функция предназначена для получения всех шифров ветви: самого prefix (если такой шифр есть) и всех
+        вложенных в него. Обходится только ветвь prefix, поэтому время зависит от размера ответа, а не от числа
+        шифров в дереве.
+
+        :param
+        prefix (str): шифр-префикс по целым сегментам (01.111 включает 01.111.03, но не 01.1110).
+        limit (int): если задан, обход останавливается после limit шифров.
+
+        :return
+        (list): шифры ветви в порядке обхода в глубину (внутри узла - в порядке строк книги).
+        """
+
+        node = self.__node(prefix)
+        if node is None:
+            return []
+
+        result = []
+        stack = [node]
+        while stack:
+            children, code = stack.pop()
+            if code is not None:
+                result.append(code)
+                if limit is not None and len(result) >= limit:
+                    break
+            stack.extend(reversed(children.values()))
+        return result
+
+    def correct(self, targetLine: str, limit: int = 3, maxCost: int = 3) -> list:
+        """
+        Данная функция предназначена для исправления опечаток по сегментам. Стоимость шифра - сумма расстояний
+        Левенштейна между сегментами запроса и сегментами шифра. Допустимая стоимость увеличивается по одному
+        (1, 2, ..., maxCost), пока не наберется limit шифров. Обход идет только по ветвям, которые укладываются в
+        допустимую стоимость, а когда запас исчерпан, спуск продолжается по точному совпадению сегмента за одно
+        обращение к словарю детей.
+
+        :param
+        targetLine (str): запрос с тем же числом сегментов, что и искомый шифр.
+        limit (int): сколько шифров нужно набрать.
+        maxCost (int): максимальная сумма расстояний по сегментам.
+
+        :return
+        (list): список пар (шифр, сумма расстояний по сегментам), отсортированный по возрастанию суммы. Может
+        содержать меньше limit шифров (или быть пустым), если подходящих шифров с таким числом сегментов нет.
+        """
+
+        querySegments = self.segments(targetLine)
+        depth = len(querySegments)
+        # Одни и те же сегменты (01, 02, ...) повторяются у детей разных узлов одного уровня, поэтому расстояние
+        # до каждого сегмента на уровне считается один раз
+        levelDistances = [{} for _ in querySegments]
+
+        result = []
+        for bound in range(1, maxCost + 1):
+            result = []
+            stack = [(self.root, 0, 0)]
+            while stack:
+                (children, code), level, cost = stack.pop()
+                if level == depth:
+                    if code is not None:
+                        result.append((code, cost))
+                    continue
+
+                querySegment = querySegments[level]
+                if cost == bound:
+                    # Запас исчерпан: дальше подходит только точное совпадение сегмента
+                    child = children.get(querySegment)
+                    if child is not None:
+                        stack.append((child, level + 1, cost))
+                    continue
+
+                distances = levelDistances[level]
+                for segment, child in children.items():
+                    segmentDistance = distances.get(segment)
+                    if segmentDistance is None:
+                        segmentDistance = distances[segment] = distance(querySegment, segment)
+                    if cost + segmentDistance <= bound:
+                        stack.append((child, level + 1, cost + segmentDistance))
+
+            if len(result) >= limit:
+                break
+
+        result.sort(key=lambda pair: pair[1])
+        return result
+
+    def __len__(self):
+        return self.size + len(self.noCode)
@@ -0,0 +1,112 @@
+import re
+
+
+# Роли связи "персона - подразделение"
+MANAGES = "manages"
+COORDINATES = "coordinates"
+HEADS = "heads"
+
+# Значения в ячейках "Руководимые подразделения" / "Координируемые подразделения" перечисляются через ";" или с
+# новой строки (запятая встречается внутри наименований, поэтому разделителем не считается)
+SEPARATOR = re.compile(r"[;\n]+")
+
+
+def normalize(name: str) -> str:
+    return " ".join(name.split()).casefold().replace("ё", "е")
+
+
+class CrossIndex:
+    """
+    Двусторонний индекс связей между персонами и подразделениями, построенный один раз при загрузке данных:
+    - по листу "Полномочия": руководимые и координируемые подразделения каждой персоны;
+    - по листу "Оргструктура": руководитель подразделения (колонка 41).
+    Ответы на вопросы "кто руководит подразделением" и "какими подразделениями руководит персона" - это обращение к
+    словарю, без перебора строк и дополнительных поисков.
+
+    Наименования из ячеек сопоставляются с ключами парсеров без учета регистра и лишних пробелов; значения, для
+    которых ключа нет, в индекс не попадают.
+    """
+
+    def __init__(self, personaNames=(), departmentNames=()):
+        self.unitsByPerson = {}
+        self.peopleByUnit = {}
+        self.__personas = {normalize(name): name for name in personaNames}
+        self.__departments = {normalize(name): name for name in departmentNames}
+
+    def link(self, person: str, unit: str, role: str) -> bool:
+        """
+        Данная функция предназначена для добавления связи в обе стороны индекса.
+
+        :param
+        person (str): ФИО в том виде, в котором оно записано в книге.
+        unit (str): наименование подразделения в том виде, в котором оно записано в книге.
+        role (str): MANAGES, COORDINATES или HEADS.
+
+        :return
+        (bool): True, если и персона, и подразделение найдены среди ключей и связь добавлена.
+        """
+
+        person = self.__personas.get(normalize(person))
+        unit = self.__departments.get(normalize(unit))
+        if person is None or unit is None:
+            return False
+
+        units = self.unitsByPerson.setdefault(person, [])
+        if (unit, role) not in units:
+            units.append((unit, role))
+        people = self.peopleByUnit.setdefault(unit, [])
+        if (person, role) not in people:
+            people.append((person, role))
+        return True
+
+    def linkCell(self, person: str, cell: str, role: str) -> int:
+        """
+        Данная функция предназначена для добавления связей персоны со всеми подразделениями, перечисленными в ячейке.
+
+        :return
+        (int): сколько связей добавлено.
+        """
+
+        return sum(self.link(person, unit, role) for unit in SEPARATOR.split(cell) if unit.strip())
+
+    def finish(self) -> None:
+        # Словари сопоставления нужны только при построении и в снимок не сохраняются
+        self.__personas = {}
+        self.__departments = {}
+
+    def unitsOf(self, person: str) -> list:
+        return self.unitsByPerson.get(person, [])
+
+    def peopleOf(self, unit: str) -> list:
+        return self.peopleByUnit.get(unit, [])
+
+    @classmethod
+    def build(cls, personaParser, structureParser, structureRows, headColumn: int = 40) -> "CrossIndex":
+        """
+        Данная функция предназначена для построения индекса по распарсенным листам.
+
+        :param
+        personaParser (PersonaParcer): парсер листа "Полномочия".
+        structureParser (StructureParser): парсер листа "Оргструктура".
+        structureRows (list): строки листа "Оргструктура" (колонка руководителя в хранилище не сохраняется).
+        headColumn (int): номер колонки с ФИО руководителя.
+
+        :return
+        (CrossIndex): построенный индекс.
+        """
+
+        index = cls(personaParser.personaDict.keys(), structureParser.structureDict.keys())
+
+        for person, records in personaParser.personaDict.items():
+            for record in records:
+                index.linkCell(person, record.managedUnits, MANAGES)
+                index.linkCell(person, record.coordinatedUnits, COORDINATES)
+
+        for row in structureRows:
+            if not row or row[0] is None:
+                break
+            if len(row) > headColumn and row[headColumn] is not None:
+                index.link(str(row[headColumn]), str(row[0]), HEADS)
+
+        index.finish()
+        return index
@@ -0,0 +1,50 @@
+import logging
+import os
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+class DataWatcher:
+    """
+    Фоновый наблюдатель за файлом данных. Раз в interval секунд сверяет время изменения и размер файла; если они
+    поменялись, вызывает Finder.reload в своем потоке. Бот в это время продолжает отвечать на старых данных.
+    """
+
+    def __init__(self, finder, interval: float = 60.0):
+        self.finder = finder
+        self.interval = interval
+        self.__stopEvent = threading.Event()
+        self.__thread = threading.Thread(target=self.__run, name="data-watcher", daemon=True)
+        self.__lastStat = self.__stat()
+
+    def __stat(self):
+        try:
+            stat = os.stat(self.finder.filepath)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def __run(self) -> None:
+        while not self.__stopEvent.wait(self.interval):
+            currentStat = self.__stat()
+            if currentStat is None or currentStat == self.__lastStat:
+                continue
+
+            try:
+                if self.finder.reload():
+                    stats = self.finder.lastLoadStats
+                    changes = f" (изменено строк: {stats['rows']})" if stats.get("source") == "delta" else ""
+                    logger.info(f"Файл {self.finder.filepath} изменился, данные перезагружены за "
+                                f"{self.finder.lastReloadDuration:.2f} с.{changes}")
+                self.__lastStat = currentStat
+            except Exception:
+                # Файл мог быть перехвачен на середине записи: оставляем старые данные и пробуем на следующем шаге.
+                logger.exception(f"Не удалось перезагрузить {self.finder.filepath}, продолжаем работу на старых данных")
+
+    def start(self) -> None:
+        self.__thread.start()
+
+    def stop(self) -> None:
+        self.__stopEvent.set()
@@ -0,0 +1,172 @@
+from array import array
+
+from records import DepartmentRecord
+from rowDelta import RowDelta, fingerprint
+from workbookLoader import getValue
+
+
+def storedRows(rows) -> list:
+    """
+    Данная функция предназначена для отбора строк листа "Оргструктура", которые попадают в хранилище. Как и в прежних
+    парсерах, наименования читаются до первой строки без наименования, а коды - до первой строки без кода, независимо
+    друг от друга. Лист заканчивается, когда закончились и те, и другие.
+
+    :param
+    rows: строки листа (кортежи значений).
+
+    :return
+    (list): строки до конца листа.
+    """
+
+    result = []
+    namesEnded = codesEnded = False
+    for row in rows:
+        namesEnded = namesEnded or not row or row[0] is None
+        codesEnded = codesEnded or len(row) <= 1 or row[1] is None
+        if namesEnded and codesEnded:
+            break
+        result.append(row)
+    return result
+
+
+class DepartmentStore:
+    """
+    Общее хранилище строк листа "Оргструктура" для StructureParser и NumParser. Данные лежат по колонкам: каждая
+    колонка - это массив номеров значений (array('I')), а сами значения хранятся в словаре один раз. Повторяющиеся
+    ячейки ("нет", кампусы, статусы, вышестоящие подразделения) занимают по 4 байта на строку вместо отдельной строки.
+
+    Над строками построены два индекса: по наименованию и по коду ИС-ПРО. Как и в прежних парсерах, индекс
+    наименований заканчивается на первой строке без наименования, а индекс кодов - на первой строке без кода, поэтому
+    проиндексированные строки каждого индекса - это начало order длиной namedRows и codedRows. Записи
+    (DepartmentRecord / CodeRecord) собираются из колонок только при выводе результата.
+
+    При обновлении книги (applyDelta) строки не перенумеровываются: новые строки дописываются в конец колонок, а
+    удаленные лишь пропадают из индексов и из order - списка действующих строк в порядке книги.
+    """
+
+    def __init__(self, rows=()):
+        self.values = []
+        self.valueIds = {}
+        self.columns = [array("I") for _ in DepartmentRecord.FIELDS]
+        self.nameIndex = {}
+        self.codeIndex = {}
+        self.order = array("I")
+        self.namedRows = 0
+        self.codedRows = 0
+        # Отпечатки строк (по номеру строки) для сравнения с новой версией книги
+        self.fingerprints = []
+
+        for row in storedRows(rows):
+            self.append(row)
+
+        # Обратный словарь значений нужен только при добавлении строк: после загрузки он освобождается и при
+        # следующем append собирается заново из values
+        self.valueIds = None
+
+    def __encode(self, value: str) -> int:
+        if self.valueIds is None:
+            self.valueIds = {value: valueId for valueId, value in enumerate(self.values)}
+        valueId = self.valueIds.get(value)
+        if valueId is None:
+            valueId = self.valueIds[value] = len(self.values)
+            self.values.append(value)
+        return valueId
+
+    def append(self, row: tuple) -> int:
+        """
+        Данная функция предназначена для добавления строки листа в хранилище и в оба индекса.
+
+        :param
+        row (tuple): строка листа (кортеж значений).
+
+        :return
+        (int): номер добавленной строки.
+        """
+
+        rowId = self.__store(row, fingerprint(row))
+        self.__index(row, rowId)
+        return rowId
+
+    def __store(self, row: tuple, rowFingerprint: bytes) -> int:
+        rowId = len(self.columns[0])
+        for index, column in enumerate(self.columns):
+            column.append(self.__encode(getValue(row, index)))
+        self.fingerprints.append(rowFingerprint)
+        return rowId
+
+    def __index(self, row: tuple, rowId: int) -> None:
+        self.order.append(rowId)
+        position = len(self.order) - 1
+        # Индексы продолжаются, пока без пропусков идут строки с наименованием (с кодом)
+        if self.namedRows == position and row and row[0] is not None:
+            self.namedRows += 1
+            self.nameIndex.setdefault(row[0], []).append(rowId)
+        if self.codedRows == position and len(row) > 1 and row[1] is not None:
+            self.codedRows += 1
+            self.codeIndex.setdefault(row[1], []).append(rowId)
+
+    def delta(self, rows) -> RowDelta:
+        """
+        Данная функция предназначена для сравнения строк хранилища с новой версией листа.
+
+        :param
+        rows (list): строки новой версии листа.
+
+        :return
+        (RowDelta): вставленные и удаленные строки.
+        """
+
+        return RowDelta([self.fingerprints[rowId] for rowId in self.order],
+                        [self.value(rowId, 0) for rowId in self.order], rows, selectRows=storedRows)
+
+    def applyDelta(self, delta: RowDelta) -> "DepartmentStore":
+        """
+        Данная функция предназначена для построения хранилища новой версии листа из текущего: совпавшие строки
+        переиспользуются, в колонки дописываются только вставленные строки. Текущее хранилище не меняется (по нему
+        могут идти начатые поиски).
+
+        :param
+        delta (RowDelta): результат delta для новой версии листа.
+
+        :return
+        (DepartmentStore): новое хранилище.
+        """
+
+        store = DepartmentStore()
+        store.values = list(self.values)
+        store.columns = [array("I", column) for column in self.columns]
+        store.fingerprints = list(self.fingerprints)
+
+        # Индексы собираются заново в порядке новой книги: это один проход без разбора значений
+        order = self.order
+        for position, (row, match) in enumerate(zip(delta.rows, delta.matches)):
+            rowId = order[match] if match != -1 else store.__store(row, delta.fingerprints[position])
+            store.__index(row, rowId)
+
+        store.valueIds = None
+        return store
+
+    def deadRows(self) -> int:
+        # Строки, удаленные из книги, но оставшиеся в колонках
+        return len(self) - len(self.order)
+
+    def record(self, rowId: int, recordClass=DepartmentRecord):
+        """
+        Данная функция предназначена для сборки записи о подразделении из колонок хранилища.
+
+        :param
+        rowId (int): номер строки.
+        recordClass (type): класс записи - DepartmentRecord (вывод по наименованию) или CodeRecord (по шифру).
+
+        :return
+        Запись о подразделении.
+        """
+
+        values = self.values
+        return recordClass(*(values[column[rowId]] for column in self.columns))
+
+    def value(self, rowId: int, column: int) -> str:
+        return self.values[self.columns[column][rowId]]
+
+    def __len__(self):
+        return len(self.columns[0])
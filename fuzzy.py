@@ -0,0 +1,47 @@
+import heapq
+from itertools import count
+
+from Levenshtein import distance
+
+
+def topK(targetLine: str, keys, k: int = 3, positions: dict = None) -> list:
+    """
+    Данная функция предназначена для поиска k ближайших по расстоянию Левенштейна ключей без сортировки всего
+    множества. Хранится ограниченная куча из k лучших кандидатов, а расстояние до худшего из них передается в
+    distance как score_cutoff: для заведомо неподходящих ключей расчет прерывается досрочно.
+
+    :param
+    targetLine (str): входная строка, по которой производится поиск.
+    keys (iterable): ключи, среди которых ищем.
+    k (int): сколько ближайших ключей вернуть.
+    positions (dict): позиции ключей в книге. Если переданы, то при равных расстояниях раньше идет ключ с меньшей
+    позицией, и ответ не зависит от порядка keys.
+
+    :return
+    (list): список пар (ключ, расстояние), отсортированный по возрастанию расстояния. При равных расстояниях
+    раньше идет ключ, встретившийся раньше (как при устойчивой сортировке), либо ключ с меньшей позицией.
+    """
+
+    # Куча-максимум по расстоянию: (-расстояние, -позиция, ключ). На вершине - худший из k кандидатов.
+    heap = []
+    order = count()
+    # Без позиций ключ с тем же расстоянием, что у худшего, идет позже него и заменить его не может
+    tieCost = 0 if positions is not None else 1
+
+    for key in keys:
+        position = positions[key] if positions is not None else next(order)
+        if len(heap) < k:
+            heapq.heappush(heap, (-distance(key, targetLine), -position, key))
+            continue
+
+        worst = -heap[0][0]
+        if worst == 0:
+            # Уже набрали k точных совпадений, лучше не станет.
+            break
+
+        # Если расстояние больше допустимого, distance вернет его + 1, и такой ключ нам не подходит.
+        keyDistance = distance(key, targetLine, score_cutoff=worst - tieCost)
+        if (keyDistance, position) < (worst, -heap[0][1]):
+            heapq.heapreplace(heap, (-keyDistance, -position, key))
+
+    return [(key, -negDistance) for negDistance, _, key in sorted(heap, reverse=True)]
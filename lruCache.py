@@ -0,0 +1,79 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class LRUCache:
+    """
+    Ограниченный по размеру кэш с вытеснением давно не использованных записей (LRU) и сроком жизни записи (TTL).
+    Потокобезопасен: к нему обращаются рабочие потоки пула поиска. Ведет счетчики попаданий, промахов и вытеснений.
+    """
+
+    def __init__(self, maxSize: int = 1024, ttl: float = 600.0):
+        self.maxSize = maxSize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.__data = OrderedDict()
+        self.__lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Данная функция предназначена для получения значения из кэша. Просроченная запись удаляется и считается
+        промахом.
+
+        :param
+        key: ключ записи.
+        default: значение, возвращаемое при промахе.
+
+        :return
+        Значение из кэша, либо default.
+        """
+
+        with self.__lock:
+            entry = self.__data.get(key)
+            if entry is not None:
+                value, expiresAt = entry
+                if expiresAt > time.monotonic():
+                    self.__data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self.__data[key]
+
+            self.misses += 1
+            return default
+
+    def put(self, key, value) -> None:
+        """
+        Данная функция предназначена для сохранения значения в кэш. При переполнении вытесняется самая давно
+        использованная запись.
+
+        :param
+        key: ключ записи.
+        value: сохраняемое значение.
+        """
+
+        with self.__lock:
+            self.__data[key] = (value, time.monotonic() + self.ttl)
+            self.__data.move_to_end(key)
+            while len(self.__data) > self.maxSize:
+                self.__data.popitem(last=False)
+                self.evictions += 1
+
+    def pop(self, key, default=None):
+        with self.__lock:
+            entry = self.__data.pop(key, None)
+            return entry[0] if entry is not None else default
+
+    def clear(self) -> None:
+        with self.__lock:
+            self.__data.clear()
+
+    def __len__(self):
+        return len(self.__data)
+
+    def __contains__(self, key):
+        with self.__lock:
+            entry = self.__data.get(key)
+            return entry is not None and entry[1] > time.monotonic()
@@ -0,0 +1,278 @@
+import contextvars
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+logger = logging.getLogger(__name__)
+
+# Идентификатор запроса пользователя. Задается обработчиком сообщения и попадает во все записи лога этого запроса,
+# в том числе из рабочих потоков пула поиска (SearchPool переносит контекст в поток).
+requestId = contextvars.ContextVar("requestId", default="-")
+
+# Границы корзин гистограмм в секундах: от долей миллисекунды (поиск по индексу) до секунд (отправка в Telegram)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def newRequestId() -> str:
+    """
+    Данная функция предназначена для выдачи нового идентификатора запроса и записи его в текущий контекст.
+
+    :return
+    (str): идентификатор запроса.
+    """
+
+    value = uuid.uuid4().hex[:8]
+    requestId.set(value)
+    return value
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Фильтр логирования, добавляющий в каждую запись поле requestId (для формата '%(requestId)s').
+    """
+
+    def filter(self, record):
+        record.requestId = requestId.get()
+        return True
+
+
+def formatLabels(labelNames: tuple, labelValues: tuple, extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(labelNames, labelValues)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """
+    Гистограмма длительностей в формате Prometheus: накопительные счетчики по корзинам, сумма и количество
+    наблюдений - отдельно для каждого набора значений меток.
+    """
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelNames: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelNames = labelNames
+        self.buckets = tuple(buckets)
+        self.__series = {}
+        self.__lock = threading.Lock()
+
+    def observe(self, value: float, *labelValues: str) -> None:
+        with self.__lock:
+            series = self.__series.get(labelValues)
+            if series is None:
+                # [счетчики по корзинам (+Inf последней), сумма]
+                series = self.__series[labelValues] = [[0] * (len(self.buckets) + 1), 0.0]
+            counts = series[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            else:
+                counts[-1] += 1
+            series[1] += value
+
+    def snapshot(self) -> dict:
+        """
+        :return
+        (dict): значения меток -> (накопительные счетчики по корзинам, сумма, количество).
+        """
+
+        with self.__lock:
+            result = {}
+            for labelValues, (counts, total) in self.__series.items():
+                cumulative, running = [], 0
+                for count in counts:
+                    running += count
+                    cumulative.append(running)
+                result[labelValues] = (cumulative, total, running)
+            return result
+
+    def quantile(self, q: float, *labelValues: str) -> float:
+        """
+        Данная функция предназначена для оценки квантиля по корзинам (линейная интерполяция внутри корзины, как
+        histogram_quantile в Prometheus).
+
+        :param
+        q (float): квантиль от 0 до 1.
+        labelValues (str): значения меток.
+
+        :return
+        (float): оценка квантиля в секундах (0.0, если наблюдений нет).
+        """
+
+        series = self.snapshot().get(labelValues)
+        if series is None or series[2] == 0:
+            return 0.0
+
+        cumulative, _, count = series
+        rank = q * count
+        lowerBound, lowerCount = 0.0, 0
+        for bound, running in zip(self.buckets, cumulative):
+            if running >= rank:
+                if running == lowerCount:
+                    return bound
+                return lowerBound + (bound - lowerBound) * (rank - lowerCount) / (running - lowerCount)
+            lowerBound, lowerCount = bound, running
+        # Квантиль попал в корзину +Inf: возвращаем верхнюю конечную границу
+        return self.buckets[-1]
+
+    def render(self) -> list:
+        lines = []
+        for labelValues, (cumulative, total, count) in sorted(self.snapshot().items()):
+            for bound, running in zip(self.buckets + (float("inf"),), cumulative):
+                le = "le=\"+Inf\"" if bound == float("inf") else f"le=\"{bound}\""
+                lines.append(f"{self.name}_bucket{formatLabels(self.labelNames, labelValues, le)} {running}")
+            lines.append(f"{self.name}_sum{formatLabels(self.labelNames, labelValues)} {total}")
+            lines.append(f"{self.name}_count{formatLabels(self.labelNames, labelValues)} {count}")
+        return lines
+
+
+class Counter:
+    """
+    Монотонный счетчик. Значение либо накапливается вызовами inc, либо читается функцией source (например, счетчики
+    попаданий LRUCache, которые кэш ведет сам).
+    """
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelNames: tuple = (), source=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelNames = labelNames
+        self.source = source
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelValues: str, amount: float = 1) -> None:
+        with self._lock:
+            self._values[labelValues] = self._values.get(labelValues, 0) + amount
+
+    def values(self) -> dict:
+        if self.source is not None:
+            return {(): self.source()}
+        with self._lock:
+            return dict(self._values)
+
+    def render(self) -> list:
+        return [f"{self.name}{formatLabels(self.labelNames, labelValues)} {value}"
+                for labelValues, value in sorted(self.values().items())]
+
+
+class Gauge(Counter):
+    """
+    Текущее значение (размер очереди, число записей в кэше и т.п.). Обычно читается функцией source при выводе.
+    """
+
+    kind = "gauge"
+
+    def set(self, value: float, *labelValues: str) -> None:
+        with self._lock:
+            self._values[labelValues] = value
+
+
+class Registry:
+    """
+    Набор метрик процесса, выводимый в текстовом формате Prometheus.
+    """
+
+    def __init__(self):
+        self.metrics = []
+        self.__lock = threading.Lock()
+
+    def register(self, metric):
+        with self.__lock:
+            self.metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        with self.__lock:
+            metrics = list(self.metrics)
+        for metric in metrics:
+            try:
+                body = metric.render()
+            except Exception:
+                # Источник значения мог еще не инициализироваться; остальные метрики выводим
+                logger.exception(f"Не удалось получить значение метрики {metric.name}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(body)
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Длительность этапов обработки запроса: classifier, find_persona / find_structure / find_num, substring, asker,
+# search (весь Finder.search), send (отправка ответа в Telegram).
+stageSeconds = REGISTRY.register(Histogram("cmbot_stage_seconds", "Длительность этапов обработки запроса.",
+                                           ("stage",)))
+
+# Какой уровень Finder.search дал ответ: cache, raw, normalized, prefix, fuzzy, substring или unclassified
+searchTiers = REGISTRY.register(Counter("cmbot_search_tier_total", "Ответы поиска по уровню, на котором они найдены.",
+                                        ("tier",)))
+
+
+@contextmanager
+def timed(stage: str):
+    """
+    Данная функция предназначена для замера длительности этапа: длительность попадает в гистограмму
+    cmbot_stage_seconds и в отладочный лог (идентификатор запроса добавляет RequestIdFilter).
+
+    :param
+    stage (str): название этапа.
+    """
+
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        stageSeconds.observe(elapsed, stage)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"{stage}: {elapsed * 1000:.2f} мс")
+
+
+class MetricsServer:
+    """
+    HTTP-сервер в фоновом потоке, отдающий метрики в формате Prometheus по адресу /metrics.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 9090, registry: Registry = REGISTRY):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Опросы Prometheus не засоряют лог бота
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.__thread = threading.Thread(target=self.server.serve_forever, name="metrics", daemon=True)
+
+    @property
+    def port(self) -> int:
+        return self.server.server_address[1]
+
+    def start(self) -> None:
+        self.__thread.start()
+
+    def stop(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
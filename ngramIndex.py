@@ -0,0 +1,135 @@
+import heapq
+from collections import Counter
+
+
+class NgramIndex:
+    """
+    Инвертированный индекс символьных n-грамм (по умолчанию триграмм) над нормализованными ключами. Для каждой
+    n-граммы хранится список номеров ключей, в которых она встречается. По запросу считается, сколько n-грамм
+    разделяет с ним каждый ключ, и наверх поднимаются ключи с наибольшим числом общих n-грамм.
+    """
+
+    def __init__(self, keys=(), n: int = 3):
+        self.n = n
+        self.keys = []
+        self.gramCounts = []
+        self.postings = {}
+
+        for key in keys:
+            self.add(key)
+
+    @staticmethod
+    def normalize(line: str) -> str:
+        """
+        Данная функция предназначена для нормализации строки перед разбиением на n-граммы: нижний регистр,
+        замена "ё" на "е" и схлопывание пробелов.
+
+        :param
+        line (str): исходная строка.
+
+        :return
+        (str): нормализованная строка.
+        """
+
+        return " ".join(line.lower().replace("ё", "е").split())
+
+    def grams(self, line: str) -> set:
+        """
+        Данная функция предназначена для разбиения строки на множество n-грамм. Строка дополняется пробелами по
+        краям, чтобы короткие слова и начала/концы строки тоже давали n-граммы.
+
+        :param
+        line (str): исходная строка.
+
+        :return
+        (set): множество n-грамм строки.
+        """
+
+        padded = f" {self.normalize(line)} "
+        return {padded[index:index + self.n] for index in range(max(len(padded) - self.n + 1, 1))}
+
+    def add(self, key: str) -> None:
+        """
+        Данная функция предназначена для добавления ключа в индекс.
+
+        :param
+        key (str): добавляемый ключ.
+        """
+
+        keyId = len(self.keys)
+        keyGrams = self.grams(key)
+        self.keys.append(key)
+        self.gramCounts.append(len(keyGrams))
+        for gram in keyGrams:
+            self.postings.setdefault(gram, []).append(keyId)
+
+    def added(self, keys) -> "NgramIndex":
+        """
+        Данная функция предназначена для получения нового индекса с добавленными ключами (ключи, которые уже есть в
+        индексе, пропускаются). Текущий индекс не меняется: копируются списки ключей и только те списки номеров, в
+        которые добавляются новые ключи.
+
+        :param
+        keys: добавляемые ключи.
+
+        :return
+        (NgramIndex): новый индекс.
+        """
+
+        index = NgramIndex(n=self.n)
+        index.keys = list(self.keys)
+        index.gramCounts = list(self.gramCounts)
+        index.postings = dict(self.postings)
+
+        present, copied = set(self.keys), set()
+        for key in keys:
+            if key in present:
+                continue
+            present.add(key)
+            keyId = len(index.keys)
+            keyGrams = self.grams(key)
+            index.keys.append(key)
+            index.gramCounts.append(len(keyGrams))
+            for gram in keyGrams:
+                if gram not in copied:
+                    index.postings[gram] = list(index.postings.get(gram, ()))
+                    copied.add(gram)
+                index.postings[gram].append(keyId)
+        return index
+
+    def candidates(self, targetLine: str, limit: int = 50, minShareRatio: float = 0.3, positions: dict = None) -> list:
+        """
+        Данная функция предназначена для отбора кандидатов по числу общих n-грамм с запросом.
+
+        :param
+        targetLine (str): входная строка, по которой производится поиск.
+        limit (int): максимальное число возвращаемых кандидатов.
+        minShareRatio (float): минимальная доля n-грамм запроса, которую должен разделять кандидат.
+        positions (dict): позиции ключей в книге. Если переданы, то отбираются только эти ключи, а при равенстве
+        раньше идет ключ с меньшей позицией: отбор не зависит от порядка, в котором ключи добавлялись в индекс.
+
+        :return
+        (list): ключи-кандидаты, упорядоченные по убыванию числа общих n-грамм.
+        """
+
+        queryGrams = self.grams(targetLine)
+        counts = Counter()
+        for gram in queryGrams:
+            # Counter.update по списку считает вхождения на C-уровне, без питоновского цикла по номерам.
+            counts.update(self.postings.get(gram, ()))
+
+        # Сырое число общих n-грамм завышает длинные ключи, поэтому широкий список лидеров по нему пересортируем по
+        # коэффициенту Дайса: 2 * общие / (n-граммы запроса + n-граммы ключа).
+        minShared = max(1, int(len(queryGrams) * minShareRatio))
+        if positions is None:
+            leaders = [(keyId, shared) for keyId, shared in counts.most_common(limit * 4) if shared >= minShared]
+        else:
+            keys = self.keys
+            leaders = heapq.nsmallest(limit * 4, ((keyId, shared) for keyId, shared in counts.items()
+                                                  if shared >= minShared and keys[keyId] in positions),
+                                      key=lambda pair: (-pair[1], positions[keys[pair[0]]]))
+        leaders.sort(key=lambda pair: pair[1] / (len(queryGrams) + self.gramCounts[pair[0]]), reverse=True)
+        return [self.keys[keyId] for keyId, _ in leaders[:limit]]
+
+    def __len__(self):
+        return len(self.keys)
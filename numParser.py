@@ -1,77 +1,89 @@
-import openpyxl
-import os
 from Levenshtein import distance
 
+from searchIndex import SearchIndex
+from codeTrie import CodeTrie, NO_CODE
+from fuzzy import topK
+from records import CodeRecord
+from departmentStore import DepartmentStore
+from workbookLoader import loadWorkbook, STRUCTURE_SHEET
+
 
 class NumParser:
-    def __init__(self, filePath: str, parseFlag: bool=True):
+    def __init__(self, filePath: str, parseFlag: bool = True, rows: list = None, store: DepartmentStore = None):
         self.filePath = filePath
-        self.workbook = openpyxl.load_workbook(self.filePath)
-        self.worksheet = self.workbook['Оргструктура']
+        self.store = None
         self.numDict = {}
         self.numSet = set()
+        self.numIndex = SearchIndex()
+        self.numTrie = CodeTrie()
 
         if parseFlag:
-            self.parser()
+            self.parser(rows, store)
 
-    def parser(self) -> None:
+    def parser(self, rows: list = None, store: DepartmentStore = None) -> None:
         """
         Данная функция предназначена для парсинга листа "Полномочия" по шифрам. Данная функция ничего не возвращает.
+
+        :param
+        rows (list): строки листа (кортежи значений), уже прочитанные общим загрузчиком. Если не переданы, лист
+        читается из файла filePath.
+        store (DepartmentStore): общее с StructureParser хранилище строк листа. Если передано, то rows не нужны:
+        строки уже разобраны, и парсер лишь использует индекс хранилища по коду ИС-ПРО.
         """
-        
-        def getValue(row, index, defaultMessage="нет") -> str:
-            """
-            Данная функция предназначена для получения значения из ячейки. Если значение None, то заменяем его на defaultMessage.
-
-            :param
-            row (docx.rows): строчка, из которой будет извлечен элемент.
-            index (int): индекс извлекаемого элемента в строчке.
-
-            :return
-            (str): значение в ячейке в формате строки (defaultMessage в случае отсутствия значения)
-            """
-            
-            return str(row[index].value) if row[index].value is not None else defaultMessage
-
-        for row in self.worksheet.iter_rows(min_row=2):
-            if row[1].value is None:
-                break
-
-            # Уделить дополнительное время парсингу задач отделения
-            data = {
-                "1. Наименование: ": getValue(row, 0) + ";",
-                "2. Вышестоящее подразделение: ": getValue(row, 2) + ";",
-                "3. Вышестоящее подразделение верхнего уровня: ": getValue(row, 3) + ";",
-                "4. Кампус: ": getValue(row, 4) + ";",
-                "5. Самостоятельное: ": getValue(row, 5) + ";",
-                "6. Статус: ": getValue(row, 6) + ";",
-                "7. Вид подразделения: ": getValue(row, 7) + ";",
-                "8. Тип подразделения: ": getValue(row, 8) + ";",
-                "9. Основной вид деятельности: ": getValue(row, 9) + ";",
-                "10. Дополнительные виды деятельности: ": getValue(row, 10) + ";",
-                "11. Задачи подразделения: ": getValue(row, 11) + ";",
-                "12. Дата создания: ": getValue(row, 12) + ";",
-                "13. Номер приказа о создании: ": getValue(row, 13) + ";"
-            }
-
-            resLine = "\n".join('{}{}'.format(key, val) for key, val in data.items())
-            self.numDict.setdefault(row[1].value, []).append(resLine)
+
+        if store is None:
+            if rows is None:
+                rows = loadWorkbook(self.filePath, (STRUCTURE_SHEET,))[STRUCTURE_SHEET]
+            store = DepartmentStore(rows)
+
+        # Строки хранятся в общем колоночном хранилище, а словарь ключей указывает на номера строк в нем
+        self.store = store
+        self.numDict = store.codeIndex
 
         self.updateNum(self.numDict)
 
     def updateNum(self, numDict: dict) -> None:
         """
-        Данная функция предназначена для обновления множества шифров.
+        Данная функция предназначена для обновления множества шифров и поисковых индексов по ним.
 
         :param
-        numDict (dict): словарь с распарсенными данными шифров.
+        numDict (dict): словарь "ключ -> номера строк хранилища" с распарсенными данными шифров.
 
         :return
         (None): данная функция ничего не возвращает, она только выполняет обновление.
         """
         self.numSet = set(numDict.keys())
+        # Индекс (BK-дерево) строится один раз при разборе и дальше используется в каждом find
+        self.numIndex = SearchIndex(numDict.keys())
+        # Дерево по сегментам шифра: точный поиск, поиск по ветви и исправление опечаток посегментно
+        self.numTrie = CodeTrie(numDict.keys())
 
-    def find(self, targetLine: str) -> list:
+    def applyDelta(self, store: DepartmentStore) -> "NumParser":
+        """
+        Данная функция предназначена для построения парсера по хранилищу новой версии листа (DepartmentStore.
+        applyDelta) без повторного построения индексов: поисковый индекс и дерево шифров получают только добавленные
+        и удаленные шифры. Текущий парсер не меняется.
+
+        :param
+        store (DepartmentStore): хранилище новой версии листа.
+
+        :return
+        (NumParser): парсер новой версии.
+        """
+
+        parser = NumParser(self.filePath, parseFlag=False)
+        parser.store = store
+        parser.numDict = store.codeIndex
+        parser.numSet = set(store.codeIndex.keys())
+
+        added = [key for key in parser.numDict if key not in self.numSet]
+        removed = [key for key in self.numDict if key not in parser.numSet]
+        parser.numIndex = self.numIndex.updated(parser.numDict.keys(), added, removed)
+        parser.numTrie = self.numTrie.updated(added, removed) if added or removed else self.numTrie
+
+        return parser
+
+    def findScored(self, targetLine: str) -> list:
         """
         Данная функция ищет по образцу шифр в множестве. В случае если есть точное совпадение, возвращается 
         один шифр, в ином - три самых близких.
@@ -80,19 +92,84 @@ class NumParser:
         targetLine (str): входная строка, по которой производится поиск.
 
         :return:
-        (lst): список ближайших по-расстоянию Левенштейна элементов из множества numSet к элементу targetLine.
+        (lst): список пар (элемент, расстояние) для ближайших по-расстоянию Левенштейна элементов из множества
+        numSet к элементу targetLine. Расстояния возвращаются вместе с элементами, чтобы их не пересчитывать.
         """
-        
-        # Сортируем все структуры по расстоянию
-        numSorted = sorted(self.numSet, key=lambda x: distance(x, targetLine))
-        minDistance = distance(numSorted[0], targetLine)
 
-        if minDistance == 0:
+        # Дерево сравнивает сегменты без пробелов вокруг них, поэтому найденный шифр может отличаться от запроса
+        code = self.numTrie.get(targetLine)
+        if code is not None:
+            return [(code, distance(targetLine, code))]
+
+        if targetLine.startswith(NO_CODE) and self.numTrie.noCode:
+            # Шифры "Без кода" сравниваются только между собой
+            nearest = topK(targetLine, self.numTrie.noCode, 3, self.numIndex.positions)
+        else:
+            # Сначала исправляем опечатки по сегментам шифра, а расстояние до найденных шифров пересчитываем целиком.
+            # Если шифров с тем же числом сегментов мало, то ищем три ближайших элемента по BK-дереву.
+            nearest = None
+            candidates = self.numTrie.correct(targetLine)
+            if len(candidates) >= 3:
+                nearest = topK(targetLine, (candidate for candidate, _ in candidates), 3, self.numIndex.positions)
+                # Посегментное исправление не видит опечаток в разделителях и шифров с другим числом сегментов.
+                # Если по BK-дереву есть шифр ближе худшего из найденных, то ответ дерева точнее.
+                found = {candidate for candidate, _ in nearest}
+                closer = self.numIndex.within(targetLine, nearest[-1][1] - 1)
+                if any(candidate not in found for candidate, _ in closer):
+                    nearest = None
+            if nearest is None:
+                nearest = self.numIndex.nearest(targetLine, 3)
+
+        if nearest[0][1] == 0:
             # Если минимум равен 0, возвращаем один элемент
-            return [numSorted[0]]
+            return nearest[:1]
         else:
             # Если минимум не равен 0, возвращаем три элемента
-            return numSorted[:3]
+            return nearest
+
+    def find(self, targetLine: str) -> list:
+        """
+        Данная функция ищет по образцу шифр в множестве. В случае если есть точное совпадение, возвращается 
+        один шифр, в ином - три самых близких.
+
+        :param
+        targetLine (str): входная строка, по которой производится поиск.
+
+        :return:
+        (lst): список ближайших по-расстоянию Левенштейна элементов из множества numSet к элементу targetLine.
+        """
+
+        return [key for key, _ in self.findScored(targetLine)]
+
+    def findUnder(self, prefix: str, limit: int = None) -> list:
+        """
+        Данная функция ищет все шифры внутри ветви prefix (сам prefix и все вложенные в него шифры).
+
+        :param
+        prefix (str): шифр-префикс по целым сегментам, например 01.111.
+        limit (int): если задан, возвращается не более limit шифров.
+
+        :return
+        (list): список шифров ветви в порядке строк книги.
+        """
+
+        if prefix.startswith(NO_CODE):
+            return []
+        return sorted(self.numTrie.under(prefix, limit), key=self.numIndex.positions.__getitem__)
+
+    def findSubstring(self, line: str):
+        """
+        Данная функция ищет шифр, в который входит строка line (без учета регистра). Поиск идет по суффиксному
+        массиву, а при нескольких вхождениях выбирается первое в порядке строк книги.
+
+        :param
+        line (str): искомая подстрока.
+
+        :return
+        Найденный ключ, либо None, если вхождений нет.
+        """
+
+        return self.numIndex.firstContaining(line)
 
     def show(self, numName: str) -> list:
         """
@@ -102,32 +179,18 @@ class NumParser:
         structureName (str): входная строка, по которой будет выводиться результат.
 
         :return
-        (str): данные для структуры в строчном формате.
+        (list): шифр и записи о подразделении (CodeRecord), текст которых собирается методом render.
 
         """
 
         result = [numName]
-
-        for index, value in enumerate(self.numDict[numName]):
-            temp = ""
-            # result += f"{index + 1}) "
-            temp += str(value) + "\n"
-
-            if index != len(self.numDict[numName]) - 1:
-                temp += "\n"
-            result.append(temp)
+        result.extend(self.store.record(rowId, CodeRecord) for rowId in self.numDict[numName])
 
         return result
 
-    def __close_workbook(self):
-        self.workbook.close()
-
     def __str__(self):
         pass
 
-    def __del__(self):
-        self.__close_workbook()
-
     def __call__(self, *args, **kwargs):
         # Стоит ли?
         pass
@@ -0,0 +1,140 @@
+from array import array
+
+
+# Значение ячейки, которым в книге обозначается отсутствие вышестоящего подразделения (см. getValue)
+NO_PARENT = "нет"
+
+
+class OrgGraph:
+    """
+    Граф иерархии подразделений, построенный один раз при загрузке данных. Для каждого подразделения хранится
+    вышестоящее (parent) и список вложенных (children), а обход в глубину нумерует вершины так, что все
+    подразделения внутри X занимают в порядке обхода непрерывный отрезок order[tin[X] + 1 : tout[X]]. Поэтому
+    "все вложенные в X" и "путь от X до верхнего уровня" выдаются за время, пропорциональное размеру ответа.
+
+    Вершины - это наименования подразделений (ключи StructureParser). Вышестоящее подразделение, которого нет в
+    собственной строке книги, тоже становится вершиной, чтобы его дети не потерялись.
+    """
+
+    def __init__(self, links=()):
+        self.names = []
+        self.ids = {}
+        self.parent = array("i")
+        self.children = []
+        self.depth = array("i")
+        self.order = array("i")
+        self.tin = array("i")
+        self.tout = array("i")
+
+        for name, parentName, topName in links:
+            # Если вышестоящее подразделение не указано, то опираемся на вышестоящее верхнего уровня
+            if parentName in (None, NO_PARENT, name):
+                parentName = topName if topName not in (None, NO_PARENT, name) else None
+            self.__link(name, parentName)
+
+        self.__number()
+
+    def __node(self, name: str) -> int:
+        nodeId = self.ids.get(name)
+        if nodeId is None:
+            nodeId = self.ids[name] = len(self.names)
+            self.names.append(name)
+            self.parent.append(-1)
+            self.children.append([])
+        return nodeId
+
+    def __link(self, name: str, parentName: str) -> None:
+        nodeId = self.__node(name)
+        # При повторных строках с тем же наименованием сохраняется первое указанное вышестоящее подразделение
+        if parentName is None or self.parent[nodeId] != -1:
+            return
+        parentId = self.__node(parentName)
+        self.parent[nodeId] = parentId
+        self.children[parentId].append(nodeId)
+
+    def __number(self) -> None:
+        """
+        Данная функция предназначена для нумерации вершин обходом в глубину (Эйлеров обход): tin - позиция вершины
+        в порядке обхода, tout - позиция сразу за последней вложенной вершиной. Ошибки в книге (циклы вида
+        A -> B -> A) разрываются: вершина цикла, не достижимая от корней, становится корнем.
+        """
+
+        size = len(self.names)
+        self.tin = array("i", [-1]) * size
+        self.tout = array("i", [-1]) * size
+        self.depth = array("i", [0]) * size
+        self.order = array("i")
+
+        roots = [nodeId for nodeId in range(size) if self.parent[nodeId] == -1]
+        for start in roots + list(range(size)):
+            if self.tin[start] != -1:
+                continue
+            if self.parent[start] != -1:
+                # Вершина не достигнута от корней - она в цикле: отцепляем ее от вышестоящей
+                self.children[self.parent[start]].remove(start)
+                self.parent[start] = -1
+
+            stack = [(start, False)]
+            while stack:
+                nodeId, leaving = stack.pop()
+                if leaving:
+                    self.tout[nodeId] = len(self.order)
+                    continue
+                if self.tin[nodeId] != -1:
+                    continue
+
+                self.tin[nodeId] = len(self.order)
+                self.order.append(nodeId)
+                parentId = self.parent[nodeId]
+                self.depth[nodeId] = self.depth[parentId] + 1 if parentId != -1 else 0
+                stack.append((nodeId, True))
+                stack.extend((child, False) for child in reversed(self.children[nodeId]))
+
+    def __contains__(self, name):
+        return name in self.ids
+
+    def __len__(self):
+        return len(self.names)
+
+    def subunits(self, name: str) -> list:
+        """
+        Данная функция предназначена для получения всех подразделений, вложенных в name (на любом уровне).
+
+        :param
+        name (str): наименование подразделения.
+
+        :return
+        (list): пары (наименование, уровень вложенности относительно name) в порядке обхода в глубину, то есть
+        каждое подразделение идет сразу после своего вышестоящего. Пустой список, если подразделения нет в графе.
+        """
+
+        nodeId = self.ids.get(name)
+        if nodeId is None:
+            return []
+
+        baseDepth = self.depth[nodeId]
+        return [(self.names[childId], self.depth[childId] - baseDepth)
+                for childId in self.order[self.tin[nodeId] + 1:self.tout[nodeId]]]
+
+    def childrenOf(self, name: str) -> list:
+        nodeId = self.ids.get(name)
+        return [self.names[childId] for childId in self.children[nodeId]] if nodeId is not None else []
+
+    def pathToRoot(self, name: str) -> list:
+        """
+        Данная функция предназначена для получения цепочки вышестоящих подразделений.
+
+        :param
+        name (str): наименование подразделения.
+
+        :return
+        (list): наименования от name до подразделения верхнего уровня включительно. Пустой список, если
+        подразделения нет в графе.
+        """
+
+        nodeId = self.ids.get(name, -1)
+        path = []
+        while nodeId != -1:
+            path.append(self.names[nodeId])
+            nodeId = self.parent[nodeId]
+        return path
@@ -1,78 +1,60 @@
-import openpyxl
-import os
-# pip install Levenshtein
-from Levenshtein import distance
+from searchIndex import SearchIndex, overlayTooLarge
+from substringIndex import SubstringIndex
+from records import PersonaRecord
+from rowDelta import RowDelta, fingerprint
+from workbookLoader import loadWorkbook, PERSONA_SHEET
 
 
 class PersonaParcer:
-    def __init__(self, filePath: str, parseFlag: bool = True):
+    def __init__(self, filePath: str, parseFlag: bool = True, rows: list = None):
         self.filePath = filePath
-        self.workbook = openpyxl.load_workbook(self.filePath)
-        self.worksheet = self.workbook['Полномочия']
         self.personaDict = {}
         self.personaSet = set()
+        self.personaIndex = SearchIndex()
+        self.surnameIndex = SubstringIndex()
+        # Строки листа в порядке книги: отпечатки, ФИО и записи. По ним находятся изменения при обновлении книги
+        self.rowFingerprints = []
+        self.rowKeys = []
+        self.rowRecords = []
 
         if parseFlag:
-            self.parser()
+            self.parser(rows)
 
-    def parser(self) -> None:
+    def parser(self, rows: list = None) -> None:
         """
         Данная функция предназначена для парсинга листа "Полномочия", то есть парсинга по персонам. Данная функция
         ничего не возвращает.
-        """
-
-        def getValue(row, index: int, defaultMessage: str = "нет") -> str:
-            """
-            Данная функция предназначена для получения значения из ячейки. Если значение None, то заменяем его на defaultMessage.
 
-            :param
-            row (docx.rows): строчка, из которой будет извлечен элемент.
-            index (int): индекс извлекаемого элемента в строчке.
-
-            :return
-            (str): значение в ячейке в формате строки (defaultMessage в случае отсутствия значения)
-            """
+        :param
+        rows (list): строки листа (кортежи значений), уже прочитанные общим загрузчиком. Если не переданы, лист
+        читается из файла filePath.
+        """
 
-            return str(row[index].value) if row[index].value is not None else defaultMessage
+        if rows is None:
+            rows = loadWorkbook(self.filePath, (PERSONA_SHEET,))[PERSONA_SHEET]
 
         # Поскольку функция может быть вызвана многократна, реализовано обнуление словаря! Данные не сохраняются!
         self.personaDict = dict()
+        self.rowFingerprints, self.rowKeys, self.rowRecords = [], [], []
 
-        for row in self.worksheet.iter_rows(min_row=2):
+        for row in rows:
             # Проверка на конец списка
-            if row[0].value is None:
+            if not row or row[0] is None:
                 break
 
-            # Стоит ли дописать до Data class? Как будто бы нет
-            # Формируем словарь из данных в строке
-            data = {
-                "1. Должность: ": getValue(row, 1) + ";",
-                "2. Полномочия получены: ": getValue(row, 2) + ";",
-                "3. Дата приказа об установлении полномочий: ": getValue(row, 3) + ";",
-                "4. Номер приказа об установлении полномочий: ": getValue(row, 4) + ";",
-                "5. Статус приказа: ": getValue(row, 5) + ";",
-                "6. Тип приказа: ": getValue(row, 6) + ";",
-                "7. Возложение обязанностей на период временного отсутствия: ": getValue(row, 7) + ";",
-                "8. Руководимые подразделения: ": getValue(row, 8) + ";",
-                "9. Руководимые работники: ": getValue(row, 9) + ";",
-                "10. Координируемые подразделения: ": getValue(row, 10) + ";",
-                "11. Координируемые работники: ": getValue(row, 11) + ";",
-                "12. Координируемые направление деятельности: ": getValue(row, 12) + ";",
-                "13. Руководимые направления деятельности: ": getValue(row, 13) + ";",
-                "14. Права работодателя: ": getValue(row, 14) + ";",
-                "15. Право подписи, в рамках возложенных обязанностей и предоставленных полномочий: ": getValue(row,
-                                                                                                                15) + ";"
-            }
-
-            resLine = "\n".join('{}{}'.format(key, val) for key, val in data.items())
-            self.personaDict.setdefault(row[0].value, []).append(resLine)
+            # Храним строку как компактную запись со __slots__, текст из нее собирается только при отправке ответа
+            record = PersonaRecord.fromRow(row)
+            self.personaDict.setdefault(row[0], []).append(record)
+            self.rowFingerprints.append(fingerprint(row))
+            self.rowKeys.append(row[0])
+            self.rowRecords.append(record)
 
         # Обновим также список персон
         self.updatePersonas(self.personaDict)
 
     def updatePersonas(self, persnDict: dict) -> None:
         """
-        Данная функция предназначена для обновления множества персон.
+        Данная функция предназначена для обновления множества персон и поискового индекса по ним.
 
         :param
         persnDict (dict): словарь с распарсенными данными персон.
@@ -81,8 +63,64 @@ class PersonaParcer:
         (None): данная функция ничего не возвращает, она только выполняет обновление.
         """
         self.personaSet = set(persnDict.keys())
+        # Индекс строится один раз при разборе и дальше используется в каждом find. На коротких ключах (ФИО) полный
+        # перебор движком rapidfuzz быстрее BK-дерева, которое остается запасным вариантом
+        self.personaIndex = SearchIndex(persnDict.keys(), useEngine=True)
+        # Отдельный индекс по фамилиям (первому слову ФИО) для запросов из одного слова
+        self.surnameIndex = SubstringIndex((persona.split()[0] for persona in persnDict.keys()), persnDict.keys())
 
-    def find(self, targetLine: str) -> list:
+    def delta(self, rows: list) -> RowDelta:
+        """
+        Данная функция предназначена для сравнения разобранных строк с новой версией листа "Полномочия".
+
+        :param
+        rows (list): строки новой версии листа.
+
+        :return
+        (RowDelta): вставленные и удаленные строки.
+        """
+
+        return RowDelta(self.rowFingerprints, self.rowKeys, rows)
+
+    def applyDelta(self, delta: RowDelta) -> "PersonaParcer":
+        """
+        Данная функция предназначена для построения парсера новой версии листа без повторного разбора: записи
+        совпавших строк переиспользуются, а поисковые индексы получают только добавленные и удаленные ФИО. Текущий
+        парсер не меняется (по нему могут идти начатые поиски).
+
+        :param
+        delta (RowDelta): результат delta для новой версии листа.
+
+        :return
+        (PersonaParcer): парсер новой версии.
+        """
+
+        parser = PersonaParcer(self.filePath, parseFlag=False)
+        parser.rowFingerprints = delta.fingerprints
+        parser.rowKeys = [row[0] for row in delta.rows]
+        parser.rowRecords = [self.rowRecords[match] if match != -1 else PersonaRecord.fromRow(row)
+                             for row, match in zip(delta.rows, delta.matches)]
+
+        for key, record in zip(parser.rowKeys, parser.rowRecords):
+            parser.personaDict.setdefault(key, []).append(record)
+        parser.personaSet = set(parser.personaDict.keys())
+
+        added = [key for key in parser.personaDict if key not in self.personaSet]
+        removed = [key for key in self.personaDict if key not in parser.personaSet]
+        parser.personaIndex = self.personaIndex.updated(parser.personaDict.keys(), added, removed)
+        # Индекс не изменился, только если ФИО те же и в том же порядке; иначе фамилии упорядочиваются по новым позициям
+        if parser.personaIndex is not self.personaIndex:
+            parser.surnameIndex = self.surnameIndex.updated((key.split()[0] for key in added),
+                                                            parser.personaIndex.positions, added)
+            if overlayTooLarge(parser.surnameIndex.overlaySize(), len(parser.personaSet)):
+                parser.surnameIndex = SubstringIndex((key.split()[0] for key in parser.personaDict.keys()),
+                                                     parser.personaDict.keys())
+        else:
+            parser.surnameIndex = self.surnameIndex
+
+        return parser
+
+    def findScored(self, targetLine: str) -> list:
         """
         Данная функция ищет по образцу персону в множестве. В случае если есть точное совпадение, возвращается один
         человек, в ином - три самых близких. Думается мне сделать так, что если совпадение неточное, но очень близкое
@@ -92,19 +130,62 @@ class PersonaParcer:
         targetLine (str): входная строка, по которой производится поиск.
 
         :return:
-        (lst): список ближайших по-расстоянию Левенштейна элементов из множества personaSet к элементу targetLine.
+        (lst): список пар (элемент, расстояние) для ближайших по-расстоянию Левенштейна элементов из множества
+        personaSet к элементу targetLine. Расстояния возвращаются вместе с элементами, чтобы их не пересчитывать.
         """
 
-        # Сортируем всех персон по расстоянию
-        personasSorted = sorted(self.personaSet, key=lambda x: distance(x, targetLine))
-        minDistance = distance(personasSorted[0], targetLine)
+        # Ищем три ближайших элемента по индексу, без сортировки всего множества
+        nearest = self.personaIndex.nearest(targetLine, 3)
 
-        if minDistance == 0:
+        if nearest[0][1] == 0:
             # Если минимум равен 0, возвращаем один элемент
-            return [personasSorted[0]]
+            return nearest[:1]
         else:
             # Если минимум не равен 0, возвращаем три элемента
-            return personasSorted[:3]
+            return nearest
+
+    def find(self, targetLine: str) -> list:
+        """
+        Данная функция ищет по образцу персону в множестве. В случае если есть точное совпадение, возвращается один
+        человек, в ином - три самых близких. Думается мне сделать так, что если совпадение неточное, но очень близкое
+        к тому, то все равно возвращать одного человека, но пока это мысли..
+
+        :param
+        targetLine (str): входная строка, по которой производится поиск.
+
+        :return:
+        (lst): список ближайших по-расстоянию Левенштейна элементов из множества personaSet к элементу targetLine.
+        """
+
+        return [key for key, _ in self.findScored(targetLine)]
+
+    def findSubstring(self, line: str):
+        """
+        Данная функция ищет персону, в ФИО которой входит строка line (без учета регистра). Поиск идет по суффиксному
+        массиву, а при нескольких вхождениях выбирается первое в порядке строк книги.
+
+        :param
+        line (str): искомая подстрока.
+
+        :return
+        Найденный ключ, либо None, если вхождений нет.
+        """
+
+        return self.personaIndex.firstContaining(line)
+
+    def findSurname(self, line: str):
+        """
+        Данная функция ищет персону, в фамилию которой входит строка line (без учета регистра). При нескольких
+        вхождениях выбирается первое в порядке строк книги.
+
+        :param
+        line (str): искомая подстрока.
+
+        :return
+        Найденный ключ (ФИО), либо None, если вхождений нет.
+        """
+
+        return self.surnameIndex.first(line)
 
     def show(self, fio: str) -> list:
         """ 
@@ -114,7 +195,7 @@ class PersonaParcer:
         fio (str): входная строка, по которой будет выводиться результат.
 
         :return
-        (str): данные для персоны в строчном формате.
+        (list): ФИО и записи о полномочиях (PersonaRecord), текст которых собирается методом render.
 
         """
 
@@ -124,22 +205,10 @@ class PersonaParcer:
         #     return [""]
 
         result = [fio]
-
-        for index, value in enumerate(self.personaDict[fio]):
-            temp = ""
-            # temp += f"{index + 1}) "
-            temp += str(value) + "\n"
-
-            if index != len(self.personaDict[fio]) - 1:
-                temp += "\n"
-
-            result.append(temp)
+        result.extend(self.personaDict[fio])
 
         return result
 
-    def __close_workbook(self):
-        self.workbook.close()
-
     def __str__(self):
         result = ""
 
@@ -147,7 +216,7 @@ class PersonaParcer:
             result += key + ": " + "\n"
             for index, value in enumerate(item):
                 result += f"{index + 1}) "
-                result += str(value) + "\n"
+                result += value.render() + "\n"
 
                 if index != len(item) - 1:
                     result += "\n"
@@ -155,9 +224,6 @@ class PersonaParcer:
 
         return result
 
-    def __del__(self):
-        self.__close_workbook()
-
 
 if __name__ == '__main__':
     # Инициализация. В ней автоматически происходит парсинг.
@@ -0,0 +1,141 @@
+from bisect import bisect_left, bisect_right
+
+
+# Кавычки, которые в книге и в запросах пишутся по-разному ("Приказы", «Приказы», „Приказы“) и не влияют на смысл
+QUOTES = str.maketrans("", "", "\"'«»„“”‘’`")
+
+
+def normalizeKey(line: str) -> str:
+    """
+    Данная функция предназначена для нормализации ключа или запроса: без учета регистра, "ё" как "е", без кавычек и
+    лишних пробелов.
+
+    :param
+    line (str): исходная строка.
+
+    :return
+    (str): нормализованная строка.
+    """
+
+    return " ".join(line.translate(QUOTES).casefold().replace("ё", "е").split())
+
+
+class PrefixIndex:
+    """
+    Отсортированный список нормализованных ключей всех парсеров. Все ключи, начинающиеся с заданной строки, находятся
+    двоичным поиском: ключи с общим префиксом занимают в списке непрерывный отрезок. Точное совпадение после
+    нормализации ищется по словарю "нормализованный ключ -> пары" за одно обращение.
+
+    Для каждого нормализованного ключа хранится пара (вид, ключ): вид - 'persona', 'structure' или 'num', ключ - в том
+    виде, в котором он записан в книге. При равных нормализованных ключах пары идут в порядке добавления.
+    """
+
+    def __init__(self, keysByKind=()):
+        entries = []
+        for kind, keys in keysByKind:
+            entries.extend((normalizeKey(key), order, kind, key) for order, key in enumerate(keys, start=len(entries)))
+        entries.sort()
+        self.normalized = [entry[0] for entry in entries]
+        self.entries = [(kind, key) for _, _, kind, key in entries]
+        self.exactEntries = {}
+        for normalized, entry in zip(self.normalized, self.entries):
+            self.exactEntries.setdefault(normalized, []).append(entry)
+
+    def updated(self, added, removed) -> "PrefixIndex":
+        """
+        Данная функция предназначена для получения индекса новой версии данных: удаленные ключи вырезаются из
+        отсортированных списков, новые вставляются на свое место двоичным поиском. Текущий индекс не меняется.
+
+        :param
+        added: добавленные пары (вид, ключ).
+        removed: удаленные пары (вид, ключ).
+
+        :return
+        (PrefixIndex): новый индекс.
+        """
+
+        index = PrefixIndex()
+        index.normalized = list(self.normalized)
+        index.entries = list(self.entries)
+        index.exactEntries = dict(self.exactEntries)
+
+        changed = set()
+        for entry in removed:
+            normalized = normalizeKey(entry[1])
+            low, high = bisect_left(index.normalized, normalized), bisect_right(index.normalized, normalized)
+            for position in range(low, high):
+                if index.entries[position] == entry:
+                    del index.normalized[position], index.entries[position]
+                    break
+            changed.add(normalized)
+
+        for entry in added:
+            normalized = normalizeKey(entry[1])
+            # При равных нормализованных ключах новый ключ идет последним, как при построении
+            position = bisect_right(index.normalized, normalized)
+            index.normalized.insert(position, normalized)
+            index.entries.insert(position, entry)
+            changed.add(normalized)
+
+        # Списки пар словаря общие с текущим индексом, поэтому измененные собираются заново из отсортированного списка
+        for normalized in changed:
+            low, high = bisect_left(index.normalized, normalized), bisect_right(index.normalized, normalized)
+            entries = index.entries[low:high]
+            if entries:
+                index.exactEntries[normalized] = entries
+            else:
+                index.exactEntries.pop(normalized, None)
+
+        return index
+
+    def __range(self, prefix: str):
+        # Все строки, начинающиеся с prefix, лежат в отрезке [prefix, prefix + максимальный символ)
+        return bisect_left(self.normalized, prefix), bisect_left(self.normalized, prefix + "\U0010ffff")
+
+    def exact(self, line: str) -> list:
+        """
+        Данная функция предназначена для поиска ключей, совпадающих с line после нормализации.
+
+        :return
+        (list): пары (вид, ключ).
+        """
+
+        return self.exactEntries.get(normalizeKey(line), [])
+
+    def countStartingWith(self, prefix: str) -> int:
+        low, high = self.__range(normalizeKey(prefix))
+        return high - low
+
+    def startingWith(self, prefix: str, limit: int = 50, wholeWords: bool = False) -> list:
+        """
+        Данная функция предназначена для поиска ключей, начинающихся с prefix (после нормализации).
+
+        :param
+        prefix (str): начало ключа.
+        limit (int): сколько ключей вернуть не больше.
+        wholeWords (bool): если True, то prefix должен заканчиваться на границе слова ключа ("Иванов Иван" подходит к
+        "Иванов Иван Иванович", но не к "Иванов Иванович").
+
+        :return
+        (list): пары (вид, ключ) в порядке нормализованных ключей.
+        """
+
+        prefix = normalizeKey(prefix)
+        if not prefix:
+            return []
+
+        low, high = self.__range(prefix)
+        if not wholeWords:
+            return self.entries[low:min(high, low + limit)]
+
+        result = []
+        for position in range(low, high):
+            normalized = self.normalized[position]
+            if len(normalized) == len(prefix) or normalized[len(prefix)] == " ":
+                result.append(self.entries[position])
+                if len(result) >= limit:
+                    break
+        return result
+
+    def __len__(self):
+        return len(self.entries)
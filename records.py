@@ -0,0 +1,153 @@
+from workbookLoader import getValue
+
+
+class PersonaRecord:
+    """
+    Одна строка листа "Полномочия" (без ФИО, оно является ключом словаря). Поля хранятся в __slots__, а текст для
+    отправки пользователю собирается методом render только в момент ответа.
+    """
+
+    kind = "persona"
+
+    FIELDS = ("position", "authorityReceived", "orderDate", "orderNumber", "orderStatus", "orderType",
+              "temporaryDuties", "managedUnits", "managedEmployees", "coordinatedUnits", "coordinatedEmployees",
+              "coordinatedActivities", "managedActivities", "employerRights", "signatureRight")
+    __slots__ = FIELDS
+
+    LABELS = ("1. Должность: ",
+              "2. Полномочия получены: ",
+              "3. Дата приказа об установлении полномочий: ",
+              "4. Номер приказа об установлении полномочий: ",
+              "5. Статус приказа: ",
+              "6. Тип приказа: ",
+              "7. Возложение обязанностей на период временного отсутствия: ",
+              "8. Руководимые подразделения: ",
+              "9. Руководимые работники: ",
+              "10. Координируемые подразделения: ",
+              "11. Координируемые работники: ",
+              "12. Координируемые направление деятельности: ",
+              "13. Руководимые направления деятельности: ",
+              "14. Права работодателя: ",
+              "15. Право подписи, в рамках возложенных обязанностей и предоставленных полномочий: ")
+
+    def __init__(self, *values: str):
+        for field, value in zip(self.FIELDS, values):
+            setattr(self, field, value)
+
+    @classmethod
+    def fromRow(cls, row: tuple) -> "PersonaRecord":
+        """
+        Данная функция предназначена для создания записи из строки листа "Полномочия" (колонки 1-15).
+
+        :param
+        row (tuple): строка листа (кортеж значений).
+
+        :return
+        (PersonaRecord): запись о полномочиях.
+        """
+
+        return cls(*(getValue(row, index) for index in range(1, 16)))
+
+    def values(self) -> tuple:
+        return tuple(getattr(self, field) for field in self.FIELDS)
+
+    def render(self) -> str:
+        """
+        Данная функция предназначена для формирования текста записи в том виде, в котором он отправляется
+        пользователю.
+
+        :return
+        (str): текст записи.
+        """
+
+        return "\n".join(f"{label}{value};" for label, value in zip(self.LABELS, self.values()))
+
+    def __str__(self):
+        return self.render()
+
+    def __repr__(self):
+        return f"{type(self).__name__}(position={self.position!r})"
+
+
+class DepartmentRecord:
+    """
+    Одна строка листа "Оргструктура". Отображается в виде ответа на поиск по наименованию подразделения: первой
+    строкой идет код ИС-ПРО (наименование - это заголовок ответа).
+    """
+
+    kind = "structure"
+
+    FIELDS = ("name", "code", "parent", "topParent", "campus", "independent", "status", "unitKind", "unitType",
+              "mainActivity", "extraActivities", "tasks", "createdAt", "orderNumber")
+    __slots__ = FIELDS
+
+    # Подписи для полей, начиная с parent; первая строка ответа формируется отдельно в firstLine.
+    LABELS = ("2. Вышестоящее подразделение: ",
+              "3. Вышестоящее подразделение верхнего уровня: ",
+              "4. Кампус: ",
+              "5. Самостоятельное: ",
+              "6. Статус: ",
+              "7. Вид подразделения: ",
+              "8. Тип подразделения: ",
+              "9. Основной вид деятельности: ",
+              "10. Дополнительные виды деятельности: ",
+              "11. Задачи подразделения: ",
+              "12. Дата создания: ",
+              "13. Номер приказа о создании: ")
+
+    def __init__(self, *values: str):
+        for field, value in zip(self.FIELDS, values):
+            setattr(self, field, value)
+
+    @classmethod
+    def fromRow(cls, row: tuple) -> "DepartmentRecord":
+        """
+        Данная функция предназначена для создания записи из строки листа "Оргструктура" (колонки 0-13).
+
+        :param
+        row (tuple): строка листа (кортеж значений).
+
+        :return
+        (DepartmentRecord): запись о подразделении.
+        """
+
+        return cls(*(getValue(row, index) for index in range(14)))
+
+    def values(self) -> tuple:
+        return tuple(getattr(self, field) for field in self.FIELDS)
+
+    def firstLine(self) -> str:
+        return f"1. Код ИС-ПРО: {self.code};"
+
+    def render(self) -> str:
+        """
+        Данная функция предназначена для формирования текста записи в том виде, в котором он отправляется
+        пользователю.
+
+        :return
+        (str): текст записи.
+        """
+
+        lines = [self.firstLine()]
+        lines.extend(f"{label}{value};" for label, value in zip(self.LABELS, self.values()[2:]))
+        return "\n".join(lines)
+
+    def __str__(self):
+        return self.render()
+
+    def __repr__(self):
+        return f"{type(self).__name__}(name={self.name!r}, code={self.code!r})"
+
+
+class CodeRecord(DepartmentRecord):
+    """
+    Та же строка листа "Оргструктура", но в виде ответа на поиск по шифру: первой строкой идет наименование
+    подразделения (шифр - это заголовок ответа).
+    """
+
+    kind = "num"
+
+    __slots__ = ()
+
+    def firstLine(self) -> str:
+        return f"1. Наименование: {self.name};"
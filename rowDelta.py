@@ -0,0 +1,98 @@
+import hashlib
+import pickle
+from collections import Counter
+
+from workbookLoader import getValue
+
+
+def dataRows(rows) -> list:
+    """
+    Данная функция предназначена для отбора строк с данными: как и в парсерах, лист заканчивается на первой пустой
+    строке (или строке без ключа в первой колонке).
+
+    :param
+    rows: строки листа (кортежи значений).
+
+    :return
+    (list): строки до первой пустой.
+    """
+
+    result = []
+    for row in rows:
+        if not row or row[0] is None:
+            break
+        result.append(row)
+    return result
+
+
+def fingerprint(row: tuple) -> bytes:
+    """
+    Данная функция предназначена для вычисления отпечатка строки листа. Отпечаток не зависит от запуска процесса
+    (в отличие от hash), поэтому хранится в снимке и сравнивается со строками новой версии книги.
+
+    :param
+    row (tuple): строка листа (кортеж значений).
+
+    :return
+    (bytes): 8 байт blake2b от сериализованной строки.
+    """
+
+    return hashlib.blake2b(pickle.dumps(row, protocol=4), digest_size=8).digest()
+
+
+class RowDelta:
+    """
+    Разница между строками листа, из которых построены текущие данные (известны только их отпечатки), и строками новой
+    версии книги. Строки сопоставляются по отпечаткам с учетом повторов: строка, которая лишь переместилась, не
+    считается измененной. Остальные строки новой книги - вставленные, оставшиеся старые - удаленные.
+
+    Вставка и удаление строки с одним и тем же ключом (первая колонка) считаются одним изменением строки.
+    """
+
+    def __init__(self, oldFingerprints, oldKeys, rows, selectRows=dataRows):
+        """
+        :param
+        oldFingerprints: отпечатки старых строк в порядке книги.
+        oldKeys: ключи старых строк в том же порядке.
+        rows: строки новой версии листа.
+        selectRows: функция отбора строк с данными (по умолчанию - до первой строки без ключа).
+        """
+
+        self.rows = selectRows(rows)
+        self.fingerprints = [fingerprint(row) for row in self.rows]
+
+        positions = {}
+        for position, rowFingerprint in enumerate(oldFingerprints):
+            positions.setdefault(rowFingerprint, []).append(position)
+        for stack in positions.values():
+            stack.reverse()
+
+        # matches[i] - номер старой строки, совпавшей с i-й новой, либо -1 для вставленной строки
+        self.matches = []
+        for rowFingerprint in self.fingerprints:
+            stack = positions.get(rowFingerprint)
+            self.matches.append(stack.pop() if stack else -1)
+
+        self.inserted = [position for position, match in enumerate(self.matches) if match == -1]
+        self.deleted = sorted(position for stack in positions.values() for position in stack)
+        # Совпавшие строки поменялись местами: ключи те же, но порядок записей в ответах другой
+        kept = [match for match in self.matches if match != -1]
+        self.reordered = any(previous > current for previous, current in zip(kept, kept[1:]))
+
+        insertedKeys = Counter(getValue(self.rows[position], 0) for position in self.inserted)
+        deletedKeys = Counter(str(oldKeys[position]) for position in self.deleted)
+        self.updated = sum((insertedKeys & deletedKeys).values())
+
+    def counts(self) -> tuple:
+        """
+        :return
+        (tuple): число добавленных, измененных и удаленных строк.
+        """
+
+        return len(self.inserted) - self.updated, self.updated, len(self.deleted) - self.updated
+
+    def __len__(self):
+        return len(self.inserted) + len(self.deleted) - self.updated
+
+    def __bool__(self):
+        return bool(self.inserted or self.deleted or self.reordered)
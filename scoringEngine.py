@@ -0,0 +1,103 @@
+from fuzzy import topK
+
+# rapidfuzz (на нем построен пакет Levenshtein) сравнивает запрос со всеми ключами одним вызовом на C++, без
+# питоновского цикла по ключам. Матрица расстояний для пачки запросов (cdist) дополнительно требует NumPy: расчет идет
+# в нескольких потоках с отпущенным GIL.
+try:
+    from rapidfuzz import process
+    from rapidfuzz.distance import Levenshtein
+except ImportError:
+    process = None
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class ScoringEngine:
+    """
+    Расчет расстояний Левенштейна от запроса (или пачки запросов) сразу до всех ключей. Если rapidfuzz недоступен,
+    используется питоновский topK с досрочным прерыванием расчета; если нет NumPy, пачка запросов считается по одному
+    запросу.
+
+    Результаты совпадают с topK: пары (ключ, расстояние) по возрастанию расстояния, при равных расстояниях - в
+    порядке ключей.
+    """
+
+    def __init__(self, keys=(), workers: int = -1):
+        self.keys = list(keys)
+        # Число потоков для матрицы расстояний (-1 - по числу ядер)
+        self.workers = workers
+
+    @staticmethod
+    def available() -> bool:
+        return process is not None
+
+    @staticmethod
+    def matrixAvailable() -> bool:
+        return process is not None and numpy is not None
+
+    def nearest(self, targetLine: str, k: int = 3) -> list:
+        """
+        Данная функция предназначена для поиска k ближайших ключей к одному запросу.
+
+        :param
+        targetLine (str): входная строка, по которой производится поиск.
+        k (int): сколько ближайших ключей вернуть.
+
+        :return
+        (list): список пар (ключ, расстояние), отсортированный по возрастанию расстояния.
+        """
+
+        if process is None:
+            return topK(targetLine, self.keys, k)
+        return [(key, keyDistance)
+                for key, keyDistance, _ in process.extract(targetLine, self.keys, scorer=Levenshtein.distance, limit=k)]
+
+    def distances(self, queries: list):
+        """
+        Данная функция предназначена для расчета матрицы расстояний "запросы x ключи".
+
+        :param
+        queries (list): запросы.
+
+        :return
+        (numpy.ndarray): матрица int32 размера len(queries) x len(keys).
+        """
+
+        if not self.matrixAvailable():
+            raise RuntimeError("Для матрицы расстояний нужны rapidfuzz и numpy")
+        return process.cdist(queries, self.keys, scorer=Levenshtein.distance, dtype=numpy.int32,
+                             workers=self.workers)
+
+    def nearestMany(self, queries: list, k: int = 3) -> list:
+        """
+        Данная функция предназначена для поиска k ближайших ключей к каждому запросу пачки. С NumPy вся пачка
+        считается одним вызовом cdist, иначе - по одному запросу.
+
+        :param
+        queries (list): запросы.
+        k (int): сколько ближайших ключей вернуть для каждого запроса.
+
+        :return
+        (list): для каждого запроса - список пар (ключ, расстояние), как в nearest.
+        """
+
+        if not self.matrixAvailable() or not self.keys:
+            return [self.nearest(query, k) for query in queries]
+
+        matrix = self.distances(queries)
+        k = min(k, len(self.keys))
+        result = []
+        for row in matrix:
+            # partition находит k-е по величине расстояние без сортировки строки; равные расстояния упорядочиваются
+            # по номеру ключа
+            threshold = numpy.partition(row, k - 1)[k - 1]
+            best = numpy.flatnonzero(row <= threshold)
+            best = best[numpy.lexsort((best, row[best]))][:k]
+            result.append([(self.keys[keyId], int(row[keyId])) for keyId in best])
+        return result
+
+    def __len__(self):
+        return len(self.keys)
@@ -0,0 +1,87 @@
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+from Levenshtein import distance
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import bkTree  # noqa: E402
+import fuzzy  # noqa: E402
+
+
+SURNAMES = ["Иванов", "Петров", "Смирнов", "Кузнецов", "Попов", "Соколов", "Лебедев", "Козлов", "Новиков", "Морозов"]
+NAMES = ["Иван", "Петр", "Алексей", "Дмитрий", "Сергей", "Андрей", "Михаил", "Николай", "Игорь", "Олег"]
+PATRONYMICS = ["Иванович", "Петрович", "Алексеевич", "Дмитриевич", "Сергеевич", "Андреевич", "Михайлович"]
+LETTERS = "абвгдежзиклмнопрстуфхцчшщэюя"
+
+
+class CountingDistance:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, first, second, **kwargs):
+        self.calls += 1
+        return distance(first, second, **kwargs)
+
+
+def generate_keys(size, rng):
+    keys = set()
+    while len(keys) < size:
+        surname = rng.choice(SURNAMES) + "".join(rng.choice(LETTERS) for _ in range(rng.randint(0, 3)))
+        keys.add(f"{surname} {rng.choice(NAMES)} {rng.choice(PATRONYMICS)}")
+    return list(keys)
+
+
+def make_typo(key, rng, typos):
+    chars = list(key)
+    for _ in range(typos):
+        chars[rng.randrange(len(chars))] = rng.choice(LETTERS)
+    return "".join(chars)
+
+
+def sort_everything(query, keys, measure_distance):
+    return sorted(keys, key=lambda key: measure_distance(key, query))[:3]
+
+
+def measure(label, search, queries, counter):
+    counter.calls = 0
+    start = time.perf_counter()
+    for query in queries:
+        search(query)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} {elapsed / len(queries) * 1000:8.3f} мс/запрос {counter.calls / len(queries):10.1f} "
+          f"distance/запрос")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение BK-дерева с полной сортировкой ключей.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--typos", type=int, default=2)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    counter = CountingDistance()
+    bkTree.distance = counter
+    fuzzy.distance = counter
+
+    for size in args.sizes:
+        keys = generate_keys(size, rng)
+        queries = [make_typo(rng.choice(keys), rng, args.typos) for _ in range(args.queries)]
+
+        start = time.perf_counter()
+        tree = bkTree.BKTree(keys)
+        print(f"\nКлючей: {size}. Построение BK-дерева: {time.perf_counter() - start:.2f} с.")
+
+        measure("sorted (как было)", lambda query: sort_everything(query, keys, counter), queries, counter)
+        measure("fuzzy.topK", lambda query: fuzzy.topK(query, keys, 3), queries, counter)
+        measure("BKTree.nearest(k=3)", lambda query: tree.nearest(query, 3), queries, counter)
+        measure(f"BKTree.within(d={args.typos})", lambda query: tree.within(query, args.typos), queries, counter)
+
+
+if __name__ == "__main__":
+    main()
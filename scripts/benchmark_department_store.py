@@ -0,0 +1,73 @@
+import argparse
+import pickle
+import random
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from departmentStore import DepartmentStore  # noqa: E402
+from records import CodeRecord, DepartmentRecord  # noqa: E402
+
+
+CAMPUSES = ["Москва", "Санкт-Петербург", "Нижний Новгород", "Пермь"]
+STATUSES = ["Действующее", "Ликвидировано", "В стадии реорганизации"]
+KINDS = ["Учебное", "Научное", "Административное", "Хозяйственное"]
+TYPES = ["Отдел", "Управление", "Факультет", "Лаборатория", "Центр"]
+ACTIVITIES = ["Образовательная деятельность", "Научная деятельность", "Административная деятельность"]
+
+
+def generate_rows(size, rng):
+    rows = []
+    for index in range(size):
+        parent = f"Управление {index // 50}"
+        rows.append((f"Отдел {index}", f"01.{index // 100}.{index % 100}", parent, f"Дирекция {index // 1000}",
+                     rng.choice(CAMPUSES), rng.choice(["Да", "Нет"]), rng.choice(STATUSES), rng.choice(KINDS),
+                     rng.choice(TYPES), rng.choice(ACTIVITIES), "нет", f"Задачи подразделения {index}",
+                     f"{rng.randint(1, 28):02d}.{rng.randint(1, 12):02d}.{rng.randint(1995, 2023)}",
+                     f"{rng.randint(1, 9999)}/{rng.choice(['од', 'лс'])}"))
+    return rows
+
+
+def build_dicts(rows):
+    # Прежняя схема: StructureParser и NumParser строят по отдельной записи на каждую строку
+    structureDict, numDict = {}, {}
+    for row in rows:
+        structureDict.setdefault(row[0], []).append(DepartmentRecord.fromRow(row))
+        numDict.setdefault(row[1], []).append(CodeRecord.fromRow(row))
+    return structureDict, numDict
+
+
+def measure(label, build, rows):
+    tracemalloc.start()
+    start = time.perf_counter()
+    data = build(rows)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    snapshotSize = len(pickle.dumps(data, protocol=pickle.HIGHEST_PROTOCOL))
+    print(f"{label:<28} {current / 2 ** 20:8.1f} МБ в памяти {snapshotSize / 2 ** 20:8.1f} МБ в снимке "
+          f"{elapsed:6.2f} с")
+    return data
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Сравнение памяти: два словаря записей и общее DepartmentStore.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 50000])
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    for size in args.sizes:
+        # Строки листа создаются заранее: они живут до конца загрузки при любом способе хранения
+        rows = generate_rows(size, rng)
+        print(f"\nПодразделений: {size}.")
+        measure("два словаря (как было)", build_dicts, rows)
+        store = measure("DepartmentStore", DepartmentStore, rows)
+        print(f"Уникальных значений в хранилище: {len(store.values)} из {size * len(DepartmentRecord.FIELDS)} ячеек.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+import argparse
+import contextlib
+import io
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from search import Finder  # noqa: E402
+from workbookLoader import peakMemoryMb  # noqa: E402
+
+
+LETTERS = "абвгдежзиклмнопрстуфхцчшщэюя"
+GIBBERISH = "qwrtzxvbnmjk"
+
+
+def make_typo(key, rng, typos):
+    chars = list(key)
+    for _ in range(typos):
+        chars[rng.randrange(len(chars))] = rng.choice(LETTERS)
+    return "".join(chars)
+
+
+def build_queries(finder, count, rng):
+    """
+    Запросы четырех классов по данным самой книги: точные ключи, ключи с опечатками, фамилия без имени
+    (поиск вхождения) и бессмысленные строки, для которых ответа нет.
+    """
+
+    state = finder.state
+    personas = list(state.personaParser.personaDict)
+    structures = list(state.structureParser.structureDict)
+    codes = [code for code in state.numParser.numDict if code != "Без кода"]
+
+    return {
+        "exact": [rng.choice(rng.choice((personas, structures, codes))) for _ in range(count)],
+        "typo": [make_typo(rng.choice(rng.choice((personas, structures))), rng, rng.randint(1, 2)) for _ in range(count)],
+        "substring": [rng.choice(personas).split()[0] for _ in range(count)],
+        "unclassified": ["".join(rng.choice(GIBBERISH) for _ in range(rng.randint(8, 16))) for _ in range(count)],
+    }
+
+
+def percentile(values, percent):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(percent / 100 * (len(ordered) - 1)))]
+
+
+def generate_workbook(rows, seed, output):
+    # Генератор запускается отдельным процессом, чтобы его память не попала в пиковую память загрузки
+    generator = Path(__file__).resolve().parent / "create_sample_data.py"
+    subprocess.run([sys.executable, str(generator), "--rows", str(rows), "--seed", str(seed), "--output", str(output)],
+                   check=True, stdout=subprocess.DEVNULL)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер загрузки книги и задержек Finder.search по классам запросов.")
+    parser.add_argument("--data", type=Path, default=None,
+                        help="готовая книга; если не задана, генерируется книга на --rows строк")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--queries", type=int, default=200, help="число запросов каждого класса")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        data = args.data
+        if data is None:
+            data = Path(directory) / "Data.xlsx"
+            start = time.perf_counter()
+            generate_workbook(args.rows, args.seed, data)
+            print(f"Книга на {args.rows} строк сгенерирована за {time.perf_counter() - start:.1f} с.")
+
+        # Снимок кладется во временный каталог: замеряется полный разбор книги, а не загрузка готового снимка.
+        # Кэш ответов отключен, иначе повторные запросы измеряли бы кэш, а не поиск.
+        snapshotPath = str(Path(directory) / "Data.xlsx.snapshot")
+        with contextlib.redirect_stdout(io.StringIO()):
+            finder = Finder(str(data), snapshotPath=snapshotPath, cacheSize=0)
+        stats = finder.lastLoadStats
+        peakMemory = peakMemoryMb()
+
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            Finder(str(data), snapshotPath=snapshotPath, cacheSize=0)
+        snapshotTime = time.perf_counter() - start
+
+    print(f"Чтение книги:            {stats['read']:8.2f} с")
+    print(f"Построение индексов:     {stats['build']:8.2f} с")
+    print(f"Загрузка из снимка:      {snapshotTime:8.2f} с")
+    print(f"Пиковая память загрузки: {peakMemory:8.1f} МБ")
+
+    rng = random.Random(args.seed)
+    print(f"\n{'класс':<14}{'p50, мс':>10}{'p95, мс':>10}{'p99, мс':>10}{'макс, мс':>10}")
+    for queryClass, queries in build_queries(finder, args.queries, rng).items():
+        latencies = []
+        for query in queries:
+            start = time.perf_counter()
+            finder.search(query)
+            latencies.append((time.perf_counter() - start) * 1000)
+        print(f"{queryClass:<14}{percentile(latencies, 50):10.2f}{percentile(latencies, 95):10.2f}"
+              f"{percentile(latencies, 99):10.2f}{max(latencies):10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import argparse
+import random
 from pathlib import Path
 
 import openpyxl
@@ -5,57 +7,222 @@ import openpyxl
 
 OUTPUT_PATH = Path(__file__).resolve().parents[1] / "Data.xlsx"
 
+PERSONA_HEADER = [
+    "ФИО",
+    "Должность",
+    "Полномочия получены",
+    "Дата приказа об установлении полномочий",
+    "Номер приказа об установлении полномочий",
+    "Статус приказа",
+    "Тип приказа",
+    "Возложение обязанностей на период временного отсутствия",
+    "Руководимые подразделения",
+    "Руководимые работники",
+    "Координируемые подразделения",
+    "Координируемые работники",
+    "Координируемые направление деятельности",
+    "Руководимые направления деятельности",
+    "Права работодателя",
+    "Право подписи",
+]
 
-def build_persona_sheet(workbook):
-    worksheet = workbook.active
-    worksheet.title = "Полномочия"
-    worksheet.append(
-        [
-            "ФИО",
-            "Должность",
-            "Полномочия получены",
-            "Дата приказа об установлении полномочий",
-            "Номер приказа об установлении полномочий",
-            "Статус приказа",
-            "Тип приказа",
-            "Возложение обязанностей на период временного отсутствия",
-            "Руководимые подразделения",
-            "Руководимые работники",
-            "Координируемые подразделения",
-            "Координируемые работники",
-            "Координируемые направление деятельности",
-            "Руководимые направления деятельности",
-            "Права работодателя",
-            "Право подписи",
-        ]
-    )
-    worksheet.append(
-        [
-            "Иванов Иван Иванович",
-            "Руководитель демонстрационного отдела",
-            "В рамках тестового набора данных",
-            "2024-01-10",
-            "DEMO-001",
-            "Действует",
-            "Демонстрационный приказ",
-            "нет",
-            "Демонстрационный отдел",
-            "нет",
-            "нет",
-            "нет",
-            "Административная поддержка",
-            "Демо-направление",
-            "нет",
-            "нет",
-        ]
-    )
-
-
-def build_structure_sheet(workbook):
+DEMO_PERSONA = [
+    "Иванов Иван Иванович",
+    "Руководитель демонстрационного отдела",
+    "В рамках тестового набора данных",
+    "2024-01-10",
+    "DEMO-001",
+    "Действует",
+    "Демонстрационный приказ",
+    "нет",
+    "Демонстрационный отдел",
+    "нет",
+    "нет",
+    "нет",
+    "Административная поддержка",
+    "Демо-направление",
+    "нет",
+    "нет",
+]
+
+STRUCTURE_COLUMNS = 41
+HEAD_COLUMN = 40
+
+SURNAME_ROOTS = [
+    "Иван", "Петр", "Смирн", "Кузнец", "Поп", "Васил", "Сокол", "Михайл", "Новик", "Федор", "Мороз", "Волк",
+    "Алексе", "Лебед", "Семен", "Егор", "Павл", "Козл", "Степан", "Никола", "Орл", "Андре", "Макар", "Никит",
+    "Захар", "Зайц", "Солов", "Борис", "Яковл", "Григор", "Роман", "Ворон", "Серге", "Кузьм", "Фрол", "Александр",
+    "Дмитри", "Корол", "Гус", "Кисел", "Ильюш", "Максим", "Поляк", "Сорок", "Виноград", "Ковал", "Бел",
+    "Медвед", "Антон", "Тарас", "Жук", "Баран", "Филипп", "Комар", "Давыд", "Беляк", "Герасим", "Богдан", "Осип",
+    "Сидор", "Матве", "Тит", "Марк", "Абрам", "Щерб", "Горбун", "Лавр", "Кудрявц", "Рыб", "Блинн", "Гром", "Крыл",
+    "Ерш", "Шестак", "Черныш", "Мельник", "Кравч", "Юдин", "Зуб", "Лос", "Голуб", "Карп", "Носк", "Пестр", "Шубин",
+    "Дорох", "Евдоким", "Ефрем", "Игнат", "Калин", "Ларион", "Назар", "Прохор", "Савел", "Трофим", "Фомич",
+]
+SURNAME_SUFFIXES = [("ов", "ова"), ("ев", "ева"), ("ин", "ина"), ("ский", "ская"), ("енко", "енко"), ("ович", "ович")]
+MALE_NAMES = [
+    "Александр", "Алексей", "Андрей", "Антон", "Артем", "Борис", "Вадим", "Валерий", "Василий", "Виктор", "Виталий",
+    "Владимир", "Геннадий", "Георгий", "Григорий", "Денис", "Дмитрий", "Евгений", "Егор", "Иван", "Игорь", "Илья",
+    "Кирилл", "Константин", "Леонид", "Максим", "Михаил", "Никита", "Николай", "Олег", "Павел", "Петр", "Роман",
+    "Сергей", "Станислав", "Степан", "Тимур", "Федор", "Юрий", "Ярослав",
+]
+FEMALE_NAMES = [
+    "Александра", "Алина", "Анастасия", "Анна", "Валентина", "Валерия", "Вера", "Виктория", "Галина", "Дарья",
+    "Евгения", "Екатерина", "Елена", "Елизавета", "Ирина", "Карина", "Ксения", "Лариса", "Любовь", "Людмила",
+    "Маргарита", "Марина", "Мария", "Надежда", "Наталья", "Нина", "Оксана", "Ольга", "Полина", "Светлана", "Софья",
+    "Татьяна", "Юлия",
+]
+PATRONYMIC_ROOTS = [
+    "Александров", "Алексеев", "Андреев", "Борисов", "Васильев", "Викторов", "Владимиров", "Дмитриев", "Евгеньев",
+    "Иванов", "Игорев", "Константинов", "Максимов", "Михайлов", "Николаев", "Олегов", "Павлов", "Петров", "Романов",
+    "Сергеев", "Степанов", "Федоров", "Юрьев", "Ярославов", "Анатольев", "Аркадьев", "Валерьев", "Вадимов",
+    "Геннадьев", "Григорьев", "Денисов", "Кириллов", "Леонидов", "Львов", "Матвеев", "Станиславов", "Тимуров",
+    "Эдуардов", "Глебов",
+]
+
+UNIT_KINDS = ["Отдел", "Сектор", "Управление", "Лаборатория", "Центр", "Кафедра", "Служба", "Департамент"]
+UNIT_TOPICS = [
+    "кадрового учета", "бухгалтерского учета", "закупок", "договорной работы", "документационного обеспечения",
+    "информационных технологий", "сопровождения образовательных программ", "приема абитуриентов",
+    "международного сотрудничества", "научных исследований", "прикладной математики", "экономической теории",
+    "анализа данных", "программной инженерии", "социологии", "истории", "финансового менеджмента", "маркетинга",
+    "правового обеспечения", "охраны труда", "эксплуатации зданий", "студенческих инициатив", "цифровых сервисов",
+    "публикационной активности", "грантовой поддержки", "дополнительного образования", "развития персонала",
+    "стратегического планирования", "внутреннего контроля", "медиакоммуникаций",
+]
+CAMPUSES = ["Москва", "Санкт-Петербург", "Нижний Новгород", "Пермь"]
+STATUSES = ["Действующее", "Действующее", "Действующее", "В стадии реорганизации", "Ликвидировано"]
+UNIT_TYPES = ["Учебное", "Научное", "Административное", "Хозяйственное"]
+ACTIVITIES = ["Образовательная деятельность", "Научная деятельность", "Административная деятельность",
+              "Хозяйственная деятельность"]
+POSITIONS = ["Руководитель", "Заместитель руководителя", "Начальник", "Директор", "Заведующий", "Главный специалист"]
+ORDER_STATUSES = ["Действует", "Действует", "Действует", "Отменен"]
+ORDER_TYPES = ["По основной деятельности", "По личному составу", "Доверенность"]
+RIGHTS = ["да", "нет"]
+
+
+def random_date(rng):
+    return f"{rng.randint(1995, 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+
+
+def random_order_number(rng):
+    return f"{rng.randint(1, 9999)}/{rng.choice(['од', 'лс', 'нд'])}"
+
+
+def random_person_name(rng):
+    root, (maleSuffix, femaleSuffix) = rng.choice(SURNAME_ROOTS), rng.choice(SURNAME_SUFFIXES)
+    patronymic = rng.choice(PATRONYMIC_ROOTS)
+    if rng.random() < 0.5:
+        return f"{root}{maleSuffix} {rng.choice(MALE_NAMES)} {patronymic}ич"
+    return f"{root}{femaleSuffix} {rng.choice(FEMALE_NAMES)} {patronymic}на"
+
+
+def generate_departments(count, rng, duplicates, withoutCode):
+    """
+    Иерархия подразделений: у каждого подразделения (кроме верхнего уровня) есть вышестоящее, а код ИС-ПРО
+    строится из кода вышестоящего подразделения и порядкового номера внутри него (01, 01.03, 01.03.12, ...).
+    """
+
+    departments = []
+    topCount = 0
+    childCounts = []
+    openParents = []
+    nameCounts = {}
+
+    for index in range(count):
+        parent = None
+        if openParents and (topCount >= 99 or rng.random() < 0.98):
+            parentIndex = rng.choice(openParents)
+            parent = departments[parentIndex]
+            childCounts[parentIndex] += 1
+            code = f"{parent['path']}.{childCounts[parentIndex]:02d}"
+            if childCounts[parentIndex] >= 99:
+                openParents.remove(parentIndex)
+            top = parent["top"]
+        else:
+            topCount += 1
+            code = f"{topCount:02d}"
+            top = None
+
+        if departments and rng.random() < duplicates:
+            # Одинаковые наименования у разных подразделений (например, "Отдел кадрового учета" в разных кампусах)
+            name = rng.choice(departments)["name"]
+        else:
+            name = f"{rng.choice(UNIT_KINDS)} {rng.choice(UNIT_TOPICS)}"
+            nameCounts[name] = nameCounts.get(name, 0) + 1
+            if nameCounts[name] > 1:
+                name = f"{name} №{nameCounts[name]}"
+
+        department = {
+            "name": name,
+            "code": "Без кода" if rng.random() < withoutCode else code,
+            # Место в иерархии; у подразделения "Без кода" оно тоже есть, и от него строятся коды вложенных
+            "path": code,
+            "parent": parent["name"] if parent else None,
+            "top": top or name,
+        }
+        departments.append(department)
+        childCounts.append(0)
+        if code.count(".") < 4:
+            openParents.append(index)
+
+    return departments
+
+
+def generate_personas(count, rng, duplicates):
+    names = []
+    seen = set()
+    for _ in range(count):
+        if names and rng.random() < duplicates:
+            # Один и тот же человек с несколькими строками полномочий
+            names.append(rng.choice(names))
+            continue
+
+        name = random_person_name(rng)
+        for _ in range(100):
+            if name not in seen:
+                break
+            # Свободные сочетания кончаются только на миллионах строк; тогда допускаем полных тезок
+            name = random_person_name(rng)
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def build_persona_sheet(workbook, personas, departments, rng):
+    worksheet = workbook.create_sheet("Полномочия")
+    worksheet.append(PERSONA_HEADER)
+    worksheet.append(DEMO_PERSONA)
+
+    for index, name in enumerate(personas):
+        department = departments[index % len(departments)] if departments else None
+        unit = department["name"] if department else "нет"
+        worksheet.append(
+            [
+                name,
+                f"{rng.choice(POSITIONS)} ({unit})",
+                rng.choice(["Приказ", "Доверенность", "Положение о подразделении"]),
+                random_date(rng),
+                random_order_number(rng),
+                rng.choice(ORDER_STATUSES),
+                rng.choice(ORDER_TYPES),
+                "нет" if rng.random() < 0.8 else random_person_name(rng),
+                unit,
+                "нет",
+                (department["parent"] or "нет") if department else "нет",
+                "нет",
+                rng.choice(ACTIVITIES),
+                rng.choice(ACTIVITIES),
+                rng.choice(RIGHTS),
+                rng.choice(RIGHTS),
+            ]
+        )
+
+
+def build_structure_sheet(workbook, departments, personas, rng):
     worksheet = workbook.create_sheet("Оргструктура")
-    worksheet.append([f"Колонка {index}" for index in range(1, 42)])
+    worksheet.append([f"Колонка {index}" for index in range(1, STRUCTURE_COLUMNS + 1)])
 
-    row = ["нет"] * 41
+    row = ["нет"] * STRUCTURE_COLUMNS
     row[0] = "Демонстрационный отдел"
     row[1] = "01.01.01"
     row[2] = "Демонстрационный департамент"
@@ -68,16 +235,54 @@ def build_structure_sheet(workbook):
     row[11] = "Показывает формат данных без раскрытия реальных записей"
     row[12] = "2024-01-01"
     row[13] = "DEMO-STRUCT-001"
-    row[40] = "Иванов Иван Иванович"
+    row[HEAD_COLUMN] = "Иванов Иван Иванович"
     worksheet.append(row)
 
+    for index, department in enumerate(departments):
+        # Колонки 14-39 бот не читает, поэтому в сгенерированных строках они пустые
+        row = [None] * STRUCTURE_COLUMNS
+        row[0] = department["name"]
+        row[1] = department["code"]
+        row[2] = department["parent"] or "нет"
+        row[3] = department["top"]
+        row[4] = rng.choice(CAMPUSES)
+        row[5] = rng.choice(RIGHTS)
+        row[6] = rng.choice(STATUSES)
+        row[7] = department["name"].split()[0]
+        row[8] = rng.choice(UNIT_TYPES)
+        row[9] = rng.choice(ACTIVITIES)
+        row[10] = rng.choice(ACTIVITIES) if rng.random() < 0.3 else "нет"
+        row[11] = f"Обеспечение направления: {department['name'].split(' ', 1)[1]}"
+        row[12] = random_date(rng)
+        row[13] = random_order_number(rng)
+        # Руководитель подразделения - та же персона, у которой это подразделение указано в "Руководимых"
+        row[HEAD_COLUMN] = personas[index] if index < len(personas) else "нет"
+        worksheet.append(row)
+
 
 def main():
-    workbook = openpyxl.Workbook()
-    build_persona_sheet(workbook)
-    build_structure_sheet(workbook)
-    workbook.save(OUTPUT_PATH)
-    print(f"Sample workbook created: {OUTPUT_PATH}")
+    parser = argparse.ArgumentParser(description="Генератор синтетической книги Data.xlsx.")
+    parser.add_argument("--rows", type=int, default=0,
+                        help="число сгенерированных строк на листе \"Полномочия\" (кроме демонстрационной)")
+    parser.add_argument("--departments", type=int, default=None,
+                        help="число сгенерированных подразделений (по умолчанию - как --rows)")
+    parser.add_argument("--duplicates", type=float, default=0.02, help="доля строк с повторяющимся именем")
+    parser.add_argument("--without-code", type=float, default=0.001, help="доля подразделений \"Без кода\"")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", type=Path, default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    departmentCount = args.rows if args.departments is None else args.departments
+    departments = generate_departments(departmentCount, rng, args.duplicates, args.without_code)
+    personas = generate_personas(args.rows, rng, args.duplicates)
+
+    # write_only: строки сразу уходят в файл, и книга на миллион строк не держится в памяти целиком
+    workbook = openpyxl.Workbook(write_only=True)
+    build_persona_sheet(workbook, personas, departments, rng)
+    build_structure_sheet(workbook, departments, personas, rng)
+    workbook.save(args.output)
+    print(f"Sample workbook created: {args.output} ({args.rows + 1} personas, {departmentCount + 1} departments)")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,176 @@
+import argparse
+import asyncio
+import json
+import logging
+import math
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from sendQueue import SendQueue, TokenBucket, INTERACTIVE, BULK  # noqa: E402
+
+
+class FakeBotApi(ThreadingHTTPServer):
+    """
+    Локальная заглушка Bot API: отвечает на getMe и sendMessage, подтверждает остальные методы и, как настоящий
+    Telegram, возвращает 429 Too Many Requests с parameters.retry_after, если превышен лимит отправки в чат или общий
+    лимит бота.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, globalRate=30.0, chatRate=1.0, chatBurst=3.0, verbose=False):
+        super().__init__((host, port), FakeBotApiHandler)
+        self.port = self.server_address[1]
+        self.chatRate = chatRate
+        self.chatBurst = chatBurst
+        self.globalBucket = TokenBucket(globalRate, globalRate)
+        self.chatBuckets = {}
+        self.sent = 0
+        self.rejected = 0
+        self.lock = threading.Lock()
+        self.nextMessageId = 1
+        self.verbose = verbose
+        self.tolerance = 0.1
+
+    def admit(self, chatId):
+        """
+        Данная функция проверяет лимиты. Отклоненная отправка токен не расходует.
+
+        :return
+        (int): 0, если сообщение принято, иначе retry_after в секундах.
+        """
+
+        with self.lock:
+            chatBucket = self.chatBuckets.setdefault(chatId, TokenBucket(self.chatRate, self.chatBurst))
+            waits = [chatBucket.reserve(), self.globalBucket.reserve()]
+            # Запросы приходят с сетевым разбросом времени, поэтому небольшое опережение графика допускается
+            if max(waits) > self.tolerance:
+                chatBucket.tokens += 1
+                self.globalBucket.tokens += 1
+                self.rejected += 1
+                return max(1, math.ceil(max(waits)))
+            self.sent += 1
+            self.nextMessageId += 1
+            return 0
+
+
+class FakeBotApiHandler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        method = self.path.rsplit("/", 1)[-1]
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0))).decode()
+        if self.headers.get("Content-Type", "").startswith("application/json"):
+            params = json.loads(body or "{}")
+        else:
+            params = {key: values[0] for key, values in parse_qs(body).items()}
+
+        if method == "getMe":
+            self.reply({"ok": True, "result": {"id": 1, "is_bot": True, "first_name": "Fake", "username": "fake_bot"}})
+        elif method == "sendMessage":
+            chatId = int(params["chat_id"])
+            retryAfter = self.server.admit(chatId)
+            if retryAfter:
+                self.reply({"ok": False, "error_code": 429,
+                            "description": f"Too Many Requests: retry after {retryAfter}",
+                            "parameters": {"retry_after": retryAfter}}, status=429)
+            else:
+                if self.server.verbose:
+                    print(f"[{chatId}] {params.get('text', '')}", flush=True)
+                self.reply({"ok": True, "result": {"message_id": self.server.nextMessageId, "date": int(time.time()),
+                                                   "chat": {"id": chatId, "type": "private"},
+                                                   "text": params.get("text", "")}})
+        else:
+            # setWebhook, answerCallbackQuery, editMessageText и прочие методы просто подтверждаются
+            if self.server.verbose:
+                print(f"{method} {params}", flush=True)
+            self.reply({"ok": True, "result": True})
+
+    do_GET = do_POST
+
+    def reply(self, payload, status=200):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+async def demo(server, chats, parts, useQueue):
+    # telegram импортируется здесь, чтобы сервер-заглушку можно было запускать и без python-telegram-bot
+    from telegram import Bot
+    from telegram.error import RetryAfter
+    from telegram.request import HTTPXRequest
+
+    server.sent = server.rejected = 0
+    queue = SendQueue(globalRate=server.globalBucket.rate, chatRate=server.chatRate, chatBurst=server.chatBurst)
+    failed = 0
+    firstPartTimes = []
+    started = time.perf_counter()
+
+    # Заглушка на http.server понимает только HTTP/1.1 (по умолчанию PTB использует HTTP/2)
+    request = HTTPXRequest(connection_pool_size=64, http_version="1.1")
+    async with Bot("123:fake", base_url=f"http://127.0.0.1:{server.port}/bot", request=request) as bot:
+        async def answer(chatId):
+            nonlocal failed
+            for index in range(parts):
+                send = (lambda text=f"Часть {index + 1}": bot.send_message(chatId, text))
+                try:
+                    if useQueue:
+                        await queue.send(chatId, send, INTERACTIVE if index == 0 else BULK)
+                    else:
+                        await send()
+                except RetryAfter:
+                    failed += 1
+                if index == 0:
+                    firstPartTimes.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(answer(chatId) for chatId in range(1, chats + 1)))
+        await queue.stop()
+
+    elapsed = time.perf_counter() - started
+    firstPartTimes.sort()
+    print(f"{'очередь' if useQueue else 'без очереди'}: отправлено {server.sent}, потеряно {failed}, "
+          f"ответов 429 {server.rejected}, повторов {queue.retries}, время {elapsed:.1f} с, первая часть: "
+          f"p50 {firstPartTimes[len(firstPartTimes) // 2]:.2f} с, max {firstPartTimes[-1]:.2f} с")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Локальная заглушка Bot API с лимитами отправки Telegram.")
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--global-rate", type=float, default=30.0)
+    parser.add_argument("--chat-rate", type=float, default=1.0)
+    parser.add_argument("--chat-burst", type=float, default=3.0)
+    parser.add_argument("--demo", type=int, default=0, metavar="CHATS",
+                        help="не запускать сервер, а отправить ответы из N частей в CHATS чатов с очередью и без")
+    parser.add_argument("--parts", type=int, default=12)
+    parser.add_argument("--verbose", action="store_true", help="печатать каждое принятое сообщение")
+    args = parser.parse_args()
+
+    server = FakeBotApi(port=0 if args.demo else args.port, globalRate=args.global_rate,
+                        chatRate=args.chat_rate, chatBurst=args.chat_burst, verbose=args.verbose)
+    if not args.demo:
+        print(f"Заглушка Bot API: http://127.0.0.1:{server.port}/bot<token>/")
+        server.serve_forever()
+        return
+
+    # Повторы после 429 считаются в итоговой строке, предупреждения о каждом из них не нужны
+    logging.getLogger("sendQueue").setLevel(logging.ERROR)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    asyncio.run(demo(server, args.demo, args.parts, useQueue=False))
+    # Перед вторым прогоном ведра заглушки должны наполниться заново
+    time.sleep(args.chat_burst / args.chat_rate + 1)
+    asyncio.run(demo(server, args.demo, args.parts, useQueue=True))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
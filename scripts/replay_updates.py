@@ -0,0 +1,96 @@
+import argparse
+import json
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+
+def sample_update(update_id, chat_id, text):
+    # Минимальное обновление с текстовым сообщением в личном чате
+    update = {"update_id": update_id,
+              "message": {"message_id": update_id, "date": int(time.time()), "text": text,
+                          "chat": {"id": chat_id, "type": "private"},
+                          "from": {"id": chat_id, "is_bot": False, "first_name": f"User{chat_id}"}}}
+    if text.startswith("/"):
+        # Команду обработчики узнают по сущности bot_command, а не по тексту
+        update["message"]["entities"] = [{"type": "bot_command", "offset": 0, "length": len(text.split()[0])}]
+    return update
+
+
+def load_updates(path):
+    """
+    Обновления читаются из JSON-файла (один объект или массив) или из JSONL (по объекту в строке).
+    """
+
+    text = Path(path).read_text(encoding="utf-8").strip()
+    if text.startswith("["):
+        return json.loads(text)
+    try:
+        return [json.loads(text)]
+    except json.JSONDecodeError:
+        return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def post(url, secret, update):
+    request = urllib.request.Request(url, data=json.dumps(update).encode("utf-8"), method="POST",
+                                     headers={"Content-Type": "application/json"})
+    request.add_header("X-Telegram-Bot-Api-Secret-Token", secret)
+    started = time.perf_counter()
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            status = response.status
+    except urllib.error.HTTPError as error:
+        status = error.code
+    return status, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Отправка записанных обновлений Telegram на локальный webhook.")
+    parser.add_argument("updates", nargs="?", help="JSON или JSONL с обновлениями (Update)")
+    parser.add_argument("--url", default="http://127.0.0.1:8443/telegram")
+    parser.add_argument("--secret", required=True, help="значение WEBHOOK_SECRET")
+    parser.add_argument("--sample", nargs="*", default=None, metavar="TEXT",
+                        help="вместо файла отправить текстовые сообщения с этими запросами")
+    parser.add_argument("--chats", type=int, default=1, help="в сколько чатов отправить каждое обновление")
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    if args.sample is not None:
+        templates = [sample_update(0, 0, text) for text in args.sample]
+    elif args.updates:
+        templates = load_updates(args.updates)
+    else:
+        parser.error("нужен файл с обновлениями или --sample")
+
+    # Каждая копия получает свой update_id и свой чат, чтобы обновления не считались повторами
+    updates = []
+    for chat_id in range(1, args.chats + 1):
+        for template in templates:
+            update = json.loads(json.dumps(template))
+            update["update_id"] = len(updates) + 1
+            message = update.get("message")
+            if message is not None and args.chats > 1:
+                message["chat"]["id"] = chat_id
+                sender = message.setdefault("from", {"is_bot": False, "first_name": f"User{chat_id}"})
+                sender["id"] = chat_id
+            updates.append(update)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(args.concurrency) as pool:
+        results = list(pool.map(lambda update: post(args.url, args.secret, update), updates))
+    elapsed = time.perf_counter() - started
+
+    statuses = {}
+    for status, _ in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    latencies = sorted(latency for _, latency in results)
+    print(f"Отправлено обновлений: {len(updates)} за {elapsed:.2f} с, статусы: {statuses}, "
+          f"p50 {latencies[len(latencies) // 2] * 1000:.1f} мс, max {latencies[-1] * 1000:.1f} мс")
+    return 0 if set(statuses) == {200} else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
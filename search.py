@@ -1,29 +1,233 @@
 from personaParser import PersonaParcer
 from structureParser import StructureParser
 from numParser import NumParser
+from departmentStore import DepartmentStore
+from crossIndex import CrossIndex, COORDINATES
+from prefixIndex import PrefixIndex, normalizeKey
 from Levenshtein import distance
+from workbookLoader import loadWorkbook, peakMemoryMb, PERSONA_SHEET, STRUCTURE_SHEET
+from snapshot import workbookHash, loadSnapshot, saveSnapshot
+from lruCache import LRUCache
+from metrics import searchTiers, timed
+from collections import namedtuple
+import logging
+import threading
 import time
 
 
+logger = logging.getLogger(__name__)
+
+# Неизменяемый набор данных поиска: версия (хэш книги), три парсера с индексами, индекс связей персон с
+# подразделениями и общий префиксный индекс нормализованных ключей. При перезагрузке книги строится новый набор и
+# подменяется одной операцией присваивания, поэтому уже начатые поиски дорабатывают на старом наборе.
+FinderState = namedtuple("FinderState", ["version", "personaParser", "structureParser", "numParser", "crossIndex",
+                                         "prefixIndex"])
+
+# Уровень префиксного поиска отвечает, только если ключей с таким началом не больше, чем вариантов в ответе
+PREFIX_TIER_LIMIT = 3
+
+# Заголовки ответов asker, в которых найдено несколько ключей и пользователь выбирает один из них
+CHOICE_HEADERS = ("Точного совпадения нет.. Ближайшие результаты:", "Найдено несколько точных совпадений:",
+                  "Точного совпадения нет.. Строки, которые начинаются с запроса:")
+
+# Изменения книги применяются к готовым индексам, только если изменилось не больше DELTA_LIMIT строк (и удаленные
+# строки, оставшиеся в хранилище, не превысили этой доли). Иначе полный разбор быстрее и не оставляет мусора в
+# индексах.
+DELTA_LIMIT = 0.2
+
+
 class Finder:
-    def __init__(self, filepath):
+    def __init__(self, filepath, snapshotPath: str = None, cacheSize: int = 1024, cacheTtl: float = 600.0):
+        self.filepath = filepath
+        self.snapshotPath = snapshotPath or filepath + ".snapshot"
+
+        # Метрики перезагрузки данных
+        self.reloadCount = 0
+        self.lastLoadStats = {}
+        self.lastReloadTime = None
+        self.lastReloadDuration = None
+        self.__reloadLock = threading.Lock()
+
+        self.__state = self.__load(workbookHash(filepath))
+
+        # Кэш ответов search по нормализованному запросу. Он привязан к версии данных (хэшу книги) и очищается,
+        # как только версия меняется.
+        self.cache = LRUCache(cacheSize, cacheTtl)
+        # Кэш подсказок по началу запроса (inline-режим): при наборе запроса одни и те же префиксы приходят от многих
+        # пользователей
+        self.suggestCache = LRUCache(cacheSize, cacheTtl)
+        self.__cacheVersion = self.dataVersion
+
+    @property
+    def dataVersion(self) -> bytes:
+        return self.__state.version
+
+    @property
+    def state(self) -> FinderState:
+        return self.__state
+
+    def __load(self, version: bytes, base: tuple = None) -> FinderState:
+        """
+        Данная функция предназначена для построения набора данных поиска: из снимка, если он построен по этой же
+        книге, либо по книге с последующим сохранением снимка. Если есть данные прошлой версии книги (текущий набор
+        или снимок прошлой версии), то к ним применяются только изменившиеся строки, иначе книга разбирается
+        полностью.
+
+        :param
+        version (bytes): хэш содержимого книги.
+        base (tuple): данные прошлой версии книги (парсеры и индексы, как в снимке).
+
+        :return
+        (FinderState): готовый к поиску набор данных.
+        """
+
         start = time.time()
-        print("Начата подготовка базы данных..")
+        logger.info("Начата подготовка базы данных..")
+
+        # Если есть снимок, построенный по этой же книге, то берем парсеры (вместе с индексами) из него.
+        data = loadSnapshot(self.snapshotPath, version)
+        if data is not None:
+            self.lastLoadStats = {"source": "snapshot", "read": time.time() - start, "build": 0.0}
+            logger.info(f"Подготовка окончена! Данные загружены из снимка {self.snapshotPath} за "
+                        f"{round(time.time() - start, 3)} с.")
+            return FinderState(version, *data)
+
+        # Книга читается один раз (read_only, values_only), после чего одни и те же строки раздаются всем парсерам.
+        sheets = loadWorkbook(self.filepath)
+        loadTime = time.time() - start
+
+        if base is None:
+            base = loadSnapshot(self.snapshotPath, None)
+        update = self.__applyDelta(base, sheets) if base is not None else None
+        if update is not None:
+            data, delta = update
+            added, updated, deleted = (sum(counts) for counts in zip(*(part.counts() for part in delta)))
+            buildTime = time.time() - start - loadTime
+            self.lastLoadStats = {"source": "delta", "read": loadTime, "build": buildTime,
+                                  "rows": sum(len(part) for part in delta)}
+            logger.info(f"Подготовка окончена! Изменено строк книги: {self.lastLoadStats['rows']} (добавлено: {added}, "
+                        f"изменено: {updated}, удалено: {deleted}), индексы обновлены за {round(buildTime, 3)} с. "
+                        f"(чтение книги: {round(loadTime, 2)} с.)")
+        else:
+            data = self.__build(sheets)
+            self.lastLoadStats = {"source": "workbook", "read": loadTime, "build": time.time() - start - loadTime}
+            logger.info(f"Подготовка окончена! Время обработки составило: {round(time.time() - start, 2)} с. "
+                        f"(чтение книги: {round(loadTime, 2)} с., пиковая память: {round(peakMemoryMb(), 1)} МБ)")
+        del sheets
 
-        self.filepath = filepath
-        self.__personaParser = PersonaParcer(filepath)
-        self.__structureParser = StructureParser(filepath)
-        self.__numParser = NumParser(filepath)
+        # Если снимок сохранить не удалось, saveSnapshot сам пишет об этом в лог
+        saveSnapshot(self.snapshotPath, version, data)
+
+        return FinderState(version, *data)
 
-        print(f"Подготовка окончена! Время обработки составило: {round(time.time() - start, 2)} с.")
+    def __build(self, sheets: dict) -> tuple:
+        """
+        Данная функция предназначена для полного разбора прочитанной книги.
+
+        :param
+        sheets (dict): строки листов (см. loadWorkbook).
 
-    def classifier(self, line: str) -> list:
+        :return
+        (tuple): парсеры и индексы в порядке полей FinderState (без версии).
+        """
+
+        # Строки "Оргструктуры" хранятся один раз в общем хранилище с индексами по наименованию и по шифру
+        departmentStore = DepartmentStore(sheets[STRUCTURE_SHEET])
+        parsers = (PersonaParcer(self.filepath, rows=sheets[PERSONA_SHEET]),
+                   StructureParser(self.filepath, store=departmentStore),
+                   NumParser(self.filepath, store=departmentStore))
+        # Колонка руководителя подразделения в хранилище не входит, поэтому связи строятся, пока строки листа в памяти
+        return parsers + (CrossIndex.build(parsers[0], parsers[1], sheets[STRUCTURE_SHEET]),
+                          PrefixIndex((("persona", parsers[0].personaDict), ("structure", parsers[1].structureDict),
+                                       ("num", parsers[2].numDict))))
+
+    @staticmethod
+    def __applyDelta(base: tuple, sheets: dict):
+        """
+        Данная функция предназначена для обновления данных прошлой версии книги по изменившимся строкам. Строки
+        сравниваются по отпечаткам; совпавшие строки не разбираются заново, а поисковые индексы получают только
+        добавленные и удаленные ключи. Данные прошлой версии не меняются.
+
+        :param
+        base (tuple): парсеры и индексы прошлой версии (как в снимке).
+        sheets (dict): строки листов новой версии (см. loadWorkbook).
+
+        :return
+        (tuple): новые данные и изменения листов (RowDelta "Полномочий" и "Оргструктуры"), либо None, если изменений
+        слишком много и книгу выгоднее разобрать полностью.
+        """
+
+        personaParser, structureParser, numParser, crossIndex, prefixIndex = base
+        personaDelta = personaParser.delta(sheets[PERSONA_SHEET])
+        storeDelta = structureParser.store.delta(sheets[STRUCTURE_SHEET])
+
+        rowCount = len(personaDelta.rows) + len(storeDelta.rows)
+        deadRows = structureParser.store.deadRows() + len(storeDelta.deleted)
+        if len(personaDelta) + len(storeDelta) > rowCount * DELTA_LIMIT or deadRows > rowCount * DELTA_LIMIT:
+            return None
+
+        parsers = (personaParser.applyDelta(personaDelta) if personaDelta else personaParser,)
+        if storeDelta:
+            store = structureParser.store.applyDelta(storeDelta)
+            parsers += (structureParser.applyDelta(store), numParser.applyDelta(store))
+        else:
+            parsers += (structureParser, numParser)
+
+        if personaDelta or storeDelta:
+            # Связи зависят и от ключей, и от содержимого ячеек обоих листов, поэтому собираются заново (без разбора
+            # строк и без поисковых индексов)
+            crossIndex = CrossIndex.build(parsers[0], parsers[1], sheets[STRUCTURE_SHEET])
+
+            added, removed = [], []
+            for kind, old, new in (("persona", personaParser.personaDict, parsers[0].personaDict),
+                                   ("structure", structureParser.structureDict, parsers[1].structureDict),
+                                   ("num", numParser.numDict, parsers[2].numDict)):
+                added.extend((kind, key) for key in new if key not in old)
+                removed.extend((kind, key) for key in old if key not in new)
+            prefixIndex = prefixIndex.updated(added, removed)
+
+        return parsers + (crossIndex, prefixIndex), (personaDelta, storeDelta)
+
+    def reload(self, force: bool = False) -> bool:
+        """
+        Данная функция предназначена для перезагрузки данных из книги без перезапуска бота. Новые индексы строятся
+        в вызывающем потоке, а затем атомарно подменяют старые; поиски, начатые до подмены, завершаются на старых
+        данных. Если содержимое книги не изменилось (совпал хэш), то ничего не перестраивается.
+
+        :param
+        force (bool): перестроить данные, даже если хэш книги не изменился.
+
+        :return
+        (bool): True, если данные были перезагружены.
+        """
+
+        with self.__reloadLock:
+            start = time.time()
+            version = workbookHash(self.filepath)
+            if version == self.__state.version and not force:
+                return False
+
+            self.__state = self.__load(version, tuple(self.__state[1:]))
+
+            self.reloadCount += 1
+            self.lastReloadTime = time.time()
+            self.lastReloadDuration = self.lastReloadTime - start
+            # О самой перезагрузке сообщает вызывающий код (DataWatcher), здесь пишем только детали построения
+            return True
+
+    @staticmethod
+    def looksLikeCode(line: str) -> bool:
+        return "Без кода" in line or sum(c.isdigit() or c == '.' for c in line) / len(line) >= 0.5
+
+    def classifier(self, line: str, state: FinderState = None, scored: bool = False) -> list:
         """
         Данная функция предназначена для распределения запроса по типу (персона, структур, шифр, вхождение в другую
         строку и unclassified), и возвращению ближайших результатов согласно типу запроса.
 
         :param
         line (str): входная строка, которую мы будем классифицировать.
+        state (FinderState): набор данных, по которому идет поиск (по умолчанию - текущий).
+        scored (bool): если True, то вместо ключей возвращаются пары (ключ, расстояние Левенштейна до line).
 
         :return
         (list):
@@ -35,23 +239,29 @@ class Finder:
         ["unclassified"]
         """
 
+        state = state or self.__state
+
         # Первая проверка на то, является ли данная строка шифром, если это так, тогда она состоит из точек и цифр (
         # в целом, она должна состоять на 100 процентов, но допускаем ошибки, поэтому пусть больше половины будут
         # точками или цифрами). Либо допускается вариант, когда line начинается со слов "Без кода".
 
-        if "Без кода" in line or sum(c.isdigit() or c == '.' for c in line) / len(line) >= 0.5:
-            numFind = self.__numParser.find(line)
-            return ["num"] + numFind
+        if self.looksLikeCode(line):
+            with timed("find_num"):
+                numFind = state.numParser.findScored(line)
+            return ["num"] + (numFind if scored else [num for num, _ in numFind])
 
         # В ином случае, мы работаем со структурой, или персоной по названию.
         else:
             # Формируем поиск по множества персон и структур, после чего находим ближайшие элементы из каждого.
-            personaFind = self.__personaParser.find(line)
-            structureFind = self.__structureParser.find(line)
+            with timed("find_persona"):
+                personaFind = state.personaParser.findScored(line)
+            with timed("find_structure"):
+                structureFind = state.structureParser.findScored(line)
 
             # Теперь проверим, кто оказался ближе всего к line. Сверяться будем по 0 элементу, так как у него
-            # наименьшее расстояние в силу алгоритма find (там сортировка результатов по кратчайшему расстоянию).
-            personaMinDistance, structureMinDistance = distance(personaFind[0], line), distance(structureFind[0], line)
+            # наименьшее расстояние в силу алгоритма find (результаты упорядочены по кратчайшему расстоянию).
+            # Расстояния find уже посчитал, повторно их не вычисляем.
+            personaMinDistance, structureMinDistance = personaFind[0][1], structureFind[0][1]
 
             # Если расстояние слишком большое (больше половины строки) до ближайших элементов, то делаем
             # дополнительную проверку: Если количество слов в строке равно одному, то проверяем, является ли строка
@@ -59,47 +269,112 @@ class Finder:
             # Если в строке больше одного слова, то проверяем на вхождение в какую-либо строку в базе знаний.
 
             if min(personaMinDistance, structureMinDistance) >= len(line) // 2:
-                # В строке одно слово => проверяем на вхождение в список фамилий.
-                if len(line.split()) == 1:
-                    family_dict = dict()
-                    for persona in self.__personaParser.personaDict.keys():
-                        # Проверяем, входит ли line в фамилию
-                        if line.lower() in persona.split()[0].lower():
-                            return ["substring", self.__personaParser.show(persona), 'persona']
-
-                    # Если не нашли фамилию, то unclassified
+                with timed("substring"):
+                    # Вхождения ищутся по заранее построенным суффиксным массивам (без перебора всех ключей), а при
+                    # нескольких вхождениях всегда берется первое в порядке строк книги.
+
+                    # В строке одно слово => проверяем на вхождение в список фамилий.
+                    if len(line.split()) == 1:
+                        persona = state.personaParser.findSurname(line)
+                        if persona is not None:
+                            return ["substring", state.personaParser.show(persona), 'persona']
+
+                        # Если не нашли фамилию, то unclassified
+                        return ["unclassified"]
+
+                    # Запустим проверку на вхождение в список персон
+                    persona = state.personaParser.findSubstring(line)
+                    if persona is not None:
+                        return ["substring", state.personaParser.show(persona), 'persona']
+
+                    # Запустим проверку на вхождение в список структур
+                    structure = state.structureParser.findSubstring(line)
+                    if structure is not None:
+                        return ["substring", state.structureParser.show(structure), 'structure']
+
+                    # Запустим проверку на вхождение в список шифров
+                    num = state.numParser.findSubstring(line)
+                    if num is not None:
+                        return ["substring", state.numParser.show(num), 'num']
+
+                    # Если вхождений нет
                     return ["unclassified"]
 
-                # Запустим проверку на вхождение в список персон
-                for persona in self.__personaParser.personaSet:
-                    if line.lower() in persona.lower():
-                        return ["substring", self.__personaParser.show(persona), 'persona']
+            if personaMinDistance < structureMinDistance:
+                return ["persona"] + (personaFind if scored else [persona for persona, _ in personaFind])
+            return ["structure"] + (structureFind if scored else [structure for structure, _ in structureFind])
 
-                # Запустим проверку на вхождение в список структур
-                for structure in self.__structureParser.structureSet:
-                    if line.lower() in structure.lower():
-                        return ["substring", self.__structureParser.show(structure), 'structure']
+    def lookup(self, line: str, state: FinderState = None, scored: bool = False):
+        """
+        Данная функция предназначена для поиска по уровням от дешевых к дорогим; первый уровень, давший ответ,
+        завершает поиск:
+        1) raw - ключ совпадает с запросом (обращение к словарю);
+        2) normalized - совпадение без учета регистра, "ё"/"е", кавычек и лишних пробелов (в шифре - пробелов вокруг
+        точек);
+        3) prefix - запрос является началом (по целым словам) не более чем PREFIX_TIER_LIMIT ключей одного вида; для
+        шифра - ветвью дерева шифров (01.111 - начало 01.111.03, но не 01.1110);
+        4) fuzzy и 5) substring - полный классификатор (ближайшие по расстоянию Левенштейна, затем вхождение).
+
+        Шифр ищется только среди шифров, как и в классификаторе. При совпадении наименования подразделения и ФИО
+        предпочтение отдается подразделению (как при равных расстояниях в классификаторе).
 
-                # Запустим проверку на вхождение в список шифров
-                for num in self.__numParser.numSet:
-                    if line.lower() in num.lower():
-                        return ["substring", self.__numParser.show(num), 'num']
+        :param
+        line (str): запрос без лишних пробелов.
+        state (FinderState): набор данных (по умолчанию - текущий).
+        scored (bool): если True, то вместо ключей возвращаются пары (ключ, расстояние Левенштейна до line).
 
-                # Если вхождений нет
-                return ["unclassified"]
+        :return
+        (tuple): уровень ("raw", "normalized", "prefix", "fuzzy", "substring" или "unclassified") и данные в формате
+        classifier.
+        """
 
-            return ["persona"] + personaFind if personaMinDistance < structureMinDistance else ["structure"] + structureFind
+        state = state or self.__state
+        kinds = ("num",) if self.looksLikeCode(line) else ("structure", "persona")
 
-    def asker(self, data: list) -> list:
+        keysByKind = {"persona": state.personaParser.personaDict, "structure": state.structureParser.structureDict,
+                      "num": state.numParser.numDict}
+        for kind in kinds:
+            if line in keysByKind[kind]:
+                return "raw", [kind, (line, 0) if scored else line]
+
+        tiers = (("normalized", state.prefixIndex.exact(line)),)
+        if kinds != ("num",):
+            # Отрезок ключей с таким началом находится двоичным поиском; если он длинный, запрос слишком общий
+            if state.prefixIndex.countStartingWith(line) <= PREFIX_TIER_LIMIT * 4:
+                tiers += (("prefix", state.prefixIndex.startingWith(line, PREFIX_TIER_LIMIT + 1, wholeWords=True)),)
+        else:
+            # Дерево шифров сравнивает сегменты без пробелов вокруг них: "01. 111" - тот же шифр, что и "01.111"
+            code = state.numParser.numTrie.get(line)
+            if code is not None:
+                tiers = (("normalized", [("num", code)]),)
+            # Обход ветви останавливается на PREFIX_TIER_LIMIT + 1 шифрах: большая ветвь - слишком общий запрос
+            branch = state.numParser.findUnder(line.rstrip(". "), PREFIX_TIER_LIMIT + 1)
+            tiers += (("prefix", [("num", key) for key in branch]),)
+
+        for tier, entries in tiers:
+            for kind in kinds:
+                keys = [key for entryKind, key in entries if entryKind == kind]
+                if keys and len(keys) <= PREFIX_TIER_LIMIT:
+                    return tier, [kind] + ([(key, distance(line, key)) for key in keys] if scored else keys)
+
+        data = self.classifier(line, state, scored)
+        return (data[0] if data[0] in ("substring", "unclassified") else "fuzzy"), data
+
+    def asker(self, data: list, state: FinderState = None, tier: str = None) -> list:
         """
         Данная функция предназначена для формирования ответа по обработанному запросу.
         :param
         data (list): список с классом, и лучшим / лучшими результатами.
+        state (FinderState): набор данных, по которому шел поиск (по умолчанию - текущий).
+        tier (str): уровень lookup, давший ответ. Ключ с уровня normalized - тоже точное совпадение (отличается от
+        запроса только регистром, "ё"/"е", кавычками или пробелами), а ответ уровня prefix - начало строки.
 
         :return:
         Подготовленные данные к выводу.
         """
 
+        state = state or self.__state
+
         # Проверка на то, что вопрос не найден
         if data[0] == "unclassified":
             return ["Данные не найдены!"]
@@ -109,39 +384,270 @@ class Finder:
             data[0] = "Точного совпадения нет.. но найдено вхождение в строку!"
             return data
 
-        if len(data) == 2:  # Значит нашли точное совпадение!
+        if tier == "prefix":  # Запрос - начало одной или нескольких строк (по целым словам)
+            result = ["Точного совпадения нет.. но запрос совпадает с началом строки!" if len(data) == 2
+                      else CHOICE_HEADERS[2]]
+        elif len(data) == 2:  # Значит нашли точное совпадение!
             result = ["Найдено точное совпадение!"]
+        elif tier == "normalized":  # Несколько ключей, отличающихся от запроса только регистром и т.п.
+            result = [CHOICE_HEADERS[1]]
         else:  # Значит точного совпадения нет => есть три ближайших результата! len(data) == 4
-            result = ["Точного совпадения нет.. Ближайшие результаты:"]
+            result = [CHOICE_HEADERS[0]]
 
         if data[0] == "persona":
             for persona in data[1:]:
-                result.append(self.__personaParser.show(persona))
+                result.append(state.personaParser.show(persona))
 
         elif data[0] == "structure":
             for struct in data[1:]:
-                result.append(self.__structureParser.show(struct))
+                result.append(state.structureParser.show(struct))
 
         elif data[0] == "num":
             for num in data[1:]:
-                result.append(self.__numParser.show(num))
+                result.append(state.numParser.show(num))
 
         return result
 
+    def rank(self, targetLine: str) -> dict:
+        """
+        Данная функция предназначена для пакетной проверки: вместо готового к выводу ответа возвращает тип
+        совпадения и ближайших кандидатов вместе с расстояниями. Кэш ответов не используется.
+
+        :param
+        targetLine (str): поисковый запрос.
+
+        :return
+        (dict): {"query": запрос, "type": "exact" / "prefix" / "fuzzy" / "substring" / "unclassified",
+        "kind": "persona" / "structure" / "num" / None, "candidates": [[ключ, расстояние], ...],
+        "tier": уровень поиска, давший ответ (см. lookup)}.
+        "exact" - ключи с уровней raw и normalized, "prefix" - ключи, началом которых является запрос. Расстояние
+        Левенштейна до запроса указывается для каждого кандидата, в том числе для вхождения в строку.
+        """
+
+        query = " ".join(targetLine.split())
+        result = {"query": query, "type": "unclassified", "kind": None, "candidates": [], "tier": "unclassified"}
+        if not query:
+            return result
+
+        result["tier"], data = self.lookup(query, scored=True)
+        if data[0] == "substring":
+            key = data[1][0]
+            result.update(type="substring", kind=data[2], candidates=[[key, distance(query, key)]])
+        elif data[0] != "unclassified":
+            if result["tier"] in ("raw", "normalized") or (len(data) == 2 and data[1][1] == 0):
+                matchType = "exact"
+            elif result["tier"] == "prefix":
+                matchType = "prefix"
+            else:
+                matchType = "fuzzy"
+            result.update(type=matchType, kind=data[0], candidates=[[key, dist] for key, dist in data[1:]])
+
+        return result
+
+    def prefetch(self, queries: list) -> None:
+        """
+        Данная функция предназначена для пакетной проверки: ближайшие персоны для всех запросов пачки считаются одной
+        матрицей расстояний (ScoringEngine), и следующие вызовы rank для этих запросов берут готовый результат.
+        Без NumPy ничего не делает.
+
+        :param
+        queries (list): запросы пачки (в том виде, в котором они будут переданы в rank).
+        """
+
+        lines = (" ".join(query.split()) for query in queries)
+        personaLines = [line for line in lines if line and not self.looksLikeCode(line)]
+        self.__state.personaParser.personaIndex.prefetch(personaLines)
+
+    def resolveDepartment(self, targetLine: str, state: FinderState = None):
+        """
+        Данная функция предназначена для определения подразделения по запросу: по наименованию или по шифру, в том
+        числе с опечатками.
+
+        :param
+        targetLine (str): наименование или шифр подразделения.
+        state (FinderState): набор данных (по умолчанию - текущий).
+
+        :return
+        Наименование подразделения, либо None, если ничего похожего нет.
+        """
+
+        state = state or self.__state
+        line = " ".join(targetLine.split())
+        if not line:
+            return None
+
+        if self.looksLikeCode(line):
+            parser = state.numParser
+        else:
+            parser = state.structureParser
+        key, keyDistance = parser.findScored(line)[0]
+        if keyDistance >= max(len(line) // 2, 1):
+            return None
+
+        if parser is state.numParser:
+            # По шифру находим строку книги и берем из нее наименование подразделения
+            return state.numParser.store.value(state.numParser.numDict[key][0], 0)
+        return key
+
+    def subunits(self, targetLine: str):
+        """
+        Данная функция предназначена для поиска всех подразделений, вложенных в подразделение из запроса.
+
+        :param
+        targetLine (str): наименование или шифр подразделения.
+
+        :return
+        (tuple): наименование подразделения и список пар (вложенное подразделение, уровень вложенности), либо
+        (None, []), если подразделение не найдено.
+        """
+
+        state = self.__state
+        name = self.resolveDepartment(targetLine, state)
+        if name is None:
+            return None, []
+        return name, state.structureParser.orgGraph.subunits(name)
+
+    def pathToRoot(self, targetLine: str):
+        """
+        Данная функция предназначена для поиска цепочки вышестоящих подразделений для подразделения из запроса.
+
+        :param
+        targetLine (str): наименование или шифр подразделения.
+
+        :return
+        (tuple): наименование подразделения и список наименований от него до подразделения верхнего уровня, либо
+        (None, []), если подразделение не найдено.
+        """
+
+        state = self.__state
+        name = self.resolveDepartment(targetLine, state)
+        if name is None:
+            return None, []
+        return name, state.structureParser.orgGraph.pathToRoot(name)
+
+    def show(self, kind: str, name: str, state: FinderState = None):
+        """
+        Данная функция предназначена для получения данных по известному ключу без поиска.
+
+        :param
+        kind (str): 'persona', 'structure' или 'num'.
+        name (str): ключ (ФИО, наименование подразделения или шифр).
+        state (FinderState): набор данных (по умолчанию - текущий).
+
+        :return
+        (list): ключ и записи (как в show парсеров), либо None, если такого ключа нет (например, после перезагрузки
+        данных).
+        """
+
+        state = state or self.__state
+        parser, keys = {
+            "persona": (state.personaParser, state.personaParser.personaDict),
+            "structure": (state.structureParser, state.structureParser.structureDict),
+            "num": (state.numParser, state.numParser.numDict),
+        }[kind]
+        return parser.show(name) if name in keys else None
+
+    def links(self, kind: str, name: str) -> list:
+        """
+        Данная функция предназначена для получения связанных объектов: подразделений, которыми руководит или которые
+        координирует персона, либо руководителей и координаторов подразделения.
+
+        :param
+        kind (str): 'persona' или 'structure'.
+        name (str): ФИО или наименование подразделения.
+
+        :return
+        (list): тройки (подпись, вид связанного объекта, ключ связанного объекта); каждый объект - один раз.
+        """
+
+        crossIndex = self.__state.crossIndex
+        if kind == "persona":
+            pairs, targetKind = crossIndex.unitsOf(name), "structure"
+            labels = ("Координирует", "Руководит")
+        else:
+            pairs, targetKind = crossIndex.peopleOf(name), "persona"
+            labels = ("Координатор", "Руководитель")
+
+        result, seen = [], set()
+        # Сначала руководство, затем координация
+        for target, role in sorted(pairs, key=lambda pair: pair[1] == COORDINATES):
+            if target not in seen:
+                seen.add(target)
+                result.append((f"{labels[role != COORDINATES]}: {target}", targetKind, target))
+        return result
+
+    def __syncCaches(self, state: FinderState) -> None:
+        # Данные поменялись - старые ответы больше не действительны. Очищает кэши только поиск на актуальных данных,
+        # запоздавшие поиски на старом наборе данных кэши не трогают и свои ответы в них не кладут.
+        if self.__cacheVersion != state.version and state is self.__state:
+            self.cache.clear()
+            self.suggestCache.clear()
+            self.__cacheVersion = state.version
+
+    def suggest(self, prefix: str, limit: int = 10) -> list:
+        """
+        Данная функция предназначена для подсказок при наборе запроса: ключи (ФИО, подразделения, шифры), которые
+        начинаются с prefix без учета регистра, "ё"/"е", кавычек и лишних пробелов. Ответ по каждому префиксу
+        кэшируется.
+
+        :param
+        prefix (str): набранное начало запроса.
+        limit (int): сколько подсказок вернуть не больше.
+
+        :return
+        (list): пары (вид, ключ), где вид - 'persona', 'structure' или 'num' (как в show).
+        """
+
+        normalized = normalizeKey(prefix)
+        if not normalized:
+            return []
+
+        state = self.__state
+        self.__syncCaches(state)
+        suggestions = self.suggestCache.get((normalized, limit))
+        if suggestions is None:
+            with timed("suggest"):
+                suggestions = state.prefixIndex.startingWith(normalized, limit)
+            if self.__cacheVersion == state.version:
+                self.suggestCache.put((normalized, limit), suggestions)
+        return suggestions
+
     def search(self, targetLine: str) -> list:
         """
         Данный поиск позволяет находить элемент, и выводить для него данные через общий интерфейс.
+        Повторные запросы (с точностью до лишних пробелов) отдаются из кэша.
         :param targetLine:
         :return:
         """
 
-        # Получаем класс запроса вместе с лучшим/лучшими результатами.
-        questionClass = self.classifier(targetLine)
-        answer = self.asker(questionClass)
-        return answer
+        query = " ".join(targetLine.split())
+        if not query:
+            return ["Данные не найдены!"]
+
+        # Весь запрос выполняется на одном наборе данных, даже если во время поиска произойдет перезагрузка.
+        state = self.__state
+
+        self.__syncCaches(state)
+
+        answer = self.cache.get(query)
+        if answer is None:
+            # Получаем класс запроса вместе с лучшим/лучшими результатами: дешевые уровни (точный ключ, нормализованный
+            # ключ, префикс) отвечают без нечеткого поиска
+            with timed("classifier"):
+                tier, questionClass = self.lookup(query, state)
+            with timed("asker"):
+                answer = self.asker(questionClass, state, tier)
+            if self.__cacheVersion == state.version:
+                self.cache.put(query, answer)
+        else:
+            tier = "cache"
+        searchTiers.inc(tier)
+
+        return list(answer)
 
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
     finder = Finder("Data.xlsx")
     testPersonaNotFullMatch, testStructureNotFullMatch, testNumNotFullMatch = "Агамвир1зфыян Ивфгорь Рубевнови4фч", 'секsadтор "Пр1иказы"', "a01.11b1a.03.0в1"
     testPersonaFullMatch, testStructureFullMatch, testNumFullMatch = "Агамирзян Игорь Рубенович", 'сектор "Приказы"', "01.111.03.01"
@@ -0,0 +1,166 @@
+import copy
+
+from bkTree import BKTree
+from fuzzy import topK
+from ngramIndex import NgramIndex
+from scoringEngine import ScoringEngine
+from substringIndex import SubstringIndex
+
+
+# Индекс перестраивается целиком, если удаленных (но оставшихся в структурах) и добавленных перебором ключей больше
+# OVERLAY_RATIO от всех ключей (и больше OVERLAY_MIN)
+OVERLAY_RATIO = 0.05
+OVERLAY_MIN = 256
+
+
+def overlayTooLarge(overlaySize: int, size: int) -> bool:
+    return overlaySize > max(OVERLAY_MIN, size * OVERLAY_RATIO)
+
+
+class SearchIndex:
+    """
+    Индекс для нечеткого поиска по ключам одного парсера. Объединяет три уровня:
+    1) точное совпадение по множеству ключей;
+    2) предварительный отбор кандидатов по триграммам с точным пересчетом расстояния Левенштейна только для них;
+    3) BK-дерево - точный поиск ближайших, если триграммы дали слишком мало кандидатов (или не используются).
+       Если включен флаг useEngine и доступен rapidfuzz, вместо BK-дерева запрос сравнивается со всеми ключами
+       одним вызовом ScoringEngine.
+    Дополнительно хранится суффиксный массив для поиска вхождения подстроки в ключи.
+
+    Триграммы выгодны на длинных ключах (названия подразделений): там BK-дерево отсекает мало ветвей. На коротких
+    ключах (ФИО, шифры) почти все ключи делят с запросом частые триграммы, и BK-дерево оказывается быстрее,
+    поэтому триграммный уровень включается флагом useGrams. На ФИО BK-дерево проверяет значительную часть ключей, и
+    полный перебор на C++ оказывается быстрее, поэтому для них включается useEngine.
+
+    При обновлении книги индекс не перестраивается (см. updated): новые ключи дописываются в BK-дерево и триграммы,
+    а удаленные остаются в структурах и отсеиваются по словарю позиций ключей. Позиции (номера ключей в порядке
+    книги) решают и порядок ключей на одинаковом расстоянии, поэтому ответ после обновления тот же, что и у индекса,
+    построенного заново.
+    """
+
+    def __init__(self, keys=(), useGrams: bool = False, candidateLimit: int = 50, useEngine: bool = False):
+        keys = list(keys)
+        self.candidateLimit = candidateLimit
+        self.useEngine = useEngine
+        # Ключ -> позиция в порядке книги; заодно множество действующих ключей
+        self.positions = {key: position for position, key in enumerate(keys)}
+        self.grams = NgramIndex(keys) if useGrams else None
+        self.tree = BKTree(keys)
+        self.engine = ScoringEngine(keys) if useEngine and ScoringEngine.available() else None
+        self.substrings = SubstringIndex(keys)
+        self.prefetched = {}
+
+    def nearest(self, targetLine: str, k: int = 3) -> list:
+        """
+        Данная функция предназначена для поиска k ближайших по расстоянию Левенштейна ключей.
+
+        :param
+        targetLine (str): входная строка, по которой производится поиск.
+        k (int): сколько ближайших ключей вернуть.
+
+        :return
+        (list): список пар (ключ, расстояние), отсортированный по возрастанию расстояния.
+        """
+
+        if targetLine in self.positions:
+            return [(targetLine, 0)]
+
+        # Большинство ключей не делят с запросом почти ни одной триграммы, поэтому расстояние считаем только для
+        # небольшого набора кандидатов. Если кандидатов мало, то переходим к точному поиску по BK-дереву.
+        if self.grams is not None:
+            candidates = self.grams.candidates(targetLine, self.candidateLimit, positions=self.positions)
+            if len(candidates) >= k:
+                return topK(targetLine, candidates, k, self.positions)
+
+        if self.engine is not None:
+            # Движок строится по ключам в порядке книги, и при равных расстояниях раньше идет ключ с меньшим номером
+            nearest = self.prefetched.get((targetLine, k))
+            return nearest if nearest is not None else self.engine.nearest(targetLine, k)
+        return self.tree.nearest(targetLine, k, self.positions)
+
+    def prefetch(self, queries: list, k: int = 3) -> None:
+        """
+        Данная функция предназначена для пакетного расчета ближайших ключей сразу для многих запросов (одна матрица
+        расстояний вместо отдельного вызова на каждый запрос). Результаты запоминаются до следующего вызова prefetch и
+        используются в nearest. Без NumPy (или без useEngine) ничего не делает.
+
+        :param
+        queries (list): запросы.
+        k (int): сколько ближайших ключей понадобится для каждого запроса.
+        """
+
+        if self.engine is None or not ScoringEngine.matrixAvailable():
+            return
+        queries = list(dict.fromkeys(query for query in queries if query not in self.positions))
+        self.prefetched = {(query, k): nearest for query, nearest in zip(queries, self.engine.nearestMany(queries, k))}
+
+    def within(self, targetLine: str, maxDistance: int) -> list:
+        """
+        Данная функция предназначена для поиска всех ключей на расстоянии не больше maxDistance (через BK-дерево).
+
+        :param
+        targetLine (str): входная строка, по которой производится поиск.
+        maxDistance (int): максимальное допустимое расстояние.
+
+        :return
+        (list): список пар (ключ, расстояние), отсортированный по возрастанию расстояния (при равных расстояниях - по
+        порядку книги).
+        """
+
+        positions = self.positions
+        return sorted((pair for pair in self.tree.within(targetLine, maxDistance) if pair[0] in positions),
+                      key=lambda pair: (pair[1], positions[pair[0]]))
+
+    def firstContaining(self, line: str):
+        """
+        Данная функция предназначена для поиска первого (в порядке строк книги) ключа, в который входит line без учета
+        регистра.
+
+        :param
+        line (str): искомая подстрока.
+
+        :return
+        Первый подходящий ключ, либо None.
+        """
+
+        return self.substrings.first(line)
+
+    def updated(self, keys, added, removed) -> "SearchIndex":
+        """
+        Данная функция предназначена для получения индекса новой версии данных по изменениям ключей. Текущий индекс
+        не меняется (по нему могут идти начатые поиски): новые ключи дописываются в копии BK-дерева и триграмм с
+        общими неизмененными частями, а суффиксный массив дополняется перебором новых ключей. Если изменений
+        накопилось слишком много, индекс строится заново.
+
+        :param
+        keys: все ключи новой версии в порядке книги.
+        added (list): добавленные ключи.
+        removed (list): удаленные ключи.
+
+        :return
+        (SearchIndex): индекс новой версии.
+        """
+
+        keys = list(keys)
+        if not added and not removed and keys == list(self.positions):
+            return self
+
+        index = copy.copy(self)
+        index.positions = {key: position for position, key in enumerate(keys)}
+        index.tree = self.tree.added(added)
+        if self.grams is not None:
+            index.grams = self.grams.added(added)
+        if self.engine is not None:
+            index.engine = ScoringEngine(keys, self.engine.workers)
+        index.substrings = self.substrings.updated(added, index.positions)
+        index.prefetched = {}
+
+        # Удаленные и добавленные перебором ключи суффиксного массива - те же, что накопились в BK-дереве и триграммах
+        if overlayTooLarge(index.substrings.overlaySize(), len(keys)):
+            index = SearchIndex(keys, self.grams is not None, self.candidateLimit, self.useEngine)
+            if self.engine is not None and index.engine is not None:
+                index.engine.workers = self.engine.workers
+        return index
+
+    def __len__(self):
+        return len(self.positions)
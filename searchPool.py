@@ -0,0 +1,87 @@
+import asyncio
+import contextvars
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from metrics import stageSeconds, timed
+
+
+class SearchPool:
+    """
+    Пул потоков для выполнения Finder.search вне цикла событий asyncio. Пока один тяжелый нечеткий поиск
+    выполняется в рабочем потоке, бот продолжает принимать и обрабатывать обновления других чатов.
+    """
+
+    def __init__(self, finder, workers: int = 4, timeout: float = 10.0):
+        self.finder = finder
+        self.size = workers
+        self.timeout = timeout
+        self.__executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="search")
+        self.__pending = 0
+        self.__lock = threading.Lock()
+
+    @property
+    def queueDepth(self) -> int:
+        """
+        Количество запросов, отправленных в пул и еще не завершенных (ожидающие в очереди + выполняющиеся).
+        """
+
+        return self.__pending
+
+    def __run(self, stage: str, function, submittedAt: float, *args):
+        stageSeconds.observe(time.perf_counter() - submittedAt, "queue_wait")
+        try:
+            with timed(stage):
+                return function(*args)
+        finally:
+            with self.__lock:
+                self.__pending -= 1
+
+    async def run(self, stage: str, function, *args):
+        """
+        Данная функция предназначена для асинхронного выполнения function(*args) в рабочем потоке пула: корутина
+        ждет результат не дольше timeout секунд.
+
+        :param
+        stage (str): название этапа для гистограммы длительностей.
+        function: вызываемая функция (например, Finder.search).
+        args: аргументы функции.
+
+        :return
+        Результат function.
+
+        :raises
+        asyncio.TimeoutError: если вызов не уложился в timeout. Сам поток при этом досчитает запрос до конца, но
+        обработчик сообщения уже освободится.
+        """
+
+        with self.__lock:
+            self.__pending += 1
+
+        # run_in_executor не переносит contextvars в поток, поэтому запрос выполняется в копии текущего контекста:
+        # так идентификатор запроса виден и в логах рабочего потока
+        context = contextvars.copy_context()
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.__executor, context.run, self.__run, stage, function, time.perf_counter(),
+                                      *args)
+        return await asyncio.wait_for(future, self.timeout)
+
+    async def search(self, query: str) -> list:
+        """
+        Данная функция предназначена для асинхронного поиска (Finder.search в рабочем потоке пула).
+
+        :param
+        query (str): поисковый запрос.
+
+        :return
+        (list): результат Finder.search.
+
+        :raises
+        asyncio.TimeoutError: если поиск не уложился в timeout.
+        """
+
+        return await self.run("search", self.finder.search, query)
+
+    def shutdown(self) -> None:
+        self.__executor.shutdown(wait=False)
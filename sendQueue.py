@@ -0,0 +1,192 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import deque
+from datetime import timedelta
+
+from telegram.error import RetryAfter
+
+from lruCache import LRUCache
+from metrics import requestId
+
+
+logger = logging.getLogger(__name__)
+
+# Приоритеты отправки: меньше - раньше. Первое сообщение ответа пользователю отправляется с приоритетом INTERACTIVE,
+# продолжение длинного ответа - BULK, чтобы другие пользователи не ждали, пока уйдут все части чужого ответа.
+INTERACTIVE = 0
+BULK = 1
+
+
+class TokenBucket:
+    """
+    Ведро токенов: не больше capacity отправок подряд и в среднем не больше rate отправок в секунду.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updatedAt = time.monotonic()
+        self.blockedUntil = 0.0
+
+    def reserve(self) -> float:
+        """
+        Данная функция предназначена для резервирования токена.
+
+        :return
+        (float): сколько секунд нужно подождать перед отправкой (0, если токен есть сразу).
+        """
+
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updatedAt) * self.rate)
+        self.updatedAt = now
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.blockedUntil - now)
+
+    def block(self, seconds: float) -> None:
+        # Telegram ответил "Too Many Requests": до истечения retry_after отправлять нельзя
+        self.blockedUntil = max(self.blockedUntil, time.monotonic() + seconds)
+
+
+class SendQueue:
+    """
+    Планировщик исходящих сообщений с ограничением частоты отправки:
+    - глобальное ведро токенов (Telegram допускает около 30 сообщений в секунду на бота);
+    - ведро токенов на каждый чат (около 1 сообщения в секунду с небольшим запасом на серию);
+    - ответ "Too Many Requests" (RetryAfter) не теряет сообщение: чат блокируется на retry_after, и отправка
+      повторяется.
+
+    Сообщения одного чата уходят строго по очереди (в чате в любой момент не больше одной отправки), а сообщения
+    разных чатов отправляются параллельно. Когда глобальных токенов не хватает, первыми их получают сообщения с
+    меньшим приоритетом.
+    """
+
+    def __init__(self, globalRate: float = 30.0, chatRate: float = 1.0, chatBurst: float = 3.0,
+                 maxRetries: int = 5):
+        self.globalBucket = TokenBucket(globalRate, globalRate)
+        self.chatRate = chatRate
+        self.chatBurst = chatBurst
+        self.maxRetries = maxRetries
+        self.retries = 0
+        self.sent = 0
+        # Ведро простаивающего чата за несколько секунд снова становится полным, поэтому ведра давно молчавших чатов
+        # можно забывать: хранится ограниченное число недавних
+        self.__chatBuckets = LRUCache(maxSize=100000, ttl=600.0)
+        self.__tasks = set()
+        # Сообщения чатов, у которых уже есть сообщение в очереди или в отправке
+        self.__parked = {}
+        self.__queue = None
+        self.__order = itertools.count()
+        self.__dispatcher = None
+
+    @property
+    def queueDepth(self) -> int:
+        waiting = self.__queue.qsize() if self.__queue is not None else 0
+        return waiting + sum(len(items) for items in self.__parked.values())
+
+    def start(self) -> None:
+        """
+        Данная функция запускает диспетчер в текущем цикле событий. Вызывается автоматически при первой отправке.
+        """
+
+        if self.__dispatcher is None:
+            self.__queue = asyncio.PriorityQueue()
+            self.__dispatcher = asyncio.get_running_loop().create_task(self.__dispatch())
+
+    async def stop(self) -> None:
+        if self.__dispatcher is not None:
+            self.__dispatcher.cancel()
+            await asyncio.gather(self.__dispatcher, return_exceptions=True)
+            self.__dispatcher = None
+
+    async def send(self, chatId: int, request, priority: int = INTERACTIVE):
+        """
+        Данная функция предназначена для отправки сообщения через очередь.
+
+        :param
+        chatId (int): чат, в который уходит сообщение.
+        request: функция без аргументов, возвращающая корутину отправки (например, lambda: message.reply_text(...)).
+        Функция, а не готовая корутина, нужна для повторной отправки после RetryAfter.
+        priority (int): INTERACTIVE или BULK.
+
+        :return
+        Результат отправки (например, объект Message).
+        """
+
+        self.start()
+        future = asyncio.get_running_loop().create_future()
+        item = (priority, next(self.__order), chatId, request, future, requestId.get())
+
+        if chatId in self.__parked:
+            self.__parked[chatId].append(item)
+        else:
+            self.__parked[chatId] = deque()
+            self.__queue.put_nowait(item)
+
+        return await future
+
+    def __chatBucket(self, chatId: int) -> TokenBucket:
+        bucket = self.__chatBuckets.get(chatId)
+        if bucket is None:
+            bucket = TokenBucket(self.chatRate, self.chatBurst)
+        # Запись обновляется при каждой отправке, чтобы ведро активного чата не устарело
+        self.__chatBuckets.put(chatId, bucket)
+        return bucket
+
+    async def __dispatch(self) -> None:
+        while True:
+            item = await self.__queue.get()
+            # Глобальные токены выдаются в порядке приоритета: ожидание происходит здесь, до запуска отправки
+            wait = self.globalBucket.reserve()
+            if wait > 0:
+                await asyncio.sleep(wait)
+            task = asyncio.get_running_loop().create_task(self.__deliver(item))
+            self.__tasks.add(task)
+            task.add_done_callback(self.__tasks.discard)
+
+    async def __deliver(self, item) -> None:
+        _, _, chatId, request, future, itemRequestId = item
+        # Задача отправки создается диспетчером, поэтому идентификатор запроса для логов переносится явно
+        requestId.set(itemRequestId)
+        bucket = self.__chatBucket(chatId)
+        try:
+            for attempt in range(self.maxRetries + 1):
+                wait = bucket.reserve()
+                if attempt > 0:
+                    # Первую попытку диспетчер уже пропустил через глобальное ведро, повторы проходят его здесь
+                    wait = max(wait, self.globalBucket.reserve())
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                try:
+                    result = await request()
+                except RetryAfter as error:
+                    retryAfter = error.retry_after
+                    if isinstance(retryAfter, timedelta):
+                        retryAfter = retryAfter.total_seconds()
+                    if attempt == self.maxRetries:
+                        raise
+                    self.retries += 1
+                    logger.warning(f"Telegram ограничил отправку в чат {chatId}, повтор через {retryAfter} с.")
+                    bucket.block(retryAfter)
+                    continue
+
+                self.sent += 1
+                if not future.done():
+                    future.set_result(result)
+                return
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as error:
+            if not future.done():
+                future.set_exception(error)
+        finally:
+            # Следующее сообщение этого чата встает в общую очередь только после завершения текущего
+            parked = self.__parked.get(chatId)
+            if parked:
+                self.__queue.put_nowait(parked.popleft())
+            else:
+                self.__parked.pop(chatId, None)
@@ -0,0 +1,143 @@
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+from lruCache import LRUCache
+
+
+# Состояние пользователя между сообщениями: какой объект (вид и ключ) ему показан, по какой версии данных и каким был
+# последний запрос. Сами записи не хранятся: при листании они заново берутся из Finder.show по ключу.
+Session = namedtuple("Session", ["kind", "name", "version", "lastQuery"])
+
+
+class MemorySessionStore:
+    """
+    Хранилище состояний в памяти процесса (ограниченный LRU-кэш со сроком жизни записи). Состояния теряются при
+    перезапуске бота.
+    """
+
+    def __init__(self, maxSessions: int = 100000, ttl: float = 86400.0):
+        self.__cache = LRUCache(maxSize=maxSessions, ttl=ttl)
+
+    def get(self, userId: int):
+        return self.__cache.get(userId)
+
+    def setResult(self, userId: int, kind: str, name: str, version: bytes) -> None:
+        session = self.__cache.get(userId)
+        self.__cache.put(userId, Session(kind, name, version, session.lastQuery if session else None))
+
+    def setLastQuery(self, userId: int, query: str) -> None:
+        session = self.__cache.get(userId) or Session(None, None, None, None)
+        self.__cache.put(userId, session._replace(lastQuery=query))
+
+    def close(self) -> None:
+        self.__cache.clear()
+
+    def __len__(self):
+        return len(self.__cache)
+
+
+class SqliteSessionStore:
+    """
+    Хранилище состояний в SQLite (режим WAL), переживающее перезапуск бота. Одна строка на пользователя, поиск -
+    одно чтение по первичному ключу. Записи старше ttl секунд и самые давно обновленные записи сверх maxSessions
+    удаляются: просроченная запись не выдается сразу, а физически удаляется при периодической очистке (раз в
+    evictEvery записей).
+    """
+
+    def __init__(self, path: str, maxSessions: int = 100000, ttl: float = 86400.0, evictEvery: int = 256):
+        self.path = path
+        self.maxSessions = maxSessions
+        self.ttl = ttl
+        self.evictEvery = evictEvery
+        self.__writes = 0
+        self.__lock = threading.Lock()
+        self.__connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.__connection.execute("PRAGMA journal_mode=WAL")
+        # В режиме WAL при synchronous=NORMAL запись не ждет fsync на каждую транзакцию, а база остается целостной
+        self.__connection.execute("PRAGMA synchronous=NORMAL")
+        self.__connection.execute("CREATE TABLE IF NOT EXISTS sessions ("
+                                  "user_id INTEGER PRIMARY KEY, kind TEXT, name TEXT, version BLOB, "
+                                  "last_query TEXT, updated_at REAL NOT NULL)")
+        self.__connection.execute("CREATE INDEX IF NOT EXISTS sessions_updated_at ON sessions (updated_at)")
+        self.evict()
+
+    def get(self, userId: int):
+        """
+        Данная функция предназначена для получения состояния пользователя.
+
+        :param
+        userId (int): идентификатор пользователя Telegram.
+
+        :return
+        (Session): состояние, либо None, если его нет или оно просрочено.
+        """
+
+        with self.__lock:
+            row = self.__connection.execute(
+                "SELECT kind, name, version, last_query FROM sessions WHERE user_id = ? AND updated_at > ?",
+                (userId, time.time() - self.ttl)).fetchone()
+        return Session(*row) if row is not None else None
+
+    def setResult(self, userId: int, kind: str, name: str, version: bytes) -> None:
+        self.__write("INSERT INTO sessions (user_id, kind, name, version, updated_at) VALUES (?, ?, ?, ?, ?) "
+                     "ON CONFLICT (user_id) DO UPDATE SET kind = excluded.kind, name = excluded.name, "
+                     "version = excluded.version, updated_at = excluded.updated_at",
+                     (userId, kind, name, version, time.time()))
+
+    def setLastQuery(self, userId: int, query: str) -> None:
+        self.__write("INSERT INTO sessions (user_id, last_query, updated_at) VALUES (?, ?, ?) "
+                     "ON CONFLICT (user_id) DO UPDATE SET last_query = excluded.last_query, "
+                     "updated_at = excluded.updated_at",
+                     (userId, query, time.time()))
+
+    def __write(self, statement: str, parameters: tuple) -> None:
+        with self.__lock:
+            self.__connection.execute(statement, parameters)
+            self.__writes += 1
+            evict = self.__writes % self.evictEvery == 0
+        if evict:
+            self.evict()
+
+    def evict(self) -> int:
+        """
+        Данная функция предназначена для удаления просроченных записей и самых давно обновленных записей сверх
+        maxSessions.
+
+        :return
+        (int): сколько записей удалено.
+        """
+
+        with self.__lock:
+            removed = self.__connection.execute("DELETE FROM sessions WHERE updated_at <= ?",
+                                                (time.time() - self.ttl,)).rowcount
+            # Граница по времени обновления берется по индексу, без сортировки всей таблицы
+            removed += self.__connection.execute(
+                "DELETE FROM sessions WHERE updated_at <= (SELECT updated_at FROM sessions "
+                "ORDER BY updated_at DESC LIMIT 1 OFFSET ?)", (self.maxSessions,)).rowcount
+        return removed
+
+    def close(self) -> None:
+        with self.__lock:
+            self.__connection.close()
+
+    def __len__(self):
+        with self.__lock:
+            return self.__connection.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def openSessionStore(path: str, maxSessions: int = 100000, ttl: float = 86400.0):
+    """
+    Данная функция предназначена для выбора хранилища состояний.
+
+    :param
+    path (str): путь к файлу SQLite; пустая строка - хранилище в памяти процесса.
+
+    :return
+    SqliteSessionStore или MemorySessionStore.
+    """
+
+    if not path:
+        return MemorySessionStore(maxSessions, ttl)
+    return SqliteSessionStore(path, maxSessions, ttl)
@@ -0,0 +1,101 @@
+import contextlib
+import hashlib
+import logging
+import mmap
+import os
+import pickle
+import struct
+
+
+# Формат файла: MAGIC | версия формата (uint32) | sha256 книги (32 байта) | pickle с распарсенными данными.
+# Версию нужно увеличивать при любом изменении структуры сохраняемых объектов (парсеров и их индексов).
+SNAPSHOT_MAGIC = b"CMTGIDX\x00"
+SNAPSHOT_VERSION = 15
+HEADER = struct.Struct("<8sI32s")
+
+logger = logging.getLogger(__name__)
+
+
+def workbookHash(filePath: str, chunkSize: int = 1 << 20) -> bytes:
+    """
+    Данная функция предназначена для вычисления хэша содержимого книги. Именно по нему определяется, подходит ли
+    сохраненный снимок к текущему файлу данных.
+
+    :param
+    filePath (str): путь к файлу Data.xlsx.
+    chunkSize (int): размер блока чтения в байтах.
+
+    :return
+    (bytes): sha256 от содержимого файла.
+    """
+
+    digest = hashlib.sha256()
+    with open(filePath, "rb") as file:
+        for chunk in iter(lambda: file.read(chunkSize), b""):
+            digest.update(chunk)
+    return digest.digest()
+
+
+def loadSnapshot(snapshotPath: str, contentHash: bytes):
+    """
+    Данная функция предназначена для загрузки снимка индексов. Файл отображается в память (mmap), и pickle
+    читает данные прямо из отображения, без промежуточного копирования файла.
+
+    :param
+    snapshotPath (str): путь к файлу снимка.
+    contentHash (bytes): хэш текущей книги, с которым должен совпасть хэш в заголовке снимка. None - подходит снимок
+    любой версии книги (например, чтобы обновить его по изменившимся строкам).
+
+    :return
+    Сохраненные данные, либо None, если снимка нет, он поврежден или построен по другой книге / версии формата.
+    """
+
+    try:
+        with open(snapshotPath, "rb") as file:
+            with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                if len(mapped) < HEADER.size:
+                    return None
+
+                magic, version, savedHash = HEADER.unpack_from(mapped, 0)
+                if magic != SNAPSHOT_MAGIC or version != SNAPSHOT_VERSION or contentHash not in (None, savedHash):
+                    return None
+
+                with memoryview(mapped)[HEADER.size:] as payload:
+                    return pickle.loads(payload)
+    except FileNotFoundError:
+        return None
+    except Exception:
+        # Поврежденный или несовместимый снимок (unpickle может упасть с любым исключением) - не ошибка, данные
+        # просто будут пересобраны.
+        logger.warning("Не удалось загрузить снимок %s, данные будут пересобраны", snapshotPath, exc_info=True)
+        return None
+
+
+def saveSnapshot(snapshotPath: str, contentHash: bytes, data) -> bool:
+    """
+    Данная функция предназначена для сохранения снимка индексов. Запись идет во временный файл, который затем
+    атомарно подменяет старый снимок, поэтому параллельный процесс никогда не увидит файл наполовину.
+
+    :param
+    snapshotPath (str): путь к файлу снимка.
+    contentHash (bytes): хэш книги, по которой построены данные.
+    data: сохраняемые данные (должны сериализоваться через pickle).
+
+    :return
+    (bool): True, если снимок записан, False - если записать его не удалось (например, каталог только для чтения).
+    """
+
+    tempPath = f"{snapshotPath}.{os.getpid()}.tmp"
+    try:
+        with open(tempPath, "wb") as file:
+            file.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, contentHash))
+            pickle.dump(data, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tempPath, snapshotPath)
+        return True
+    except (OSError, pickle.PicklingError, TypeError, AttributeError):
+        # Снимок - только кэш: ошибка записи или несериализуемый индекс не должны мешать запуску
+        logger.warning("Не удалось сохранить снимок %s, при следующем запуске книга будет разобрана заново",
+                       snapshotPath, exc_info=True)
+        with contextlib.suppress(OSError):
+            os.remove(tempPath)
+        return False
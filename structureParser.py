@@ -1,77 +1,91 @@
-import openpyxl
-import os
-from Levenshtein import distance
+from searchIndex import SearchIndex
+from records import DepartmentRecord
+from departmentStore import DepartmentStore
+from orgGraph import OrgGraph
+from workbookLoader import loadWorkbook, STRUCTURE_SHEET
 
 
 class StructureParser:
-    def __init__(self, filePath: str, parseFlag: bool = True):
+    def __init__(self, filePath: str, parseFlag: bool = True, rows: list = None, store: DepartmentStore = None):
         self.filePath = filePath
-        self.workbook = openpyxl.load_workbook(self.filePath)
-        self.worksheet = self.workbook['Оргструктура']
+        self.store = None
         self.structureDict = {}
         self.structureSet = set()
+        self.structureIndex = SearchIndex()
+        self.orgGraph = OrgGraph()
 
         if parseFlag:
-            self.parser()
+            self.parser(rows, store)
 
-    def parser(self) -> None:
+    def parser(self, rows: list = None, store: DepartmentStore = None) -> None:
         """
         Данная функция предназначена для парсинга листа "Полномочия" по структурам. Данная функция ничего не возвращает.
+
+        :param
+        rows (list): строки листа (кортежи значений), уже прочитанные общим загрузчиком. Если не переданы, лист
+        читается из файла filePath.
+        store (DepartmentStore): общее с NumParser хранилище строк листа. Если передано, то rows не нужны:
+        строки уже разобраны, и парсер лишь использует индекс хранилища по наименованию.
         """
 
-        def getValue(row, index: int, defaultMessage: str = "нет") -> str:
-            """
-            Данная функция предназначена для получения значения из ячейки. Если значение None, то заменяем его на defaultMessage.
-
-            :param
-            row (docx.rows): строчка, из которой будет извлечен элемент.
-            index (int): индекс извлекаемого элемента в строчке.
-
-            :return
-            (str): значение в ячейке в формате строки (defaultMessage в случае отсутствия значения)
-            """
-
-            return str(row[index].value) if row[index].value is not None else defaultMessage
-
-        for row in self.worksheet.iter_rows(min_row=2):
-            if row[0].value is None:
-                break
-
-            # Уделить дополнительное время парсингу задач отделения
-            data = {
-                "1. Код ИС-ПРО: ": getValue(row, 1) + ";",
-                "2. Вышестоящее подразделение: ": getValue(row, 2) + ";",
-                "3. Вышестоящее подразделение верхнего уровня: ": getValue(row, 3) + ";",
-                "4. Кампус: ": getValue(row, 4) + ";",
-                "5. Самостоятельное: ": getValue(row, 5) + ";",
-                "6. Статус: ": getValue(row, 6) + ";",
-                "7. Вид подразделения: ": getValue(row, 7) + ";",
-                "8. Тип подразделения: ": getValue(row, 8) + ";",
-                "9. Основной вид деятельности: ": getValue(row, 9) + ";",
-                "10. Дополнительные виды деятельности: ": getValue(row, 10) + ";",
-                "11. Задачи подразделения: ": getValue(row, 11) + ";",
-                "12. Дата создания: ": getValue(row, 12) + ";",
-                "13. Номер приказа о создании: ": getValue(row, 13) + ";"
-            }
-
-            resLine = "\n".join('{}{}'.format(key, val) for key, val in data.items())
-            self.structureDict.setdefault(row[0].value, []).append(resLine)
+        if store is None:
+            if rows is None:
+                rows = loadWorkbook(self.filePath, (STRUCTURE_SHEET,))[STRUCTURE_SHEET]
+            store = DepartmentStore(rows)
+
+        # Строки хранятся в общем колоночном хранилище, а словарь ключей указывает на номера строк в нем
+        self.store = store
+        self.structureDict = store.nameIndex
 
         self.updateStructure(self.structureDict)
 
     def updateStructure(self, strctDict: dict) -> None:
         """
-        Данная функция предназначена для обновления множества структур.
+        Данная функция предназначена для обновления множества структур и поискового индекса по ним.
 
         :param
-        strctDict (dict): словарь с распарсенными данными структур.
+        strctDict (dict): словарь "ключ -> номера строк хранилища" с распарсенными данными структур.
 
         :return
         (None): данная функция ничего не возвращает, она только выполняет обновление.
         """
         self.structureSet = set(strctDict.keys())
+        # Индекс (триграммы + BK-дерево) строится один раз при разборе и дальше используется в каждом find
+        self.structureIndex = SearchIndex(strctDict.keys(), useGrams=True)
+        self.orgGraph = self.buildOrgGraph()
 
-    def find(self, targetLine: str) -> list:
+    def buildOrgGraph(self) -> OrgGraph:
+        # Иерархия подразделений по колонкам "Вышестоящее подразделение" и "... верхнего уровня"
+        return OrgGraph((self.store.value(rowId, 0), self.store.value(rowId, 2), self.store.value(rowId, 3))
+                        for rowId in self.store.order[:self.store.namedRows])
+
+    def applyDelta(self, store: DepartmentStore) -> "StructureParser":
+        """
+        Данная функция предназначена для построения парсера по хранилищу новой версии листа (DepartmentStore.
+        applyDelta) без повторного построения индексов: поисковый индекс получает только добавленные и удаленные
+        наименования. Граф иерархии нумеруется обходом всего дерева, поэтому строится заново. Текущий парсер не
+        меняется.
+
+        :param
+        store (DepartmentStore): хранилище новой версии листа.
+
+        :return
+        (StructureParser): парсер новой версии.
+        """
+
+        parser = StructureParser(self.filePath, parseFlag=False)
+        parser.store = store
+        parser.structureDict = store.nameIndex
+        parser.structureSet = set(store.nameIndex.keys())
+
+        added = [key for key in parser.structureDict if key not in self.structureSet]
+        removed = [key for key in self.structureDict if key not in parser.structureSet]
+        parser.structureIndex = self.structureIndex.updated(parser.structureDict.keys(), added, removed)
+        parser.orgGraph = parser.buildOrgGraph()
+
+        return parser
+
+    def findScored(self, targetLine: str) -> list:
         """
         Данная функция ищет по образцу струтктуру в множестве. В случае если есть точное совпадение, возвращается 
         одна структура, в ином - три самых близких.
@@ -80,19 +94,47 @@ class StructureParser:
         targetLine (str): входная строка, по которой производится поиск.
     
         :return:
-        (lst): список ближайших по-расстоянию Левенштейна элементов из множества structureSet к элементу targetLine.
+        (lst): список пар (элемент, расстояние) для ближайших по-расстоянию Левенштейна элементов из множества
+        structureSet к элементу targetLine. Расстояния возвращаются вместе с элементами, чтобы их не пересчитывать.
         """
 
-        # Сортируем все структуры по расстоянию
-        structureSorted = sorted(self.structureSet, key=lambda x: distance(x, targetLine))
-        minDistance = distance(structureSorted[0], targetLine)
+        # Ищем три ближайших элемента по индексу: триграммный отбор кандидатов, затем точный пересчет расстояния
+        nearest = self.structureIndex.nearest(targetLine, 3)
 
-        if minDistance == 0:
+        if nearest[0][1] == 0:
             # Если минимум равен 0, возвращаем один элемент
-            return [structureSorted[0]]
+            return nearest[:1]
         else:
             # Если минимум не равен 0, возвращаем три элемента
-            return structureSorted[:3]
+            return nearest
+
+    def find(self, targetLine: str) -> list:
+        """
+        Данная функция ищет по образцу струтктуру в множестве. В случае если есть точное совпадение, возвращается 
+        одна структура, в ином - три самых близких.
+    
+        :param
+        targetLine (str): входная строка, по которой производится поиск.
+    
+        :return:
+        (lst): список ближайших по-расстоянию Левенштейна элементов из множества structureSet к элементу targetLine.
+        """
+
+        return [key for key, _ in self.findScored(targetLine)]
+
+    def findSubstring(self, line: str):
+        """
+        Данная функция ищет структуру, в которую входит строка line (без учета регистра). Поиск идет по суффиксному
+        массиву, а при нескольких вхождениях выбирается первое в порядке строк книги.
+
+        :param
+        line (str): искомая подстрока.
+
+        :return
+        Найденный ключ, либо None, если вхождений нет.
+        """
+
+        return self.structureIndex.firstContaining(line)
 
     def show(self, structureName: str) -> list:
         """
@@ -102,32 +144,17 @@ class StructureParser:
         structureName (str): входная строка, по которой будет выводиться результат.
 
         :return
-        (str): данные для структуры в строчном формате.
+        (list): наименование и записи о подразделении (DepartmentRecord), текст которых собирается методом render.
 
         """
         result = [structureName]
-
-        for index, value in enumerate(self.structureDict[structureName]):
-            temp = ""
-            # result += f"{index + 1}) "
-            temp += str(value) + "\n"
-
-            if index != len(self.structureDict[structureName]) - 1:
-                temp += "\n"
-
-            result.append(temp)
+        result.extend(self.store.record(rowId, DepartmentRecord) for rowId in self.structureDict[structureName])
 
         return result
 
-    def __close_workbook(self):
-        self.workbook.close()
-
     def __str__(self):
         pass
 
-    def __del__(self):
-        self.__close_workbook()
-
     def __call__(self, *args, **kwargs):
         # Стоит ли?
         pass
@@ -0,0 +1,197 @@
+import copy
+from array import array
+
+
+SEPARATOR = "\x00"
+# Сколько символов суффикса сравнивается за один проход сортировки
+SUFFIX_KEY_WIDTH = 16
+
+
+class SubstringIndex:
+    """
+    Индекс для поиска вхождения подстроки (без учета регистра) через суффиксный массив. Все строки в нижнем регистре
+    склеиваются через разделитель, суффиксы сортируются один раз при построении. Запрос - это двоичный поиск
+    границ диапазона суффиксов, начинающихся с подстроки: O(log n), а номера строк для диапазона берутся срезом
+    параллельного массива владельцев.
+
+    Результаты возвращаются в порядке исходных строк (порядок строк в книге), а не в порядке обхода множества,
+    поэтому ответ на один и тот же запрос всегда одинаков.
+
+    Перестроение массива ради нескольких новых строк обходится дорого, поэтому при обновлении данных (updated) новые
+    строки проверяются простым перебором, а удаленные отсеиваются по словарю positions. Найденные строки обеих частей
+    упорядочиваются по позициям в новой версии книги, так что ответ тот же, что и у индекса, построенного заново.
+    """
+
+    def __init__(self, texts=(), values=None):
+        texts = list(texts)
+        self.values = list(values) if values is not None else texts
+        texts = [str(text).lower() for text in texts]
+        self.text = SEPARATOR.join(texts) + SEPARATOR
+
+        # ownerOf[position] - номер строки, которой принадлежит символ text[position]
+        ownerOf = array("i")
+        for owner, text in enumerate(texts):
+            ownerOf.extend([owner] * (len(text) + 1))
+
+        self.suffixes = self.__sortSuffixes(self.text)
+        # owners[i] - номер строки, которой принадлежит суффикс suffixes[i]
+        self.owners = array("i", (ownerOf[position] for position in self.suffixes))
+
+        # Строки, добавленные после построения массива, и позиции действующих значений в порядке книги (None -
+        # действуют все значения, и их порядок - порядок values)
+        self.extraTexts = []
+        self.extraValues = []
+        self.positions = None
+
+    @staticmethod
+    def __sortSuffixes(text: str) -> array:
+        """
+        Данная функция предназначена для сортировки суффиксов склеенной строки (кроме разделителей). Суффиксы не
+        копируются: позиции раскладываются по первому символу, каждая корзина сортируется по первым SUFFIX_KEY_WIDTH
+        символам, и только позиции с совпавшим куском досортировываются по следующему. Одновременно в памяти лежат
+        лишь короткие куски одной корзины, то есть память линейна по длине текста.
+
+        Куски могут заходить за разделитель в следующую строку. На порядок строк это не влияет: разделитель меньше
+        любого символа, поэтому суффикс, закончившийся раньше, все равно окажется меньше.
+
+        :param
+        text (str): строки, склеенные через разделитель (с разделителем в конце).
+
+        :return
+        (array): позиции суффиксов в порядке возрастания суффиксов.
+        """
+
+        buckets = {}
+        for position, char in enumerate(text):
+            if char != SEPARATOR:
+                buckets.setdefault(char, array("i")).append(position)
+
+        suffixes = array("i")
+        for char in sorted(buckets):
+            suffixes.extend(SubstringIndex.__sortGroup(text, buckets.pop(char), 0))
+        return suffixes
+
+    @staticmethod
+    def __sortGroup(text: str, group, depth: int) -> list:
+        # Суффиксы группы совпадают в первых depth символах: сравниваем следующий кусок
+        keys = [text[position + depth:position + depth + SUFFIX_KEY_WIDTH] for position in group]
+        order = sorted(range(len(group)), key=keys.__getitem__)
+
+        result = []
+        index = 0
+        while index < len(order):
+            key = keys[order[index]]
+            end = index + 1
+            while end < len(order) and keys[order[end]] == key:
+                end += 1
+
+            run = [group[item] for item in order[index:end]]
+            # Если в куске есть разделитель, то строки совпали до конца, и их порядок между собой не важен
+            if len(run) > 1 and SEPARATOR not in key:
+                run = SubstringIndex.__sortGroup(text, run, depth + SUFFIX_KEY_WIDTH)
+            result.extend(run)
+            index = end
+        return result
+
+    def __bound(self, pattern: str, upper: bool) -> int:
+        """
+        Двоичный поиск первого суффикса, префикс которого больше pattern (upper) или не меньше pattern (иначе).
+        """
+
+        low, high, size = 0, len(self.suffixes), len(pattern)
+        while low < high:
+            middle = (low + high) // 2
+            start = self.suffixes[middle]
+            prefix = self.text[start:start + size]
+            if prefix < pattern or (upper and prefix == pattern):
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def __range(self, pattern: str):
+        pattern = pattern.lower()
+        if not pattern or SEPARATOR in pattern:
+            return 0, 0
+        return self.__bound(pattern, False), self.__bound(pattern, True)
+
+    def find(self, pattern: str) -> list:
+        """
+        Данная функция предназначена для поиска всех строк, в которые входит pattern.
+
+        :param
+        pattern (str): искомая подстрока.
+
+        :return
+        (list): значения строк, содержащих pattern, в исходном порядке строк.
+        """
+
+        low, high = self.__range(pattern)
+        result = [self.values[owner] for owner in sorted(set(self.owners[low:high]))]
+        if self.positions is None:
+            return result
+
+        positions = self.positions
+        result = [value for value in result if value in positions] + self.__findExtra(pattern)
+        result.sort(key=positions.__getitem__)
+        return result
+
+    def first(self, pattern: str):
+        """
+        Данная функция предназначена для поиска первой (в исходном порядке) строки, в которую входит pattern.
+
+        :param
+        pattern (str): искомая подстрока.
+
+        :return
+        Значение первой подходящей строки, либо None, если вхождений нет.
+        """
+
+        if self.positions is not None:
+            found = self.find(pattern)
+            return found[0] if found else None
+
+        low, high = self.__range(pattern)
+        return self.values[min(self.owners[low:high])] if low < high else None
+
+    def __findExtra(self, pattern: str) -> list:
+        pattern = pattern.lower()
+        if not pattern or SEPARATOR in pattern:
+            return []
+        return [value for text, value in zip(self.extraTexts, self.extraValues)
+                if pattern in text and value in self.positions]
+
+    def updated(self, texts, positions: dict, values=None) -> "SubstringIndex":
+        """
+        Данная функция предназначена для получения индекса новой версии данных. Текущий индекс не меняется, а
+        суффиксный массив у обоих индексов общий.
+
+        :param
+        texts: добавленные строки.
+        positions (dict): действующие значения и их позиции в новой версии книги; строки с другими значениями в
+        результаты не попадают.
+        values: значения добавленных строк (по умолчанию - сами строки). Значения должны быть уникальны.
+
+        :return
+        (SubstringIndex): новый индекс.
+        """
+
+        texts = list(texts)
+        values = list(values) if values is not None else texts
+        # Значения, которые уже есть в индексе (например, удаленная и вернувшаяся строка), второй раз не добавляются
+        present = set(self.values).union(self.extraValues)
+        added = [(str(text).lower(), value) for text, value in zip(texts, values) if value not in present]
+
+        index = copy.copy(self)
+        index.extraTexts = self.extraTexts + [text for text, _ in added]
+        index.extraValues = self.extraValues + [value for _, value in added]
+        index.positions = positions
+        return index
+
+    def overlaySize(self) -> int:
+        # Сколько строк проверяется перебором или хранится в массиве зря
+        hidden = len(self.values) + len(self.extraValues) - len(self.positions) if self.positions is not None else 0
+        return len(self.extraValues) + max(hidden, 0)
+
+    def __len__(self):
+        return len(self.values)
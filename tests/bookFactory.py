@@ -0,0 +1,33 @@
+import openpyxl
+
+from workbookLoader import PERSONA_SHEET, STRUCTURE_SHEET
+
+
+PERSONAS = [("Иванов Иван Иванович", "Начальник отдела"), ("Иванова Анна Петровна", "Специалист"),
+            ("Петров Петр Петрович", "Директор"), ("Сидоров Олег Ильич", "Инженер"),
+            ("Иванов Иван Сергеевич", "Инженер")]
+DEPARTMENTS = [("Институт", "01", None), ("Кафедра физики", "01.01", "Институт"),
+               ("Кафедра химии", "01.02", "Институт"), ("Лаборатория оптики", "01.01.01", "Кафедра физики"),
+               ("Сектор \"Приказы\"", "02", None)]
+
+
+def writeBook(path: str, personas=PERSONAS, departments=DEPARTMENTS) -> str:
+    """
+    Данная функция предназначена для записи небольшой книги Data.xlsx для тестов: строки персон (ФИО, должность, ...)
+    и подразделений (наименование, код, вышестоящее подразделение, ...).
+    """
+
+    workbook = openpyxl.Workbook()
+    personaSheet = workbook.active
+    personaSheet.title = PERSONA_SHEET
+    personaSheet.append(("ФИО", "Должность"))
+    for row in personas:
+        personaSheet.append(row)
+
+    structureSheet = workbook.create_sheet(STRUCTURE_SHEET)
+    structureSheet.append(("Наименование", "Код ИС-ПРО", "Вышестоящее подразделение"))
+    for row in departments:
+        structureSheet.append(row)
+
+    workbook.save(path)
+    return path
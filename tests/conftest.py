@@ -0,0 +1,6 @@
+import os
+import sys
+
+
+# Модули бота лежат в корне репозитория, рядом с каталогом tests
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
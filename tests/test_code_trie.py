@@ -0,0 +1,36 @@
+import unittest
+
+from codeTrie import CodeTrie
+
+
+CODES = ["01", "01.111", "01.111.03", "01.111.03.01", "01.1110", "01.112", "02.111", "Без кода 1"]
+
+
+class CodeTrieTest(unittest.TestCase):
+    def setUp(self):
+        self.trie = CodeTrie(CODES)
+
+    def test_get(self):
+        self.assertEqual(self.trie.get("01.111.03"), "01.111.03")
+        # Пробелы вокруг сегментов не учитываются
+        self.assertEqual(self.trie.get("01. 111"), "01.111")
+        self.assertIsNone(self.trie.get("01.11"))
+        self.assertEqual(self.trie.get("Без кода 1"), "Без кода 1")
+        self.assertEqual(len(self.trie), len(CODES))
+
+    def test_under(self):
+        self.assertEqual(self.trie.under("01.111"), ["01.111", "01.111.03", "01.111.03.01"])
+        self.assertEqual(self.trie.under("01.111", limit=2), ["01.111", "01.111.03"])
+        self.assertEqual(self.trie.under("03"), [])
+
+    def test_correct(self):
+        self.assertEqual(sorted(self.trie.correct("01.113", limit=2)), [("01.111", 1), ("01.112", 1)])
+        self.assertEqual(self.trie.correct("01.111.03.01.01"), [])
+
+    def test_updated(self):
+        updated = self.trie.updated(["01.111.04", "Без кода 2"], ["01.111.03.01", "Без кода 1"])
+        self.assertEqual(updated.under("01.111"), ["01.111", "01.111.03", "01.111.04"])
+        self.assertEqual(updated.noCode, ["Без кода 2"])
+        # Текущее дерево не меняется
+        self.assertEqual(self.trie.under("01.111"), ["01.111", "01.111.03", "01.111.03.01"])
+        self.assertEqual(self.trie.noCode, ["Без кода 1"])
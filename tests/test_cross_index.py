@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from bookFactory import DEPARTMENTS, writeBook
+from crossIndex import COORDINATES, HEADS, MANAGES, CrossIndex
+from search import Finder
+
+
+class CrossIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.index = CrossIndex(["Иванов Иван Иванович"], ["Кафедра физики", "Отдел кадров, архив"])
+
+    def test_link_matches_keys(self):
+        self.assertTrue(self.index.link("иванов  иван ИВАНОВИЧ", "кафедра физики", MANAGES))
+        self.assertFalse(self.index.link("Петров Петр Петрович", "Кафедра физики", MANAGES))
+        self.assertFalse(self.index.link("Иванов Иван Иванович", "Кафедра химии", MANAGES))
+        # Повторная связь не дублируется
+        self.assertTrue(self.index.link("Иванов Иван Иванович", "Кафедра физики", MANAGES))
+        self.assertEqual(self.index.unitsOf("Иванов Иван Иванович"), [("Кафедра физики", MANAGES)])
+        self.assertEqual(self.index.peopleOf("Кафедра физики"), [("Иванов Иван Иванович", MANAGES)])
+
+    def test_link_cell(self):
+        cell = "Кафедра физики;\nОтдел кадров, архив; Неизвестный отдел"
+        self.assertEqual(self.index.linkCell("Иванов Иван Иванович", cell, COORDINATES), 2)
+        self.assertEqual(self.index.unitsOf("Иванов Иван Иванович"),
+                         [("Кафедра физики", COORDINATES), ("Отдел кадров, архив", COORDINATES)])
+        self.assertEqual(self.index.peopleOf("Кафедра химии"), [])
+
+
+class FinderLinksTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        personas = [("Иванов Иван Иванович", "Начальник", None, None, None, None, None, None,
+                     "Кафедра физики; Кафедра химии", None, "кафедра химии"),
+                    ("Петров Петр Петрович", "Директор")]
+        departments = [row + (None,) * (40 - len(row)) + (head,)
+                       for row, head in zip(DEPARTMENTS, ("Петров Петр Петрович", None, None, None, None))]
+        self.finder = Finder(writeBook(os.path.join(self.directory.name, "Data.xlsx"), personas, departments))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_links(self):
+        self.assertEqual(self.finder.state.crossIndex.peopleOf("Институт"), [("Петров Петр Петрович", HEADS)])
+        # Связь с подразделением показывается один раз, руководство - раньше координации
+        self.assertEqual(self.finder.links("persona", "Иванов Иван Иванович"),
+                         [("Руководит: Кафедра физики", "structure", "Кафедра физики"),
+                          ("Руководит: Кафедра химии", "structure", "Кафедра химии")])
+        self.assertEqual(self.finder.links("structure", "Кафедра химии"),
+                         [("Руководитель: Иванов Иван Иванович", "persona", "Иванов Иван Иванович")])
+        self.assertEqual(self.finder.links("structure", "Институт"),
+                         [("Руководитель: Петров Петр Петрович", "persona", "Петров Петр Петрович")])
@@ -0,0 +1,62 @@
+import os
+import random
+import tempfile
+import unittest
+
+from bookFactory import writeBook
+from search import Finder
+
+
+SURNAMES = ["Иванов", "Петров", "Сидоров", "Назаренко", "Кузнецов", "Смирнов", "Попов", "Волков"]
+NAMES = ["Иван", "Петр", "Олег", "Анна", "Мария", "Виктор"]
+POSTS = ["Инженер", "Директор", "Специалист", "Начальник отдела"]
+
+
+def makeRows(seed: int):
+    generator = random.Random(seed)
+    personas = list(dict.fromkeys((f"{generator.choice(SURNAMES)} {generator.choice(NAMES)} "
+                                   f"{generator.choice(NAMES)}ович", generator.choice(POSTS)) for _ in range(80)))
+    departments = [("Институт", "01", None)]
+    for index in range(1, 40):
+        parentName, parentCode, _ = generator.choice(departments)
+        departments.append((f"Отдел {index} {generator.choice(SURNAMES)}", f"{parentCode}.{index:02}", parentName))
+    return personas, departments
+
+
+def answer(finder: Finder, query: str) -> tuple:
+    result = finder.search(query)
+    names = tuple(item[0] if isinstance(item, list) else item for item in result[1:])
+    return (result[0],) + names, finder.rank(query)
+
+
+class DeltaReloadTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "Data.xlsx")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_matches_full_rebuild(self):
+        personas, departments = makeRows(1)
+        writeBook(self.path, personas, departments)
+        finder = Finder(self.path)
+
+        # Удаление, вставка в середину, перенос строки и изменение записи - меньше пятой части строк
+        personas = personas[:1] + [("Иванов Иван Викторович", "Инженер")] + personas[2:]
+        personas.insert(5, personas.pop(30))
+        personas[10] = (personas[10][0], "Заместитель директора")
+        departments = departments[:-1] + [("Отдел 40 Петров", "01.40", "Институт")]
+        writeBook(self.path, personas, departments)
+        self.assertTrue(finder.reload())
+        self.assertEqual(finder.lastLoadStats["source"], "delta")
+
+        rebuilt = Finder(self.path, os.path.join(self.directory.name, "rebuilt.snapshot"))
+        self.assertEqual(rebuilt.lastLoadStats["source"], "workbook")
+
+        queries = [name for name, _ in personas[::7]] + [name for name, _, _ in departments[::5]]
+        queries += ["Иванов Иван", "Петров", "Отдел 40", "01.4", "01.", "Иванв Иван Олегович", "Кузнецов Петр"]
+        for query in queries:
+            self.assertEqual(answer(finder, query), answer(rebuilt, query), query)
+        self.assertEqual(finder.subunits("Институт"), rebuilt.subunits("Институт"))
+        self.assertEqual(finder.show("persona", personas[10][0])[1].position, "Заместитель директора")
@@ -0,0 +1,58 @@
+import unittest
+
+from departmentStore import DepartmentStore
+from numParser import NumParser
+from structureParser import StructureParser
+
+
+ROWS = [("Подразделение 1", "01"), ("Подразделение 2", "02"), ("Подразделение без кода", None),
+        ("Подразделение 3", "03")]
+# Строка без наименования: наименования на ней заканчиваются, а коды - нет
+ROWS_WITHOUT_NAME = [("Подразделение 1", "01"), (None, "02"), ("Подразделение 3", "03"), (None, None),
+                     ("Подразделение 4", "04")]
+
+
+class DepartmentStoreCodesTest(unittest.TestCase):
+    def test_codes_stop_at_first_row_without_code(self):
+        store = DepartmentStore(ROWS)
+        # Как и прежний разбор шифров: коды после строки без кода не индексируются
+        self.assertEqual(set(store.codeIndex), {"01", "02"})
+        # Наименования индексируются до первой строки без наименования
+        self.assertEqual(len(store.nameIndex), 4)
+
+    def test_delta_keeps_rule(self):
+        store = DepartmentStore(ROWS[:2] + ROWS[3:])
+        self.assertEqual(set(store.codeIndex), {"01", "02", "03"})
+
+        updated = store.applyDelta(store.delta(ROWS))
+        self.assertEqual(set(updated.codeIndex), {"01", "02"})
+        self.assertEqual(set(store.codeIndex), {"01", "02", "03"})
+
+    def test_names_stop_at_first_row_without_name(self):
+        store = DepartmentStore(ROWS_WITHOUT_NAME)
+        # Как и прежний разбор шифров: строка без наименования не обрывает коды
+        self.assertEqual(set(store.codeIndex), {"01", "02", "03"})
+        self.assertEqual(set(store.nameIndex), {"Подразделение 1"})
+        # Пустая строка заканчивает лист
+        self.assertEqual(len(store), 3)
+
+        parser = NumParser("", rows=ROWS_WITHOUT_NAME)
+        self.assertEqual(parser.findScored("02"), [("02", 0)])
+        self.assertEqual(parser.show("02")[1].name, "нет")
+
+    def test_delta_matches_full_build(self):
+        store = DepartmentStore(ROWS)
+        for rows in (ROWS_WITHOUT_NAME, ROWS[1:], ROWS[:1] + ROWS_WITHOUT_NAME):
+            updated = store.applyDelta(store.delta(rows))
+            rebuilt = DepartmentStore(rows)
+            for index in ("nameIndex", "codeIndex"):
+                self.assertEqual({key: [updated.record(rowId).values() for rowId in rowIds]
+                                  for key, rowIds in getattr(updated, index).items()},
+                                 {key: [rebuilt.record(rowId).values() for rowId in rowIds]
+                                  for key, rowIds in getattr(rebuilt, index).items()})
+
+    def test_org_graph_uses_named_rows(self):
+        parser = StructureParser("", rows=[("Институт", "01", None), ("Кафедра", "02", "Институт"),
+                                           (None, "03", "Кафедра"), ("Лаборатория", "04", "Кафедра")])
+        self.assertEqual(set(parser.structureDict), {"Институт", "Кафедра"})
+        self.assertEqual(len(parser.store.codeIndex), 4)
@@ -0,0 +1,96 @@
+import random
+import unittest
+
+from Levenshtein import distance
+
+from bkTree import BKTree
+from fuzzy import topK
+from ngramIndex import NgramIndex
+
+
+SURNAMES = ["Назаренко Виктор Геннадьевич", "Иванов Иван Иванович", "Петров Петр Петрович", "Назарова Анна Ильинична"]
+
+
+def randomKeys(seed: int, count: int = 300) -> list:
+    generator = random.Random(seed)
+    return list(dict.fromkeys("".join(generator.choice("абвгде. ") for _ in range(generator.randint(3, 12)))
+                              for _ in range(count)))
+
+
+def bruteForce(targetLine: str, keys: list, k: int) -> list:
+    # Устойчивая сортировка всего множества - ответ, который должен совпасть с ограниченным поиском
+    return sorted(((key, distance(key, targetLine)) for key in keys), key=lambda pair: pair[1])[:k]
+
+
+class TopKTest(unittest.TestCase):
+    def test_matches_full_sort(self):
+        for seed in range(20):
+            keys = randomKeys(seed)
+            for targetLine in randomKeys(seed + 100, 5):
+                self.assertEqual(topK(targetLine, keys, 3), bruteForce(targetLine, keys, 3))
+
+    def test_positions_break_ties(self):
+        keys = ["ab", "ba", "aa", "bb"]
+        positions = {"bb": 0, "aa": 1, "ba": 2, "ab": 3}
+        self.assertEqual(topK("a", keys, 2), [("ab", 1), ("ba", 1)])
+        self.assertEqual(topK("a", keys, 2, positions), [("aa", 1), ("ba", 1)])
+        self.assertEqual(topK("a", reversed(keys), 2, positions), [("aa", 1), ("ba", 1)])
+
+    def test_exact_and_short(self):
+        self.assertEqual(topK("aa", ["ab", "aa", "aa "], 3), [("aa", 0), ("ab", 1), ("aa ", 1)])
+        self.assertEqual(topK("aa", ["ab"], 3), [("ab", 1)])
+        self.assertEqual(topK("aa", [], 3), [])
+
+
+class BKTreeTest(unittest.TestCase):
+    def test_within_matches_brute_force(self):
+        for seed in range(10):
+            keys = randomKeys(seed)
+            tree = BKTree(keys)
+            self.assertEqual(len(tree), len(keys))
+            for targetLine in randomKeys(seed + 100, 5):
+                expected = sorted((key, distance(key, targetLine)) for key in keys if distance(key, targetLine) <= 2)
+                self.assertEqual(sorted(tree.within(targetLine, 2)), expected)
+
+    def test_nearest_matches_top_k(self):
+        for seed in range(10):
+            keys = randomKeys(seed)
+            positions = {key: position for position, key in enumerate(keys)}
+            tree = BKTree(keys)
+            for targetLine in randomKeys(seed + 100, 5):
+                self.assertEqual(tree.nearest(targetLine, 3, positions), topK(targetLine, keys, 3, positions))
+                self.assertEqual([pair[1] for pair in tree.nearest(targetLine, 3)],
+                                 [pair[1] for pair in bruteForce(targetLine, keys, 3)])
+
+    def test_added_keeps_original(self):
+        keys = randomKeys(1)
+        tree = BKTree(keys[:200])
+        updated = tree.added(keys[200:] + keys[:5])
+        self.assertEqual((len(tree), len(updated)), (200, len(keys)))
+        self.assertEqual(sorted(updated.within(keys[250], 1)), sorted(BKTree(keys).within(keys[250], 1)))
+        self.assertNotIn(keys[250], [key for key, _ in tree.within(keys[250], 0)])
+
+
+class NgramIndexTest(unittest.TestCase):
+    def test_grams(self):
+        index = NgramIndex()
+        self.assertEqual(index.grams("Ёж"), {" еж", "еж "})
+        self.assertEqual(index.grams("  АБВ  Г "), {" аб", "абв", "бв ", "в г", " г "})
+
+    def test_candidates(self):
+        index = NgramIndex(SURNAMES)
+        self.assertEqual(index.candidates("назаренко виктор", 2), ["Назаренко Виктор Геннадьевич",
+                                                                   "Назарова Анна Ильинична"])
+        # Ключи без достаточной доли общих триграмм не отбираются
+        self.assertEqual(index.candidates("Сидорчук"), [])
+
+    def test_positions_and_added(self):
+        index = NgramIndex(SURNAMES[:2])
+        updated = index.added(SURNAMES[2:] + SURNAMES[:1])
+        self.assertEqual((len(index), len(updated)), (2, len(SURNAMES)))
+        positions = {key: position for position, key in enumerate(reversed(SURNAMES))}
+        self.assertEqual(updated.candidates("Назар", positions=positions),
+                         NgramIndex(reversed(SURNAMES)).candidates("Назар", positions=positions))
+        # Отбираются только ключи из positions
+        self.assertEqual(updated.candidates("Назар", positions={"Назарова Анна Ильинична": 0}),
+                         ["Назарова Анна Ильинична"])
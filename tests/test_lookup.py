@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+
+from bookFactory import writeBook
+from prefixIndex import PrefixIndex
+from search import CHOICE_HEADERS, Finder
+
+
+class LookupTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        cls.finder = Finder(writeBook(os.path.join(cls.directory.name, "Data.xlsx")))
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def assertTier(self, query: str, tier: str, kind: str, keys: list):
+        self.assertEqual(self.finder.lookup(query), (tier, [kind] + keys))
+
+    def test_tiers(self):
+        self.assertTier("Петров Петр Петрович", "raw", "persona", ["Петров Петр Петрович"])
+        self.assertTier("петров  петр петрович", "normalized", "persona", ["Петров Петр Петрович"])
+        self.assertTier("сектор «приказы»", "normalized", "structure", ["Сектор \"Приказы\""])
+        self.assertTier("Петров Петр", "prefix", "persona", ["Петров Петр Петрович"])
+        self.assertTier("Иванов Иван", "prefix", "persona", ["Иванов Иван Иванович", "Иванов Иван Сергеевич"])
+        self.assertTier("01.01", "raw", "num", ["01.01"])
+        self.assertEqual(self.finder.lookup("Петров Пётр Петрович")[0], "normalized")
+        self.assertEqual(self.finder.lookup("Петров Петр Петровис")[0], "fuzzy")
+
+    def test_code_tiers(self):
+        self.assertEqual(self.finder.lookup("01. 01", scored=True), ("normalized", ["num", ("01.01", 1)]))
+        self.assertTier("01.01.", "prefix", "num", ["01.01", "01.01.01"])
+        # Ветвь 01 больше PREFIX_TIER_LIMIT шифров - запрос слишком общий
+        self.assertEqual(self.finder.lookup("01.")[0], "fuzzy")
+        self.assertEqual(self.finder.rank("01. 01")["type"], "exact")
+
+    def test_answers(self):
+        self.assertEqual(self.finder.search("Петров Петр Петрович")[0], "Найдено точное совпадение!")
+        # Отличие только в регистре - тоже точное совпадение
+        self.assertEqual(self.finder.search("ПЕТРОВ ПЕТР ПЕТРОВИЧ")[0], "Найдено точное совпадение!")
+        self.assertEqual(self.finder.search("Петров Петр")[0],
+                         "Точного совпадения нет.. но запрос совпадает с началом строки!")
+        answer = self.finder.search("Иванов Иван")
+        self.assertEqual(answer[0], CHOICE_HEADERS[2])
+        self.assertEqual([item[0] for item in answer[1:]], ["Иванов Иван Иванович", "Иванов Иван Сергеевич"])
+        self.assertEqual(self.finder.search("Сидор")[0], "Точного совпадения нет.. но найдено вхождение в строку!")
+        self.assertEqual(self.finder.search("Петров Петр Петровис")[0], CHOICE_HEADERS[0])
+
+    def test_rank(self):
+        rank = self.finder.rank("петров петр петрович")
+        self.assertEqual((rank["type"], rank["tier"]), ("exact", "normalized"))
+        self.assertEqual(self.finder.rank("Петров Петр")["type"], "prefix")
+        # Вхождение в строку, найденное классификатором, тоже получает расстояние до ключа
+        rank = self.finder.rank("Сидор")
+        self.assertEqual((rank["type"], rank["candidates"]), ("substring", [["Сидоров Олег Ильич", 13]]))
+
+
+class PrefixIndexTest(unittest.TestCase):
+    def test_exact_after_update(self):
+        index = PrefixIndex([("persona", ["Иванов Иван", "ИВАНОВ ИВАН"]), ("structure", ["Отдел"])])
+        self.assertEqual(index.exact("иванов  иван"), [("persona", "Иванов Иван"), ("persona", "ИВАНОВ ИВАН")])
+
+        updated = index.updated([("structure", "отдел")], [("persona", "Иванов Иван")])
+        self.assertEqual(updated.exact("ИВАНОВ ИВАН"), [("persona", "ИВАНОВ ИВАН")])
+        self.assertEqual(updated.exact("Отдел"), [("structure", "Отдел"), ("structure", "отдел")])
+        # Текущий индекс не меняется
+        self.assertEqual(index.exact("Отдел"), [("structure", "Отдел")])
+        self.assertEqual(updated.startingWith("ива"), [("persona", "ИВАНОВ ИВАН")])
@@ -0,0 +1,58 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from bookFactory import PERSONAS, writeBook
+from lruCache import LRUCache
+from search import Finder
+
+
+class LRUCacheTest(unittest.TestCase):
+    def test_eviction(self):
+        cache = LRUCache(maxSize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+        cache.put("c", 3)
+        # Вытесняется давно не использованная запись "b", а не первая добавленная
+        self.assertNotIn("b", cache)
+        self.assertEqual((cache.get("a"), cache.get("c")), (1, 3))
+        self.assertEqual((cache.hits, cache.misses, cache.evictions), (3, 0, 1))
+
+    def test_ttl(self):
+        cache = LRUCache(ttl=10.0)
+        with mock.patch("lruCache.time.monotonic", return_value=100.0):
+            cache.put("a", 1)
+        with mock.patch("lruCache.time.monotonic", return_value=109.0):
+            self.assertEqual(cache.get("a"), 1)
+        with mock.patch("lruCache.time.monotonic", return_value=110.0):
+            self.assertNotIn("a", cache)
+            self.assertIsNone(cache.get("a"))
+        self.assertEqual((len(cache), cache.misses), (0, 1))
+
+
+class FinderCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = writeBook(os.path.join(self.directory.name, "Data.xlsx"))
+        self.finder = Finder(self.path)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_reload_clears_cache(self):
+        query = "Петров Петр Петрович"
+        self.assertEqual(self.finder.search(query)[1][1].position, "Директор")
+        self.assertEqual(self.finder.search(query)[1][1].position, "Директор")
+        self.assertEqual(self.finder.cache.hits, 1)
+
+        personas = [(name, "Заместитель директора" if name == query else post) for name, post in PERSONAS]
+        writeBook(self.path, personas)
+        self.assertTrue(self.finder.reload())
+        self.assertEqual(self.finder.search(query)[1][1].position, "Заместитель директора")
+        self.assertEqual(self.finder.cache.hits, 1)
+        # Книга не менялась - кэш сохраняется
+        self.assertFalse(self.finder.reload())
+        self.finder.search(query)
+        self.assertEqual(self.finder.cache.hits, 2)
@@ -0,0 +1,43 @@
+import unittest
+
+from numParser import NumParser
+
+
+CODES = ("23", "30", "33", "23.03", "23.02", "25.03", "01.09.10", "01.09.01.06", "01.09.01.07", "01.08.01.06",
+         "22.01.01", "22.01.02", "22.01.01.01", "22.04.01.01", "Без кода 1")
+
+
+def makeParser() -> NumParser:
+    rows = [(f"Подразделение {code}", code) for code in CODES]
+    return NumParser("", rows=rows)
+
+
+class NumParserTypoTest(unittest.TestCase):
+    def setUp(self):
+        self.parser = makeParser()
+
+    def assertBest(self, query: str, code: str, codeDistance: int):
+        nearest = self.parser.findScored(query)
+        self.assertEqual(nearest[0], (code, codeDistance))
+        # Ответ не хуже полного поиска по BK-дереву
+        self.assertEqual([pair[1] for pair in nearest], [pair[1] for pair in self.parser.numIndex.nearest(query, 3)])
+
+    def test_exact(self):
+        self.assertEqual(self.parser.findScored("23.03"), [("23.03", 0)])
+
+    def test_digit_typo(self):
+        self.assertBest("25.08", "25.03", 1)
+
+    def test_separator_typo(self):
+        self.assertBest("23y03", "23.03", 1)
+        self.assertBest("01.09.01е06", "01.09.01.06", 1)
+        self.assertBest("22x01.01.01", "22.01.01.01", 1)
+
+    def test_wrong_segment_count(self):
+        # Лишний сегмент и пропущенный сегмент
+        self.assertBest("22.01.01.01.5", "22.01.01.01", 2)
+        self.assertBest("01.0901.06", "01.09.01.06", 1)
+
+    def test_no_code(self):
+        self.assertEqual(self.parser.findScored("Без кода 2")[0], ("Без кода 1", 1))
+
@@ -0,0 +1,53 @@
+import os
+import tempfile
+import unittest
+
+from bookFactory import writeBook
+from orgGraph import NO_PARENT, OrgGraph
+from search import Finder
+
+
+LINKS = [("Институт", NO_PARENT, NO_PARENT), ("Кафедра", "Институт", "Институт"),
+         ("Лаборатория", "Кафедра", "Институт"), ("Сектор", NO_PARENT, "Институт"),
+         ("Группа", "Отдел", NO_PARENT), ("Кафедра", "Сектор", "Институт")]
+
+
+class OrgGraphTest(unittest.TestCase):
+    def setUp(self):
+        self.graph = OrgGraph(LINKS)
+
+    def test_subunits(self):
+        self.assertEqual(self.graph.subunits("Институт"), [("Кафедра", 1), ("Лаборатория", 2), ("Сектор", 1)])
+        self.assertEqual(self.graph.subunits("Лаборатория"), [])
+        self.assertEqual(self.graph.subunits("Нет такого"), [])
+        # Вышестоящее подразделение без собственной строки тоже становится вершиной
+        self.assertEqual(self.graph.subunits("Отдел"), [("Группа", 1)])
+
+    def test_path_to_root(self):
+        # Повторная строка "Кафедра" не меняет первое указанное вышестоящее подразделение
+        self.assertEqual(self.graph.pathToRoot("Лаборатория"), ["Лаборатория", "Кафедра", "Институт"])
+        self.assertEqual(self.graph.pathToRoot("Сектор"), ["Сектор", "Институт"])
+        self.assertEqual(self.graph.childrenOf("Институт"), ["Кафедра", "Сектор"])
+        self.assertEqual(self.graph.pathToRoot("Нет такого"), [])
+
+    def test_cycle(self):
+        graph = OrgGraph([("А", "Б", None), ("Б", "А", None), ("В", "Б", None)])
+        self.assertEqual(len(graph), 3)
+        self.assertEqual(graph.pathToRoot("В"), ["В", "Б", "А"])
+        self.assertEqual(sorted(graph.subunits("А")), [("Б", 1), ("В", 2)])
+
+
+class FinderHierarchyTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.finder = Finder(writeBook(os.path.join(self.directory.name, "Data.xlsx")))
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_by_name_and_code(self):
+        self.assertEqual(self.finder.subunits("01"), ("Институт", [("Кафедра физики", 1), ("Лаборатория оптики", 2),
+                                                                   ("Кафедра химии", 1)]))
+        self.assertEqual(self.finder.pathToRoot("Лаборатория оптики"),
+                         ("Лаборатория оптики", ["Лаборатория оптики", "Кафедра физики", "Институт"]))
+        self.assertEqual(self.finder.subunits("Нет такого подразделения"), (None, []))
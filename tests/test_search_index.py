@@ -0,0 +1,75 @@
+import random
+import unittest
+
+from bkTree import BKTree
+from searchIndex import SearchIndex
+from substringIndex import SubstringIndex
+
+
+SURNAMES = ["Назаренко Виктор Геннадьевич", "Иванов Иван Иванович", "Петров Петр Петрович", "Назарова Анна Ильинична"]
+CODES = ["37.01", "77.01", "17.01", "37.11", "01.02", "02.02", "03.02", "12.03"]
+
+
+def nearestAll(index: SearchIndex, queries) -> list:
+    return [index.nearest(query, 3) for query in queries]
+
+
+class SubstringIndexTest(unittest.TestCase):
+    def test_first_in_book_order(self):
+        index = SubstringIndex(SURNAMES)
+        self.assertEqual(index.first("назар"), "Назаренко Виктор Геннадьевич")
+        self.assertEqual(index.find("ов"), ["Иванов Иван Иванович", "Петров Петр Петрович", "Назарова Анна Ильинична"])
+        self.assertIsNone(index.first("сидор"))
+
+    def test_long_common_prefixes(self):
+        # Суффиксы совпадают дольше одного куска сортировки: порядок решают следующие куски
+        texts = ["отдел " * 6 + "б", "отдел " * 6 + "а", "отдел " * 5, "отдел " * 6]
+        index = SubstringIndex(texts)
+        # Суффикс сравнивается в пределах своей строки (до разделителя включительно)
+        suffixes = [index.text[position:index.text.index("\x00", position) + 1] for position in index.suffixes]
+        self.assertEqual(suffixes, sorted(suffixes))
+        self.assertEqual(index.find("отдел а"), [texts[1]])
+        self.assertEqual(index.find("отдел " * 6), [texts[0], texts[1], texts[3]])
+        self.assertEqual(index.first("отдел " * 5 + "о"), texts[0])
+
+    def test_update_matches_rebuild(self):
+        # Новая строка вставлена в начало книги: она должна быть первой и после обновления, а не после старых строк
+        texts = ["Назаренко Алексей Викторович"] + SURNAMES[:2] + SURNAMES[3:]
+        positions = {text: position for position, text in enumerate(texts)}
+        updated = SubstringIndex(SURNAMES).updated(texts[:1], positions)
+        rebuilt = SubstringIndex(texts)
+        for pattern in ("назар", "ов", "петр", "ич", "алексей"):
+            self.assertEqual(updated.find(pattern), rebuilt.find(pattern), pattern)
+            self.assertEqual(updated.first(pattern), rebuilt.first(pattern), pattern)
+
+    def test_moved_rows(self):
+        texts = list(reversed(SURNAMES))
+        updated = SubstringIndex(SURNAMES).updated([], {text: position for position, text in enumerate(texts)})
+        self.assertEqual(updated.first("назар"), "Назарова Анна Ильинична")
+
+
+class NearestTest(unittest.TestCase):
+    def test_ties_in_book_order(self):
+        index = SearchIndex(CODES)
+        self.assertEqual(index.nearest("37.0", 3), [("37.01", 1), ("77.01", 2), ("17.01", 2)])
+        self.assertEqual(index.within("37.0", 2), [("37.01", 1), ("77.01", 2), ("17.01", 2), ("37.11", 2)])
+
+    def test_bk_tree_ties_do_not_depend_on_insertion_order(self):
+        positions = {key: position for position, key in enumerate(CODES)}
+        expected = BKTree(CODES).nearest("02.0", 3, positions)
+        for seed in range(10):
+            keys = list(CODES)
+            random.Random(seed).shuffle(keys)
+            self.assertEqual(BKTree(keys).nearest("02.0", 3, positions), expected)
+
+    def test_update_matches_rebuild(self):
+        queries = ["37.0", "02.0", "7.01", "1.0", "03.03", "Назаренко", "Назарено Виктор"]
+        for useGrams, keys in ((False, CODES), (True, SURNAMES)):
+            removed = keys[1]
+            added = ["70.01", "Назаренко Алексей Викторович", "17.02"]
+            newKeys = added[:1] + [key for key in keys if key != removed] + added[1:]
+            updated = SearchIndex(keys, useGrams=useGrams).updated(newKeys, added, [removed])
+            rebuilt = SearchIndex(newKeys, useGrams=useGrams)
+            self.assertEqual(nearestAll(updated, queries), nearestAll(rebuilt, queries))
+            self.assertEqual([updated.firstContaining(query[:4]) for query in queries],
+                             [rebuilt.firstContaining(query[:4]) for query in queries])
@@ -0,0 +1,65 @@
+import asyncio
+import unittest
+
+from telegram.error import RetryAfter
+
+from sendQueue import BULK, SendQueue
+
+
+class SendQueueTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.queue = SendQueue(globalRate=1000.0, chatRate=1000.0, chatBurst=1000.0, maxRetries=2)
+        self.log = []
+
+    async def asyncTearDown(self):
+        await self.queue.stop()
+
+    def request(self, chatId: int, text: str, delay: float = 0.0):
+        async def send():
+            self.log.append((chatId, text, "start"))
+            await asyncio.sleep(delay)
+            self.log.append((chatId, text, "end"))
+            return text
+        return lambda: send()
+
+    async def test_chat_order(self):
+        sends = [self.queue.send(1, self.request(1, "a", 0.02)), self.queue.send(1, self.request(1, "b"), BULK),
+                 self.queue.send(2, self.request(2, "c")), self.queue.send(1, self.request(1, "d"))]
+        self.assertEqual(await asyncio.gather(*sends), ["a", "b", "c", "d"])
+        # Сообщения одного чата уходят по одному и по порядку, а другой чат не ждет их
+        self.assertEqual([entry for entry in self.log if entry[0] == 1],
+                         [(1, "a", "start"), (1, "a", "end"), (1, "b", "start"), (1, "b", "end"),
+                          (1, "d", "start"), (1, "d", "end")])
+        self.assertLess(self.log.index((2, "c", "end")), self.log.index((1, "a", "end")))
+        self.assertEqual((self.queue.sent, self.queue.queueDepth), (4, 0))
+
+    async def test_retry_after(self):
+        attempts = []
+
+        async def send():
+            attempts.append(asyncio.get_running_loop().time())
+            if len(attempts) == 1:
+                raise RetryAfter(0.05)
+            return "ok"
+
+        self.assertEqual(await self.queue.send(1, lambda: send()), "ok")
+        self.assertEqual(self.queue.retries, 1)
+        self.assertGreaterEqual(attempts[1] - attempts[0], 0.04)
+
+    async def test_gives_up_after_max_retries(self):
+        async def send():
+            raise RetryAfter(0.01)
+
+        with self.assertRaises(RetryAfter):
+            await self.queue.send(1, lambda: send())
+        self.assertEqual((self.queue.retries, self.queue.sent), (2, 0))
+        # Очередь чата освобождается и после ошибки
+        self.assertEqual(await self.queue.send(1, self.request(1, "a")), "a")
+
+    async def test_error_is_returned_to_sender(self):
+        async def send():
+            raise ValueError("bad request")
+
+        with self.assertRaises(ValueError):
+            await self.queue.send(1, lambda: send())
+        self.assertEqual(await self.queue.send(1, self.request(1, "a")), "a")
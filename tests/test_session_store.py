@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from sessionStore import MemorySessionStore, Session, SqliteSessionStore, openSessionStore
+
+
+class SqliteSessionStoreTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "sessions.db")
+        self.clock = mock.patch("sessionStore.time.time", return_value=1000.0)
+        self.now = self.clock.start()
+        self.store = SqliteSessionStore(self.path, maxSessions=2, ttl=100.0, evictEvery=1000)
+
+    def tearDown(self):
+        self.store.close()
+        self.clock.stop()
+        self.directory.cleanup()
+
+    def test_survives_reopen(self):
+        self.store.setLastQuery(1, "Иванов")
+        self.store.setResult(1, "persona", "Иванов Иван Иванович", b"v1")
+        self.assertEqual(self.store.get(1), Session("persona", "Иванов Иван Иванович", b"v1", "Иванов"))
+        self.store.close()
+
+        self.store = SqliteSessionStore(self.path, maxSessions=2, ttl=100.0)
+        self.assertEqual(self.store.get(1), Session("persona", "Иванов Иван Иванович", b"v1", "Иванов"))
+        self.assertIsNone(self.store.get(2))
+
+    def test_ttl(self):
+        self.store.setLastQuery(1, "Иванов")
+        self.now.return_value = 1099.0
+        self.assertIsNotNone(self.store.get(1))
+        self.now.return_value = 1100.0
+        # Просроченная запись не выдается, а удаляется при очистке
+        self.assertIsNone(self.store.get(1))
+        self.assertEqual(len(self.store), 1)
+        self.assertEqual(self.store.evict(), 1)
+        self.assertEqual(len(self.store), 0)
+
+    def test_evicts_least_recently_updated(self):
+        for userId in (1, 2, 3):
+            self.now.return_value += 1
+            self.store.setLastQuery(userId, str(userId))
+        self.now.return_value += 1
+        self.store.setLastQuery(1, "снова")
+        self.assertEqual(self.store.evict(), 1)
+        self.assertIsNone(self.store.get(2))
+        self.assertEqual((self.store.get(1).lastQuery, self.store.get(3).lastQuery), ("снова", "3"))
+
+    def test_periodic_eviction(self):
+        self.store.close()
+        self.store = SqliteSessionStore(self.path, maxSessions=2, ttl=100.0, evictEvery=4)
+        for userId in range(4):
+            self.now.return_value += 1
+            self.store.setLastQuery(userId, str(userId))
+        self.assertEqual(len(self.store), 2)
+
+
+class MemorySessionStoreTest(unittest.TestCase):
+    def test_state(self):
+        store = openSessionStore("", maxSessions=1)
+        self.assertIsInstance(store, MemorySessionStore)
+        store.setLastQuery(1, "Иванов")
+        store.setResult(1, "persona", "Иванов Иван Иванович", b"v1")
+        self.assertEqual(store.get(1), Session("persona", "Иванов Иван Иванович", b"v1", "Иванов"))
+        store.setResult(2, "structure", "Институт", b"v1")
+        self.assertIsNone(store.get(1))
+        self.assertEqual(len(store), 1)
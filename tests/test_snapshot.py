@@ -0,0 +1,48 @@
+import os
+import pickle
+import tempfile
+import unittest
+
+from snapshot import HEADER, SNAPSHOT_MAGIC, SNAPSHOT_VERSION, loadSnapshot, saveSnapshot
+
+
+class Broken:
+    def __reduce__(self):
+        return (int, (None,))
+
+
+class SnapshotTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "Data.xlsx.snapshot")
+        self.contentHash = b"\x01" * 32
+
+    def test_roundtrip(self):
+        self.assertTrue(saveSnapshot(self.path, self.contentHash, {"key": [1, 2]}))
+        self.assertEqual(loadSnapshot(self.path, self.contentHash), {"key": [1, 2]})
+        self.assertIsNone(loadSnapshot(self.path, b"\x02" * 32))
+
+    def test_missing(self):
+        self.assertIsNone(loadSnapshot(self.path, self.contentHash))
+
+    def test_broken_payload(self):
+        # Unpickle падает с TypeError из конструктора - снимок должен просто пересобираться
+        with open(self.path, "wb") as file:
+            file.write(HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, self.contentHash))
+            pickle.dump(Broken(), file)
+        with self.assertLogs("snapshot", "WARNING"):
+            self.assertIsNone(loadSnapshot(self.path, self.contentHash))
+
+    def test_truncated_payload(self):
+        self.assertTrue(saveSnapshot(self.path, self.contentHash, list(range(1000))))
+        with open(self.path, "r+b") as file:
+            file.truncate(HEADER.size + 10)
+        with self.assertLogs("snapshot", "WARNING"):
+            self.assertIsNone(loadSnapshot(self.path, self.contentHash))
+
+    def test_unpicklable_data(self):
+        with self.assertLogs("snapshot", "WARNING"):
+            self.assertFalse(saveSnapshot(self.path, self.contentHash, {"key": lambda: None}))
+        self.assertEqual(os.listdir(os.path.dirname(self.path)), [])
+
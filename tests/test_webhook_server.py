@@ -0,0 +1,69 @@
+import asyncio
+import json
+import unittest
+
+from webhookServer import WebhookServer
+
+
+UPDATE = {"update_id": 1, "message": {"message_id": 1, "date": 0, "chat": {"id": 1, "type": "private"},
+                                      "text": "/start"}}
+BODY = json.dumps(UPDATE).encode()
+
+
+class FakeApplication:
+    def __init__(self):
+        self.bot = None
+        self.update_queue = asyncio.Queue()
+
+
+async def request(server: WebhookServer, head: str, body: bytes = b"") -> int:
+    reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+    writer.write(head.encode("latin-1") + b"\r\n\r\n" + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    writer.close()
+    return status
+
+
+def post(secret: str) -> str:
+    return (f"POST /telegram HTTP/1.1\r\nContent-Length: {len(BODY)}\r\nConnection: close\r\n"
+            f"X-Telegram-Bot-Api-Secret-Token: {secret}")
+
+
+class WebhookServerTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.application = FakeApplication()
+        self.server = WebhookServer(self.application, host="127.0.0.1", port=0, secretToken="secret", maxQueued=1)
+        await self.server.start()
+
+    async def asyncTearDown(self):
+        await self.server.stop()
+
+    def test_secret_is_required(self):
+        with self.assertRaises(ValueError):
+            WebhookServer(self.application, secretToken=None)
+
+    async def test_update_is_queued(self):
+        self.assertEqual(await request(self.server, post("secret"), BODY), 200)
+        self.assertEqual((await self.application.update_queue.get()).update_id, 1)
+
+    async def test_wrong_secret(self):
+        self.assertEqual(await request(self.server, post("wrong"), BODY), 401)
+        self.assertEqual(await request(self.server, "POST /telegram HTTP/1.1\r\nContent-Length: 2", b"{}"), 401)
+        self.assertTrue(self.application.update_queue.empty())
+
+    async def test_non_ascii_secret(self):
+        # Байты вне ASCII в заголовке - просто неверный токен, а не оборванное соединение
+        self.assertEqual(await request(self.server, post("séçret"), BODY), 401)
+
+    async def test_full_queue(self):
+        self.assertEqual(await request(self.server, post("secret"), BODY), 200)
+        self.assertEqual(await request(self.server, post("secret"), BODY), 503)
+        self.assertEqual(self.server.rejected, 1)
+
+    async def test_length_required(self):
+        head = "POST /telegram HTTP/1.1\r\nX-Telegram-Bot-Api-Secret-Token: secret\r\nTransfer-Encoding: chunked"
+        self.assertEqual(await request(self.server, head), 411)
+
+    async def test_healthz(self):
+        self.assertEqual(await request(self.server, "GET /healthz HTTP/1.1\r\nConnection: close"), 200)
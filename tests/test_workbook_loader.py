@@ -0,0 +1,37 @@
+import os
+import tempfile
+import unittest
+
+import openpyxl
+
+from workbookLoader import PERSONA_SHEET, STRUCTURE_SHEET, getValue, loadWorkbook
+
+
+class LoadWorkbookTest(unittest.TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "Data.xlsx")
+
+        workbook = openpyxl.Workbook()
+        persona = workbook.active
+        persona.title = PERSONA_SHEET
+        persona.append(("ФИО", "Должность"))
+        persona.append(("Иванов Иван Иванович", "=A2"))
+        structure = workbook.create_sheet(STRUCTURE_SHEET)
+        structure.append(("Наименование", "Код"))
+        structure.append(("Отдел", "01"))
+        workbook.save(self.path)
+
+    def test_rows_without_header(self):
+        sheets = loadWorkbook(self.path)
+        self.assertEqual(sheets[STRUCTURE_SHEET], [("Отдел", "01")])
+
+    def test_formula_text_is_kept(self):
+        # Как и прежнее чтение через ячейки: формула возвращается текстом, а не сохраненным значением
+        self.assertEqual(loadWorkbook(self.path, (PERSONA_SHEET,))[PERSONA_SHEET], [("Иванов Иван Иванович", "=A2")])
+
+    def test_get_value(self):
+        self.assertEqual(getValue(("a", None), 1), "нет")
+        self.assertEqual(getValue(("a",), 3, "-"), "-")
+        self.assertEqual(getValue((1, 2), 1), "2")
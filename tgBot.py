@@ -1,29 +1,100 @@
+import asyncio
 import logging
-from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, CallbackQueryHandler, MessageHandler, filters, ContextTypes
-from search import Finder
+from telegram import (Update, CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, InlineQueryResultArticle,
+                      InputTextMessageContent)
+from telegram.ext import (Application, CommandHandler, CallbackQueryHandler, InlineQueryHandler, MessageHandler, filters,
+                          ContextTypes)
+from search import Finder, CHOICE_HEADERS
+from searchPool import SearchPool
+from lruCache import LRUCache
+from dataWatcher import DataWatcher
+from webhookServer import WebhookServer
+from sessionStore import openSessionStore
+from sendQueue import SendQueue, INTERACTIVE, BULK
+from metrics import (REGISTRY, Counter, Gauge, MetricsServer, RequestIdFilter, newRequestId, searchTiers, stageSeconds,
+                     timed)
 import os
+import signal
 
-# Настройка логирования
-logging.basicConfig(format='%(asctime)s - %(name)s - %(levelname)s - %(message)s', level=logging.INFO)
+# Настройка логирования. В каждую запись добавляется идентификатор запроса пользователя
+logging.basicConfig(format='%(asctime)s - %(name)s - [%(requestId)s] - %(levelname)s - %(message)s', level=logging.INFO)
+for handler in logging.getLogger().handlers:
+    handler.addFilter(RequestIdFilter())
 logger = logging.getLogger(__name__)
+# STAGE_TRACE=1 включает построчный лог длительности каждого этапа каждого запроса
+if os.getenv("STAGE_TRACE") == "1":
+    logging.getLogger("metrics").setLevel(logging.DEBUG)
 
-finder = Finder("/app/Data.xlsx")
+finder = Finder("/app/Data.xlsx", snapshotPath=os.getenv("SNAPSHOT_PATH"),
+                cacheSize=int(os.getenv("SEARCH_CACHE_SIZE", "1024")),
+                cacheTtl=float(os.getenv("SEARCH_CACHE_TTL", "600")))
+# Поиск выполняется в пуле потоков, чтобы долгий запрос не блокировал обработку сообщений других пользователей
+searchPool = SearchPool(finder, workers=int(os.getenv("SEARCH_WORKERS", "4")),
+                        timeout=float(os.getenv("SEARCH_TIMEOUT", "10")))
+# Показанные пользователю ближайшие результаты: (chat_id, message_id сообщения с кнопками) -> список пар (вид, ключ).
+# Нажатие на кнопку choice_N берет ключ отсюда, не повторяя поиск, а записи берутся из текущих данных.
+candidateStore = LRUCache(maxSize=int(os.getenv("CANDIDATE_STORE_SIZE", "10000")),
+                          ttl=float(os.getenv("CANDIDATE_STORE_TTL", "86400")))
+# Сколько вложенных подразделений выводит команда /subunits
+SUBUNITS_LIMIT = int(os.getenv("SUBUNITS_LIMIT", "200"))
+# Сколько кнопок со связанными подразделениями / руководителями показывается под результатом
+LINKS_LIMIT = int(os.getenv("LINKS_LIMIT", "8"))
+# Исходящие сообщения проходят через очередь с ограничением частоты (лимиты Telegram: около 30 сообщений в секунду
+# на бота и около 1 в секунду на чат)
+sendQueue = SendQueue(globalRate=float(os.getenv("SEND_GLOBAL_RATE", "30")),
+                      chatRate=float(os.getenv("SEND_CHAT_RATE", "1")),
+                      chatBurst=float(os.getenv("SEND_CHAT_BURST", "3")),
+                      maxRetries=int(os.getenv("SEND_MAX_RETRIES", "5")))
+# Разбиение текста записи на сообщения кэшируется: одни и те же записи запрашиваются многими пользователями
+messagePartsCache = LRUCache(maxSize=int(os.getenv("MESSAGE_PARTS_CACHE_SIZE", "4096")),
+                             ttl=float(os.getenv("SEARCH_CACHE_TTL", "600")))
+# Состояние пользователя (что ему показано и последний запрос) хранится вне памяти обработчиков: в SQLite, если задан
+# SESSION_DB, иначе в ограниченном кэше в памяти
+sessionStore = openSessionStore(os.getenv("SESSION_DB", ""),
+                                maxSessions=int(os.getenv("SESSION_MAX_USERS", "100000")),
+                                ttl=float(os.getenv("SESSION_TTL", "86400")))
+# Inline-режим (@bot запрос): сколько подсказок показывать и сколько секунд Telegram может кэшировать ответ
+INLINE_LIMIT = int(os.getenv("INLINE_LIMIT", "10"))
+INLINE_CACHE_TIME = int(os.getenv("INLINE_CACHE_TIME", "60"))
+# Пользователи Telegram (id через запятую), которым доступна команда /stats
+ADMIN_IDS = {int(user_id) for user_id in os.getenv("ADMIN_IDS", "").replace(" ", "").split(",") if user_id}
 
-def generate_preview_texts(texts, name, result_type):
+# Метрики состояния пула поиска, кэшей и перезагрузки данных; длительности этапов пишутся через metrics.timed
+REGISTRY.register(Gauge("cmbot_search_pool_size", "Число потоков пула поиска.", source=lambda: searchPool.size))
+REGISTRY.register(Gauge("cmbot_search_queue_depth", "Запросы в пуле поиска (ожидающие и выполняющиеся).",
+                        source=lambda: searchPool.queueDepth))
+REGISTRY.register(Counter("cmbot_search_cache_hits_total", "Попадания в кэш ответов.",
+                          source=lambda: finder.cache.hits))
+REGISTRY.register(Counter("cmbot_search_cache_misses_total", "Промахи кэша ответов.",
+                          source=lambda: finder.cache.misses))
+REGISTRY.register(Counter("cmbot_search_cache_evictions_total", "Вытеснения из кэша ответов.",
+                          source=lambda: finder.cache.evictions))
+REGISTRY.register(Gauge("cmbot_search_cache_entries", "Записи в кэше ответов.", source=lambda: len(finder.cache)))
+REGISTRY.register(Gauge("cmbot_candidate_store_entries", "Сохраненные списки ближайших результатов.",
+                        source=lambda: len(candidateStore)))
+REGISTRY.register(Counter("cmbot_data_reloads_total", "Перезагрузки книги с данными.",
+                          source=lambda: finder.reloadCount))
+REGISTRY.register(Gauge("cmbot_data_last_reload_seconds", "Длительность последней перезагрузки данных.",
+                        source=lambda: finder.lastReloadDuration or 0))
+REGISTRY.register(Gauge("cmbot_data_last_reload_timestamp_seconds", "Время последней перезагрузки данных (unix).",
+                        source=lambda: finder.lastReloadTime or 0))
+REGISTRY.register(Gauge("cmbot_sessions", "Сохраненные состояния пользователей.", source=lambda: len(sessionStore)))
+REGISTRY.register(Gauge("cmbot_send_queue_depth", "Сообщения, ожидающие отправки.",
+                        source=lambda: sendQueue.queueDepth))
+REGISTRY.register(Counter("cmbot_send_messages_total", "Отправленные сообщения.", source=lambda: sendQueue.sent))
+REGISTRY.register(Counter("cmbot_send_retries_total", "Повторные отправки после ответа Too Many Requests.",
+                          source=lambda: sendQueue.retries))
+
+async def reply(message, text, priority=INTERACTIVE, **kwargs):
+    return await sendQueue.send(message.chat_id, lambda: message.reply_text(text, **kwargs), priority)
+
+def generate_preview_texts(records, name, result_type):
     previews = ["Выберите номер:"]
-    for index, text in enumerate(texts, start=1):
+    for index, record in enumerate(records, start=1):
         if result_type == 'persona':
-            position_line = next((line for line in text.split('\n') if 'Должность:' in line), "Должность: Неизвестна")
-            position = position_line.split(': ')[1] if ': ' in position_line else "Неизвестна"
-            previews.append(f"{index}. {name.title()} ({position.rstrip(';')})")
+            previews.append(f"{index}. {name.title()} ({record.position})")
         elif result_type == 'department':
-            department_line = next((line for line in text.split('\n') if 'Наименование:' in line), None)
-            upper_department_line = next((line for line in text.split('\n') if 'Вышестоящее подразделение верхнего уровня:' in line), None)
-
-            department_name = department_line.split(': ')[1] if department_line and ': ' in department_line else name
-            upper_department = upper_department_line.split(': ')[1] if upper_department_line and ': ' in upper_department_line else "Неизвестно"
-            previews.append(f"{index}. {department_name.title()} ({upper_department.rstrip(';')})")
+            previews.append(f"{index}. {record.name.title()} ({record.topParent})")
     return previews
 
 def prepare_message_parts(text, max_length=4096):
@@ -43,6 +114,15 @@ def prepare_message_parts(text, max_length=4096):
 
     return result
 
+def record_message_parts(record):
+    # Записи материализуются заново при каждом показе, поэтому ключом служат значения полей, а не сам объект
+    key = (type(record).__name__, record.values())
+    parts = messagePartsCache.get(key)
+    if parts is None:
+        parts = prepare_message_parts(record.render())
+        messagePartsCache.put(key, parts)
+    return parts
+
 def create_pagination_keyboard(texts, current_page=0, page_size=5):
     keyboard = []
     page_texts = texts[current_page*page_size:(current_page+1)*page_size]
@@ -56,78 +136,219 @@ def create_pagination_keyboard(texts, current_page=0, page_size=5):
     return InlineKeyboardMarkup(keyboard)
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
-    await update.message.reply_text('Привет! Я - чат-бот управления делами.\nВведите ФИО руководителя, '
-                                    'наименование подразделения или шифр подразделения для поиска в моей базе знаний!')
+    await reply(update.message, 'Привет! Я - чат-бот управления делами.\nВведите ФИО руководителя, '
+                                    'наименование подразделения или шифр подразделения для поиска в моей базе знаний!\n'
+                                    '/subunits <подразделение> - все вложенные подразделения\n'
+                                    '/path <подразделение> - цепочка вышестоящих подразделений')
+
+async def stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_user is None or update.effective_user.id not in ADMIN_IDS:
+        return
+
+    lines = ["Этапы обработки (количество, p50 / p95 / p99, мс):"]
+    for (stage,), (_, _, count) in sorted(stageSeconds.snapshot().items()):
+        p50, p95, p99 = (stageSeconds.quantile(q, stage) * 1000 for q in (0.5, 0.95, 0.99))
+        lines.append(f"{stage}: {count}, {p50:.1f} / {p95:.1f} / {p99:.1f}")
+    tiers = sorted(searchTiers.values().items(), key=lambda item: -item[1])
+    lines.append("Ответы по уровням поиска: " + (", ".join(f"{tier}: {count}" for (tier,), count in tiers) or "нет"))
+    lines.append(f"Пул поиска: {searchPool.size} потоков, в очереди: {searchPool.queueDepth}")
+    lines.append(f"Кэш ответов: {len(finder.cache)} записей, попаданий: {finder.cache.hits}, "
+                 f"промахов: {finder.cache.misses}, вытеснений: {finder.cache.evictions}")
+    lines.append(f"Перезагрузок данных: {finder.reloadCount}"
+                 + (f", последняя за {finder.lastReloadDuration:.2f} с." if finder.lastReloadDuration else ""))
+    await reply(update.message, '\n'.join(lines))
+
+async def subunits(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    newRequestId()
+    user_input = ' '.join(context.args)
+    if not user_input:
+        await reply(update.message, 'Укажите наименование или шифр подразделения: /subunits <подразделение>')
+        return
+
+    logger.info(f'Запрос вложенных подразделений: "{user_input}"')
+    try:
+        name, units = await searchPool.run("subunits", finder.subunits, user_input)
+    except asyncio.TimeoutError:
+        await reply(update.message, 'Поиск занял слишком много времени. Попробуйте уточнить запрос.')
+        return
+
+    if name is None:
+        await reply(update.message, 'Данные не найдены!')
+    elif not units:
+        await reply(update.message, f'У подразделения "{name}" нет вложенных подразделений.')
+    else:
+        # Вложенность показывается отступом; слишком длинный список обрезается
+        lines = [f'Подразделения в составе "{name}" ({len(units)}):']
+        lines.extend(f"{'  ' * (level - 1)}• {unit}" for unit, level in units[:SUBUNITS_LIMIT])
+        if len(units) > SUBUNITS_LIMIT:
+            lines.append(f"... и еще {len(units) - SUBUNITS_LIMIT}")
+        for index, part in enumerate(prepare_message_parts('\n'.join(lines))):
+            await reply(update.message, part, priority=INTERACTIVE if index == 0 else BULK)
+
+async def path(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    newRequestId()
+    user_input = ' '.join(context.args)
+    if not user_input:
+        await reply(update.message, 'Укажите наименование или шифр подразделения: /path <подразделение>')
+        return
+
+    logger.info(f'Запрос цепочки вышестоящих подразделений: "{user_input}"')
+    try:
+        name, chain = await searchPool.run("path", finder.pathToRoot, user_input)
+    except asyncio.TimeoutError:
+        await reply(update.message, 'Поиск занял слишком много времени. Попробуйте уточнить запрос.')
+        return
+
+    if name is None:
+        await reply(update.message, 'Данные не найдены!')
+        return
+
+    # Цепочка выводится сверху вниз: от подразделения верхнего уровня до найденного
+    lines = [f'Подчиненность подразделения "{name}":']
+    lines.extend(f"{'  ' * level}{level + 1}. {unit}" for level, unit in enumerate(reversed(chain)))
+    for index, part in enumerate(prepare_message_parts('\n'.join(lines))):
+        await reply(update.message, part, priority=INTERACTIVE if index == 0 else BULK)
+
+async def inline_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    newRequestId()
+    with timed("inline"):
+        # Подсказки ищутся по префиксному индексу (двоичный поиск) и кэшируются по префиксу, поэтому ответ строится
+        # прямо в цикле событий, без пула поиска
+        results = []
+        for kind, key in finder.suggest(update.inline_query.query, INLINE_LIMIT):
+            selected_object = finder.show(kind, key)
+            if selected_object is None:
+                continue
+            record = selected_object[1]
+            description = record.position if kind == 'persona' else (record.name if kind == 'num' else record.topParent)
+            text = f"{key}\n\n{record_message_parts(record)[0]}"
+            results.append(InlineQueryResultArticle(id=str(len(results)), title=key, description=str(description or ''),
+                                                    input_message_content=InputTextMessageContent(text[:4096])))
+    await update.inline_query.answer(results, cache_time=INLINE_CACHE_TIME)
 
 async def handle_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    newRequestId()
     user_input = update.message.text
-    context.user_data['last_query'] = user_input
-    result = finder.search(user_input)
+    sessionStore.setLastQuery(update.effective_user.id, user_input)
 
-    logger.info(f'Пришел запрос: "{user_input}"')
+    logger.info(f'Пришел запрос: "{user_input}" (пул поиска: {searchPool.size} потоков, '
+                f'в очереди: {searchPool.queueDepth})')
+
+    try:
+        result = await searchPool.search(user_input)
+    except asyncio.TimeoutError:
+        logger.warning(f"Поиск по запросу '{user_input}' не уложился в {searchPool.timeout} с.")
+        await reply(update.message, 'Поиск занял слишком много времени. Попробуйте уточнить запрос.')
+        return
 
     if result[0] == "Данные не найдены!":
         logger.info(f"Данные по запросу '{user_input}' не найдены!")
-        await update.message.reply_text(result[0])
-        await update.message.reply_text('Введите следующее ФИО, наименование подразделения или его шифр для поиска данных:')
+        await reply(update.message, result[0])
+        await reply(update.message, 'Введите следующее ФИО, наименование подразделения или его шифр для поиска данных:')
 
-    elif result[0] == "Точного совпадения нет.. Ближайшие результаты:":
+    elif result[0] in CHOICE_HEADERS:
         keyboard = [[InlineKeyboardButton(result[i][0], callback_data=f"choice_{i}")]
-                    for i in range(1, 4)]
+                    for i in range(1, len(result))]
         keyboard.append([InlineKeyboardButton("Назад", callback_data='back')])
         reply_markup = InlineKeyboardMarkup(keyboard)
-        await update.message.reply_text(result[0], reply_markup=reply_markup)
+        sent = await reply(update.message, result[0], reply_markup=reply_markup)
+        # Храним только ключи: записи кандидатов занимают много памяти и устаревают после перезагрузки данных
+        candidateStore.put((sent.chat_id, sent.message_id), [(candidate[1].kind, candidate[0])
+                                                             for candidate in result[1:]])
 
     else:
         selected_object = result[1]
         name = selected_object[0]
         texts = selected_object[1:]
-        result_type = 'persona' if 'Должность:' in texts[0] else 'department'
+        result_type = 'persona' if texts[0].kind == 'persona' else 'department'
         find_text = f"Найден сотрудник: __*{name}*__" if result_type == 'persona' else f"Найдено подразделение: __*{name}*__"
-        await update.message.reply_text(text=find_text, parse_mode='Markdown')
+        await reply(update.message, text=find_text, parse_mode='Markdown')
         await process_search_results(update, context, name, texts, result_type)
 
+def session_user_id(update):
+    # Результат показывается и в ответ на сообщение (Update), и в ответ на нажатие кнопки (CallbackQuery)
+    return update.from_user.id if isinstance(update, CallbackQuery) else update.effective_user.id
+
+def session_texts(user_id):
+    # В состоянии хранится только ключ показанного объекта; записи заново берутся из данных. Если данные с тех пор
+    # перезагрузились, номера записей могли сместиться, и такое состояние считается устаревшим
+    session = sessionStore.get(user_id)
+    if session is None or session.kind is None or session.version != finder.dataVersion:
+        return None
+    selected_object = finder.show(session.kind, session.name)
+    return selected_object[1:] if selected_object is not None else None
+
 async def process_search_results(update, context, name, texts, result_type):
-    context.user_data['texts'] = texts
+    # Для шифра ключ - сам шифр, а для подразделения наименование совпадает с наименованием в записи
+    kind = 'persona' if result_type == 'persona' else ('structure' if texts[0].name == name else 'num')
+    sessionStore.setResult(session_user_id(update), kind, name, finder.dataVersion)
+    # Для шифра ключ результата - это шифр, а связи хранятся по наименованию подразделения
+    link_kind, link_name = ('persona', name) if result_type == 'persona' else ('structure', texts[0].name)
     if len(texts) == 1:
         await send_message_parts(update.message, texts[0], result_type)
-        await update.message.reply_text('Введите следующее ФИО, наименование подразделения или его шифр для поиска данных:')
+        await send_links(update.message, link_kind, link_name)
+        await reply(update.message, 'Введите следующее ФИО, наименование подразделения или его шифр для поиска данных:')
     else:
         # Добавляем превью
         previews = generate_preview_texts(texts, name, result_type)
         preview_text = '\n'.join(previews)
-        await update.message.reply_text(preview_text)
+        await reply(update.message, preview_text)
 
         reply_markup = create_pagination_keyboard(texts, current_page=0)
-        await update.message.reply_text("Выберите текст:", reply_markup=reply_markup)
+        await reply(update.message, "Выберите текст:", reply_markup=reply_markup)
+        await send_links(update.message, link_kind, link_name)
+
 
+async def send_links(message, kind, name):
+    # Связанные подразделения / руководители берутся из индекса связей; нажатие на кнопку link_N находит объект
+    # в хранилище кандидатов, без повторного поиска
+    links = finder.links(kind, name)[:LINKS_LIMIT]
+    if not links:
+        return
+    keyboard = [[InlineKeyboardButton(label[:64], callback_data=f"link_{i}")]
+                for i, (label, _, _) in enumerate(links, start=1)]
+    sent = await reply(message, "Связанные данные:", reply_markup=InlineKeyboardMarkup(keyboard))
+    candidateStore.put((sent.chat_id, sent.message_id), [(target_kind, target) for _, target_kind, target in links])
 
-async def send_message_parts(message, text, result_type):
-    message_parts = prepare_message_parts(text)
-    for part in message_parts:
-        await message.reply_text(part)
-    link_message = "Приказы о полномочиях работников находятся [здесь](https://ud.hse.ru/powers)." if result_type == 'persona' else "Полная организационная структура университета [здесь](https://www.hse.ru/orgstructure/)."
-    await message.reply_text(link_message, parse_mode='Markdown')
+
+async def send_message_parts(message, record, result_type):
+    with timed("send"):
+        # Текст записи собирается в момент первой отправки и дальше берется из кэша. Первая часть ответа уходит с
+        # высоким приоритетом, продолжение - с обычным, чтобы длинный ответ не задерживал первые ответы другим
+        message_parts = record_message_parts(record)
+        link_message = "Приказы о полномочиях работников находятся [здесь](https://ud.hse.ru/powers)." if result_type == 'persona' else "Полная организационная структура университета [здесь](https://www.hse.ru/orgstructure/)."
+        # Все части ставятся в очередь сразу (порядок внутри чата очередь сохраняет), а ждем отправки всех вместе
+        sends = [reply(message, part, priority=INTERACTIVE if index == 0 else BULK)
+                 for index, part in enumerate(message_parts)]
+        sends.append(reply(message, link_message, priority=BULK, parse_mode='Markdown'))
+        await asyncio.gather(*sends)
 
 async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    newRequestId()
     query = update.callback_query
     await query.answer()
     data = query.data
 
     if data.startswith('page_'):
         page_number = int(data.split('_')[1])
-        texts = context.user_data['texts']
+        texts = session_texts(query.from_user.id)
+        if texts is None:
+            await query.message.edit_text("Результаты поиска устарели. Введите запрос еще раз.", reply_markup=None)
+            return
         reply_markup = create_pagination_keyboard(texts, current_page=page_number)
         await query.message.edit_text("Выберите текст:", reply_markup=reply_markup)
 
     elif data.startswith('text_'):
         text_index = int(data.split('_')[1]) - 1
-        texts = context.user_data['texts']
+        texts = session_texts(query.from_user.id)
+        if texts is None:
+            await query.message.edit_text("Результаты поиска устарели. Введите запрос еще раз.", reply_markup=None)
+            return
         if 0 <= text_index < len(texts):
-            result_type = 'persona' if 'Должность:' in texts[text_index] else 'department'
+            result_type = 'persona' if texts[text_index].kind == 'persona' else 'department'
             await query.edit_message_text(text=f"Выбранный текст (№{text_index + 1}):")
             await send_message_parts(query.message, texts[text_index], result_type)
-            await query.message.reply_text('Введите следующее ФИО, наименование подразделения или его шифр для поиска данных:')
+            await reply(query.message, 'Введите следующее ФИО, наименование подразделения или его шифр для поиска данных:')
         else:
             await query.message.edit_text("Ошибка: недопустимый индекс текста.", reply_markup=None)
 
@@ -137,27 +358,116 @@ async def button_handler(update: Update, context: ContextTypes.DEFAULT_TYPE):
     elif data == 'back':
         await query.message.edit_text(text='Введите следующее ФИО, наименование подразделения или его шифр для поиска данных:')
 
+    elif data.startswith('link_'):
+        link_index = int(data.split('_')[1])
+        links = candidateStore.get((query.message.chat_id, query.message.message_id))
+        if links is None:
+            await query.message.edit_text("Результаты поиска устарели. Введите запрос еще раз.", reply_markup=None)
+            return
+        if not 1 <= link_index <= len(links):
+            await reply(query.message, "Ошибка: недопустимый выбор.")
+            return
+        link_kind, link_name = links[link_index - 1]
+        selected_object = finder.show(link_kind, link_name)
+        if selected_object is None:
+            # Данные могли перезагрузиться, и связанного объекта больше нет
+            await reply(query.message, "Данные не найдены!")
+            return
+        logger.info(f'Отправлен связанный ответ: "{link_name}"')
+        texts = selected_object[1:]
+        result_type = 'persona' if link_kind == 'persona' else 'department'
+        await reply(query.message, text=f"__*{link_name}*__", parse_mode='Markdown')
+        await process_search_results(query, context, link_name, texts, result_type)
+
     elif data.startswith('choice_'):
         choice_index = int(data.split('_')[1])
-        last_query = context.user_data.get('last_query', '')
-        result = finder.search(last_query)
-        if result and 1 <= choice_index < len(result):
-            selected_object = result[choice_index]
-            name = selected_object[0]
+        candidates = candidateStore.get((query.message.chat_id, query.message.message_id))
+        if candidates is None:
+            # Запись вытеснена из хранилища или устарела (например, после перезапуска бота)
+            await query.message.edit_text("Результаты поиска устарели. Введите запрос еще раз.", reply_markup=None)
+            return
+        if 1 <= choice_index <= len(candidates):
+            kind, name = candidates[choice_index - 1]
+            selected_object = finder.show(kind, name)
+            if selected_object is None:
+                # Данные могли перезагрузиться, и кандидата больше нет
+                await query.message.edit_text("Данные не найдены!", reply_markup=None)
+                return
             logger.info(f'Отправлен ответ: "{name}"')
             texts = selected_object[1:]
-            result_type = 'persona' if 'Должность:' in texts[0] else 'department'
+            result_type = 'persona' if kind == 'persona' else 'department'
             await query.edit_message_text(text=f"__*{name}*__", parse_mode='Markdown')
             await process_search_results(query, context, name, texts, result_type)
         else:
             await query.message.edit_text("Ошибка: недопустимый выбор.", reply_markup=None)
 
+async def run_webhook(application):
+    # Без секрета любой, кто достучится до порта, сможет подсовывать боту обновления, поэтому без него не запускаемся
+    secret_token = os.getenv("WEBHOOK_SECRET")
+    if not secret_token:
+        logger.error("В режиме webhook нужно задать WEBHOOK_SECRET")
+        raise SystemExit(1)
+
+    # Обновления приходят на локальный HTTP-сервер и попадают в ту же очередь обновлений, что и при polling
+    server = WebhookServer(application, host=os.getenv("WEBHOOK_HOST", "0.0.0.0"),
+                           port=int(os.getenv("WEBHOOK_PORT", "8443")), path=os.getenv("WEBHOOK_PATH", "/telegram"),
+                           secretToken=secret_token,
+                           maxConcurrent=int(os.getenv("WEBHOOK_MAX_CONCURRENT", "64")),
+                           maxQueued=int(os.getenv("WEBHOOK_MAX_QUEUED", "1000")))
+    REGISTRY.register(Counter("cmbot_webhook_updates_total", "Обновления, принятые через webhook.",
+                              source=lambda: server.accepted))
+    REGISTRY.register(Counter("cmbot_webhook_rejected_total", "Отклоненные запросы webhook (токен, перегрузка).",
+                              source=lambda: server.rejected))
+
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop_event.set)
+
+    async with application:
+        await application.start()
+        await server.start()
+        # Адрес регистрируется в Telegram только если задан; при нескольких репликах за балансировщиком его
+        # достаточно задать одной из них
+        webhook_url = os.getenv("WEBHOOK_URL")
+        if webhook_url:
+            await application.bot.set_webhook(webhook_url, secret_token=secret_token,
+                                              max_connections=int(os.getenv("WEBHOOK_MAX_CONNECTIONS", "40")),
+                                              allowed_updates=Update.ALL_TYPES)
+        await stop_event.wait()
+        await server.stop()
+        await application.stop()
+
 def main():
-    application = Application.builder().token(os.getenv("BOT_TOKEN")).build()
+    # Обновления обрабатываются параллельно: пока один пользователь ждет результат поиска, бот отвечает остальным
+    builder = (Application.builder().token(os.getenv("BOT_TOKEN"))
+               .concurrent_updates(int(os.getenv("CONCURRENT_UPDATES", "64"))))
+    if os.getenv("BOT_API_URL"):
+        # Локальный сервер Bot API (или заглушка scripts/fake_bot_api.py) работает по HTTP/1.1
+        builder = builder.base_url(os.getenv("BOT_API_URL")).http_version("1.1").get_updates_http_version("1.1")
+    application = builder.build()
     application.add_handler(CommandHandler("start", start))
+    application.add_handler(CommandHandler("stats", stats))
+    application.add_handler(CommandHandler("subunits", subunits))
+    application.add_handler(CommandHandler("path", path))
     application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, handle_message))
     application.add_handler(CallbackQueryHandler(button_handler))
-    application.run_polling()
+    application.add_handler(InlineQueryHandler(inline_query))
+
+    # Файл данных проверяется в фоне; при изменении индексы перестраиваются и подменяются без перезапуска бота
+    reloadInterval = float(os.getenv("DATA_RELOAD_INTERVAL", "60"))
+    if reloadInterval > 0:
+        DataWatcher(finder, interval=reloadInterval).start()
+
+    # Метрики в формате Prometheus отдаются на локальном порту (METRICS_PORT=0 отключает сервер)
+    metricsPort = int(os.getenv("METRICS_PORT", "9090"))
+    if metricsPort > 0:
+        MetricsServer(os.getenv("METRICS_HOST", "127.0.0.1"), metricsPort).start()
+
+    if os.getenv("BOT_MODE", "polling") == "webhook":
+        asyncio.run(run_webhook(application))
+    else:
+        application.run_polling()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,151 @@
+import asyncio
+import hmac
+import json
+import logging
+
+from telegram import Update
+
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "x-telegram-bot-api-secret-token"
+
+REASONS = {200: "OK", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found", 405: "Method Not Allowed",
+           411: "Length Required", 413: "Payload Too Large", 503: "Service Unavailable"}
+
+
+class WebhookServer:
+    """
+    HTTP-сервер на asyncio для приема обновлений Telegram в режиме webhook. Работает в том же цикле событий, что и
+    Application: принятое обновление разбирается через Update.de_json и кладется в application.update_queue, откуда
+    его забирают те же обработчики, что и в режиме polling.
+
+    - Запрос без заголовка X-Telegram-Bot-Api-Secret-Token с верным значением отклоняется (401). Без секретного
+      токена сервер не создается: иначе любой, кто достучится до порта, мог бы подсовывать боту обновления.
+    - Одновременно обрабатывается не больше maxConcurrent запросов. Если в очереди обновлений больше maxQueued
+      необработанных обновлений, сервер отвечает 503, и Telegram повторит доставку позже: так нагрузка не копится в
+      памяти бота.
+    - GET /healthz отвечает 200, чтобы балансировщик мог проверять реплику.
+    """
+
+    def __init__(self, application, host: str = "0.0.0.0", port: int = 8443, path: str = "/telegram",
+                 secretToken: str = None, maxConcurrent: int = 64, maxQueued: int = 1000,
+                 maxBodySize: int = 1 << 20, idleTimeout: float = 60.0):
+        if not secretToken:
+            raise ValueError("Для webhook нужен секретный токен (secretToken)")
+
+        self.application = application
+        self.host = host
+        self.port = port
+        self.path = "/" + path.lstrip("/")
+        self.secretToken = secretToken
+        self.maxQueued = maxQueued
+        self.maxBodySize = maxBodySize
+        self.idleTimeout = idleTimeout
+        self.accepted = 0
+        self.rejected = 0
+        self.__semaphore = asyncio.Semaphore(maxConcurrent)
+        self.__server = None
+
+    async def start(self) -> None:
+        self.__server = await asyncio.start_server(self.__serve, self.host, self.port)
+        # При port=0 порт выбирает система
+        self.port = self.__server.sockets[0].getsockname()[1]
+        logger.info(f"Webhook принимает обновления на {self.host}:{self.port}{self.path}")
+
+    async def stop(self) -> None:
+        if self.__server is not None:
+            self.__server.close()
+            await self.__server.wait_closed()
+            self.__server = None
+
+    async def __serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        # Соединение может быть постоянным (keep-alive): запросы читаются до закрытия или простоя
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b"\r\n\r\n"), self.idleTimeout)
+                except (asyncio.IncompleteReadError, asyncio.TimeoutError, asyncio.LimitOverrunError):
+                    break
+
+                requestLine, *headerLines = head.decode("latin-1").split("\r\n")
+                parts = requestLine.split(" ")
+                if len(parts) != 3:
+                    await self.__respond(writer, 400, close=True)
+                    break
+                method, target, version = parts
+                headers = {}
+                for line in headerLines:
+                    if ":" in line:
+                        name, value = line.split(":", 1)
+                        headers[name.strip().lower()] = value.strip()
+
+                keepAlive = (headers.get("connection", "").lower() != "close"
+                             if version == "HTTP/1.1" else headers.get("connection", "").lower() == "keep-alive")
+
+                if "content-length" not in headers:
+                    body = b""
+                    if method == "POST" or "transfer-encoding" in headers:
+                        await self.__respond(writer, 411, close=True)
+                        break
+                else:
+                    try:
+                        length = int(headers["content-length"])
+                    except ValueError:
+                        await self.__respond(writer, 400, close=True)
+                        break
+                    if length > self.maxBodySize:
+                        await self.__respond(writer, 413, close=True)
+                        break
+                    body = await reader.readexactly(length)
+
+                async with self.__semaphore:
+                    status = await self.__handle(method, target.split("?", 1)[0], headers, body)
+                await self.__respond(writer, status, close=not keepAlive)
+                if not keepAlive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def __handle(self, method: str, path: str, headers: dict, body: bytes) -> int:
+        """
+        Данная функция предназначена для обработки одного запроса.
+
+        :return
+        (int): HTTP-статус ответа.
+        """
+
+        if path == "/healthz":
+            return 200 if method == "GET" else 405
+        if path != self.path:
+            return 404
+        if method != "POST":
+            return 405
+        # Сравниваем байты: заголовки разобраны как latin-1, и compare_digest падает на str с символами вне ASCII
+        if not hmac.compare_digest(headers.get(SECRET_HEADER, "").encode("latin-1"), self.secretToken.encode("utf-8")):
+            self.rejected += 1
+            logger.warning("Webhook: запрос с неверным секретным токеном отклонен")
+            return 401
+        if self.application.update_queue.qsize() >= self.maxQueued:
+            self.rejected += 1
+            return 503
+
+        try:
+            update = Update.de_json(json.loads(body), self.application.bot)
+        except Exception:
+            logger.exception("Webhook: не удалось разобрать обновление")
+            return 400
+        if update is None:
+            return 400
+
+        await self.application.update_queue.put(update)
+        self.accepted += 1
+        return 200
+
+    @staticmethod
+    async def __respond(writer: asyncio.StreamWriter, status: int, close: bool = False) -> None:
+        writer.write(f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\nContent-Length: 0\r\n"
+                     f"Connection: {'close' if close else 'keep-alive'}\r\n\r\n".encode("latin-1"))
+        await writer.drain()
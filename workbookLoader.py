@@ -0,0 +1,71 @@
+import sys
+
+import openpyxl
+
+try:
+    import resource
+except ImportError:  # Windows: модуля resource нет, пиковую память не измеряем
+    resource = None
+
+
+PERSONA_SHEET = "Полномочия"
+STRUCTURE_SHEET = "Оргструктура"
+
+
+def loadWorkbook(filePath: str, sheetNames: tuple = (PERSONA_SHEET, STRUCTURE_SHEET)) -> dict:
+    """
+    Данная функция предназначена для однократного чтения книги Excel. Книга открывается в режиме read_only, каждый
+    лист читается одним проходом, строки забираются в виде кортежей значений (values_only) без объектов ячеек.
+    Как и при прежнем чтении через ячейки, для ячеек с формулой возвращается текст формулы, а не сохраненное значение.
+
+    :param
+    filePath (str): путь к файлу Data.xlsx.
+    sheetNames (tuple): названия листов, которые нужно прочитать.
+
+    :return
+    (dict): словарь "название листа" -> список строк (кортежей значений) без строки заголовка.
+    """
+
+    workbook = openpyxl.load_workbook(filePath, read_only=True)
+    try:
+        sheets = dict()
+        for sheetName in sheetNames:
+            worksheet = workbook[sheetName]
+            sheets[sheetName] = list(worksheet.iter_rows(min_row=2, values_only=True))
+        return sheets
+    finally:
+        # В режиме read_only файл остается открытым до явного закрытия книги.
+        workbook.close()
+
+
+def getValue(row: tuple, index: int, defaultMessage: str = "нет") -> str:
+    """
+    Данная функция предназначена для получения значения из строки. Если значение None (или в строке нет такой
+    колонки), то заменяем его на defaultMessage.
+
+    :param
+    row (tuple): строчка (кортеж значений), из которой будет извлечен элемент.
+    index (int): индекс извлекаемого элемента в строчке.
+
+    :return
+    (str): значение в ячейке в формате строки (defaultMessage в случае отсутствия значения)
+    """
+
+    value = row[index] if index < len(row) else None
+    return str(value) if value is not None else defaultMessage
+
+
+def peakMemoryMb() -> float:
+    """
+    Данная функция возвращает пиковый объем резидентной памяти процесса (peak RSS) в мегабайтах.
+
+    :return
+    (float): пиковый RSS в МБ, либо 0.0, если платформа не позволяет его измерить.
+    """
+
+    if resource is None:
+        return 0.0
+
+    # На Linux ru_maxrss в килобайтах, на macOS - в байтах.
+    maxRss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxRss / 1024 / 1024 if sys.platform == "darwin" else maxRss / 1024